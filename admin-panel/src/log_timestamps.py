@@ -0,0 +1,25 @@
+"""
+Docker log timestamps for the live log console.
+
+Kept apart from main.py so the parsing can be unit tested without Docker.
+"""
+
+import re
+from datetime import datetime
+from typing import Optional
+
+_LOG_TIMESTAMP_RE = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,9}))?(Z|[+-]\d{2}:\d{2})$")
+
+
+def parse_log_timestamp(value: str) -> Optional[int]:
+    """Docker log timestamp (RFC3339Nano) or unix seconds -> ns since epoch, None if invalid."""
+    value = value.strip()
+    match = _LOG_TIMESTAMP_RE.match(value)
+    if match:
+        date_part, fraction, tz = match.groups()
+        seconds = datetime.fromisoformat(date_part + ("+00:00" if tz == "Z" else tz)).timestamp()
+        return int(seconds) * 1_000_000_000 + int((fraction or "").ljust(9, "0"))
+    try:
+        return int(float(value) * 1_000_000_000)
+    except (ValueError, OverflowError):
+        return None
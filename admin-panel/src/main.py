@@ -12,27 +12,37 @@ Security Features:
 """
 
 import os
+import re
+import json
+import time
+import asyncio
 import logging
+import threading
 import secrets
 import hashlib
 import hmac
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal, Set, Tuple
 from contextlib import asynccontextmanager
-from functools import wraps
+from functools import partial, wraps
 
 import docker
-import redis
+import redis.asyncio as aioredis
 import itsdangerous
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, Query, Response
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field, validator, EmailStr
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, func, Text, text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Enum, func, Text, text, ForeignKey, select, delete
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import relationship, selectinload
+
+from src.log_timestamps import parse_log_timestamp
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO)
@@ -43,13 +53,17 @@ POSTGRES_USER = os.getenv("POSTGRES_USER", "netadmin")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "netadmin_secret")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "netadmin_db")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}/{POSTGRES_DB}"
+DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}/{POSTGRES_DB}"
+# Connections held at once = concurrent DB-bound requests; beyond that requests wait for a connection
+ADMIN_DB_POOL_SIZE = int(os.getenv("ADMIN_DB_POOL_SIZE", 10))
+ADMIN_DB_MAX_OVERFLOW = int(os.getenv("ADMIN_DB_MAX_OVERFLOW", 10))
+ADMIN_DB_POOL_TIMEOUT = int(os.getenv("ADMIN_DB_POOL_TIMEOUT", 30))  # seconds
+# Ranked search migration applied at startup (config/ is mounted read-only, see docker-compose.yml)
+SEARCH_MIGRATION_SQL = os.getenv("SEARCH_MIGRATION_SQL", "/app/config/migrate_search_v3.sql")
 
 # Redis Configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_DB = 1 # Use DB 1 for sessions to separate from queues/cache
-redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
 # Security Configuration
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
@@ -61,6 +75,24 @@ if not ADMIN_PASSWORD or ADMIN_PASSWORD == "admin":
 SECRET_KEY = os.getenv("ADMIN_SECRET_KEY", secrets.token_hex(32))
 SESSION_TTL_HOURS = 24 * 7 # 7 days session persistence
 TOKEN_EXPIRY_HOURS = SESSION_TTL_HOURS # Align token expiry with session TTL
+# Validated sessions are trusted in-process for this long before Redis is asked again
+SESSION_CACHE_TTL = float(os.getenv("ADMIN_SESSION_CACHE_TTL", 10))  # seconds
+SESSION_CACHE_MAX_SIZE = 1000
+# Sliding expiry is pushed back at most this often per session (not on every request)
+SESSION_REFRESH_INTERVAL = float(os.getenv("ADMIN_SESSION_REFRESH_INTERVAL", 300))  # seconds
+
+# Docker Configuration
+DOCKER_RECONCILE_INTERVAL = float(os.getenv("DOCKER_RECONCILE_INTERVAL", 60))  # seconds between full re-lists
+DOCKER_MAX_WORKERS = int(os.getenv("DOCKER_MAX_WORKERS", 8))                   # concurrent blocking Docker API calls
+DOCKER_BATCH_MAX = 20
+SSE_KEEPALIVE_SECONDS = 15
+
+# Log Streaming Configuration
+LOG_STREAM_MAX = int(os.getenv("LOG_STREAM_MAX", 10))          # concurrent log followers (each holds a thread + connection)
+LOG_STREAM_BUFFER = int(os.getenv("LOG_STREAM_BUFFER", 1000))  # lines queued per follower before the reader waits
+LOG_STREAM_BATCH = 200                                         # lines per SSE event at most
+LOG_STREAM_MAX_TAIL = 5000
+LOG_LINE_MAX_BYTES = 64 * 1024                                 # longer unterminated lines are cut
 
 # Session Signer
 signer = itsdangerous.TimestampSigner(SECRET_KEY)
@@ -107,6 +139,14 @@ class EmployeeUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+TELEGRAM_USER_ROLES = ('CREATOR', 'CTO', 'IT_HEAD', 'SENIOR_ADMIN', 'ADMIN', 'JUNIOR_ADMIN', 'USER')  # user_role enum
+
+
+class TelegramUserRoleUpdate(BaseModel):
+    """Validated bot user role change."""
+    role: Literal[TELEGRAM_USER_ROLES]
+
+
 class TargetCreate(BaseModel):
     """Validated monitoring target creation."""
     name: str = Field(..., min_length=1, max_length=100)
@@ -114,6 +154,22 @@ class TargetCreate(BaseModel):
     interval: int = Field(..., ge=10, le=3600)  # 10s to 1h
 
 
+class ContainerBatchAction(BaseModel):
+    """Batch container operation (containers by id or name)."""
+    action: Literal['restart', 'stop']
+    containers: List[str]
+    timeout: int = Field(10, ge=0, le=120)  # seconds to wait for a graceful stop
+
+    @validator('containers')
+    def validate_containers(cls, v):
+        v = list(dict.fromkeys(c.strip() for c in v if c.strip()))
+        if not v:
+            raise ValueError('No containers given')
+        if len(v) > DOCKER_BATCH_MAX:
+            raise ValueError(f'At most {DOCKER_BATCH_MAX} containers per batch')
+        return v
+
+
 class SortColumn:
     """Whitelist for sortable columns - prevents SQL injection via getattr."""
     ALLOWED_COLUMNS = frozenset({
@@ -130,8 +186,17 @@ class SortColumn:
 
 
 # --- Database Setup ---
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine: queries never block the event loop, so one slow inventory query
+# doesn't stall other requests (or /health)
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=ADMIN_DB_POOL_SIZE,
+    max_overflow=ADMIN_DB_MAX_OVERFLOW,
+    pool_timeout=ADMIN_DB_POOL_TIMEOUT,
+)
+# expire_on_commit=False: objects stay readable (templates) after commit without lazy IO
+async_session = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
 
@@ -160,6 +225,17 @@ class MonitoredTarget(Base):
     group = relationship("MonitoringGroup", back_populates="targets")
 
 
+class TelegramUser(Base):
+    """Bot users and their RBAC role (config/init_rbac.sql)."""
+    __tablename__ = "telegram_users"
+    id = Column(Integer, primary_key=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False)
+    username = Column(String(255))
+    role = Column(Enum(*TELEGRAM_USER_ROLES, name="user_role"), default="USER")
+    karma_points = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Employee(Base):
     __tablename__ = "employees"
     id = Column(Integer, primary_key=True, index=True)
@@ -179,6 +255,8 @@ class Employee(Base):
     
     # Hardware Inventory
     workstation = Column(String(100), index=True)
+    ws_prefix = Column(String(20))  # Canonical WS key, see parse_workstation()
+    ws_number = Column(Integer)
     device_type = Column(String(50))
     specs_cpu = Column(String(255))
     specs_gpu = Column(String(255))
@@ -216,17 +294,10 @@ class WorkstationRange(Base):
     is_active = Column(Boolean, default=True)
 
 
-# Note: In production, use Alembic migrations instead of create_all()
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
+async def get_db():
     """Database session dependency."""
-    db = SessionLocal()
-    try:
+    async with async_session() as db:
         yield db
-    finally:
-        db.close()
 
 
 # --- Security Utilities ---
@@ -279,8 +350,302 @@ def verify_password(provided: str, expected: str) -> bool:
 
 
 # --- Docker & Redis Clients ---
-docker_client = docker.from_env()
-redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+# Pool sized for every executor worker, every log follower and the events stream
+docker_client = docker.from_env(max_pool_size=DOCKER_MAX_WORKERS + LOG_STREAM_MAX + 2)
+
+# The docker SDK blocks (a restart waits out the stop timeout); its calls run here,
+# off the event loop, at most DOCKER_MAX_WORKERS at a time
+docker_executor = ThreadPoolExecutor(max_workers=DOCKER_MAX_WORKERS, thread_name_prefix="docker")
+
+
+async def run_docker(func, *args, **kwargs):
+    """Run a blocking docker SDK call in the Docker executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(docker_executor, partial(func, *args, **kwargs))
+# Sessions, config events and the bot search cache (all in DB 0)
+redis_client = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+
+
+# --- Container State Snapshot ---
+
+# Events that can change what the dashboard shows (exec_*/health events are ignored)
+CONTAINER_STATE_ACTIONS = frozenset({
+    "create", "start", "restart", "die", "stop", "kill", "oom",
+    "pause", "unpause", "rename", "update", "destroy"
+})
+
+
+def is_dashboard_container(name: str) -> bool:
+    """Containers of this stack shown on the dashboard."""
+    return "netadmin" in name or "redis" in name or "db" in name
+
+
+def container_summary(attrs: dict) -> dict:
+    """
+    Dashboard fields from a container list entry or an inspect result.
+
+    Both sources yield the same fields, so a snapshot only changes when the
+    container does (the list's "Up 3 hours" text is not kept: it drifts by itself).
+    started_at is only in inspect results; list entries leave it None.
+    """
+    state = attrs.get("State")
+    started_at = None
+    if isinstance(state, dict):
+        # inspect: {"Name": "/x", "State": {"Status": "running", "StartedAt": "2024-...Z", ...}}
+        name = attrs.get("Name", "")
+        started = state.get("StartedAt") or ""
+        if started and not started.startswith("0001-"):  # never started
+            started_at = started[:19] + "Z"  # Docker reports UTC, drop the nanoseconds
+        state = state.get("Status")
+    else:
+        # list: {"Names": ["/x"], "State": "running", "Status": "Up 3 hours"}
+        names = attrs.get("Names") or [""]
+        name = names[0]
+    return {
+        "id": attrs["Id"][:12],
+        "name": name.lstrip("/"),
+        "state": state or "unknown",
+        "started_at": started_at,
+    }
+
+
+class ContainerStateCache:
+    """
+    Container snapshot kept current from the Docker events stream.
+
+    - A daemon thread follows the (blocking) events stream and re-inspects each
+      container an event is about; the result is applied on the event loop
+    - A full re-list every DOCKER_RECONCILE_INTERVAL seconds (and after the stream
+      reconnects) repairs anything missed
+    - Reads are O(1): the dashboard view is rebuilt on change, not per request
+    - SSE subscribers get the new view on every change (latest wins)
+    """
+
+    def __init__(self, client, reconcile_interval: float = DOCKER_RECONCILE_INTERVAL):
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self._containers: Dict[str, dict] = {}  # full container id -> summary
+        self._view: List[dict] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stream = None
+        self._stopping = threading.Event()
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self.version = 0
+
+    @property
+    def containers(self) -> List[dict]:
+        """Dashboard containers, sorted by name (do not mutate)."""
+        return self._view
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.reconcile()
+        threading.Thread(target=self._follow_events, name="docker-events", daemon=True).start()
+        self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+
+    async def reconcile(self) -> None:
+        """Replace the snapshot with a full listing (one API call, no per-container inspect)."""
+        try:
+            entries = await run_docker(self.client.api.containers, all=True)
+        except Exception as e:
+            logger.error(f"Docker reconcile failed: {e}")
+            return
+        containers = {}
+        for entry in entries:
+            summary = container_summary(entry)
+            known = self._containers.get(entry["Id"])
+            if known is not None and known["state"] == summary["state"]:
+                # Listing has no start time: keep the one the events stream inspected
+                summary["started_at"] = known["started_at"]
+            containers[entry["Id"]] = summary
+        if containers != self._containers:
+            self._containers = containers
+            self._publish()
+
+    async def _reconcile_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            await self.reconcile()
+
+    def _follow_events(self) -> None:
+        """Runs in its own thread: the docker SDK events stream blocks on the socket."""
+        delay = 1
+        while not self._stopping.is_set():
+            try:
+                self._stream = self.client.api.events(decode=True, filters={"type": "container"})
+                # Catch up on whatever changed while the stream was down
+                asyncio.run_coroutine_threadsafe(self.reconcile(), self._loop)
+                delay = 1
+                for event in self._stream:
+                    action = (event.get("Action") or event.get("status") or "").split(":", 1)[0]
+                    if action not in CONTAINER_STATE_ACTIONS:
+                        continue
+                    container_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+                    if not container_id:
+                        continue
+                    summary = None
+                    if action != "destroy":
+                        try:
+                            summary = container_summary(self.client.api.inspect_container(container_id))
+                        except docker.errors.NotFound:
+                            pass
+                    self._loop.call_soon_threadsafe(self._apply, container_id, summary)
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                logger.warning(f"Docker events stream lost: {e}")
+            self._stopping.wait(delay)
+            delay = min(delay * 2, 60)
+
+    def _apply(self, container_id: str, summary: Optional[dict]) -> None:
+        if summary is None:
+            if self._containers.pop(container_id, None) is None:
+                return
+        elif self._containers.get(container_id) == summary:
+            return
+        else:
+            self._containers[container_id] = summary
+        self._publish()
+
+    def _publish(self) -> None:
+        self._view = sorted(
+            (c for c in self._containers.values() if is_dashboard_container(c["name"])),
+            key=lambda c: c["name"]
+        )
+        self.version += 1
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self._view)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+
+container_state = ContainerStateCache(docker_client)
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# --- Container Log Streaming ---
+
+def open_log_stream(container_id: str, since_ns: Optional[int], tail: int):
+    """Follow a container's logs with timestamps (blocking; run via run_docker)."""
+    container = docker_client.containers.get(container_id)
+    if since_ns is not None:
+        # Whole seconds here; LogFollower skips the lines up to the exact cursor
+        return container.logs(stream=True, follow=True, timestamps=True, since=since_ns // 1_000_000_000)
+    return container.logs(stream=True, follow=True, timestamps=True, tail=tail)
+
+
+class LogFollower:
+    """
+    Follows one container's log stream for one SSE client.
+
+    A dedicated thread reads the (blocking) docker stream, splits it into lines and
+    hands (timestamp, line) pairs that pass the filter to the event loop through a
+    bounded queue. A slow client makes the thread wait, leaving the backlog in the
+    Docker socket instead of in memory. close() ends the thread by closing the stream.
+    """
+
+    END = None  # queued after the last line
+
+    def __init__(self, stream, loop: asyncio.AbstractEventLoop, since_ns: Optional[int] = None, match=None):
+        self.stream = stream
+        self.loop = loop
+        self.since_ns = since_ns
+        self.match = match
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_STREAM_BUFFER)
+        self.error: Optional[str] = None
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        threading.Thread(target=self._read, name="docker-logs", daemon=True).start()
+
+    def close(self) -> None:
+        self._closed.set()
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+
+    def _offer(self, item) -> bool:
+        """Queue an item, waiting while the queue is full; False once closed."""
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return True
+            except TimeoutError:
+                if self._closed.is_set():
+                    future.cancel()
+                    return False
+
+    def _line(self, raw: bytes) -> bool:
+        # "2024-05-01T12:00:00.123456789Z message"
+        timestamp, _, message = raw.decode("utf-8", errors="replace").partition(" ")
+        timestamp_ns = parse_log_timestamp(timestamp)
+        if timestamp_ns is None:
+            timestamp, message = "", raw.decode("utf-8", errors="replace")
+        elif self.since_ns is not None and timestamp_ns <= self.since_ns:
+            return True
+        message = message.replace("\r", "")
+        if self.match is not None and not self.match(message):
+            return True
+        return self._offer((timestamp, message))
+
+    def _read(self) -> None:
+        pending = b""
+        try:
+            for chunk in self.stream:
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                if len(pending) > LOG_LINE_MAX_BYTES:
+                    lines.append(pending)
+                    pending = b""
+                for raw in lines:
+                    if not self._line(raw):
+                        return
+            if pending:
+                self._line(pending)
+        except Exception as e:
+            if not self._closed.is_set():
+                self.error = str(e)
+        finally:
+            if not self._closed.is_set():
+                try:
+                    self._offer(self.END)
+                except RuntimeError:
+                    pass  # event loop already closed
+
+
+log_followers: Set[LogFollower] = set()
+
+
+def sse_log_batch(batch: List[Tuple[str, str]]) -> str:
+    """One 'logs' event, one data line per log line; the id is the resume cursor."""
+    cursor = next((timestamp for timestamp, _ in reversed(batch) if timestamp), "")
+    data = "".join(f"data: {line}\n" for _, line in batch)
+    return (f"id: {cursor}\n" if cursor else "") + f"event: logs\n{data}\n"
 
 
 # --- FastAPI App ---
@@ -359,7 +724,41 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 # --- Authentication Helpers (Redis Sessions) ---
 
-def create_session(user_id: str, role: str = "admin") -> str:
+class SessionCache:
+    """
+    Short-lived in-process cache of validated sessions, keyed by the signed cookie value.
+
+    HTMX pages fire many partial requests per view; within SESSION_CACHE_TTL they
+    are authenticated without touching Redis. Entries outlive their validity so the
+    time of the last sliding-expiry refresh is remembered across revalidations.
+    """
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, max_size: int = SESSION_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # signed id -> (session data, valid until, last TTL refresh) - monotonic times
+        self._entries: "OrderedDict[str, Tuple[Dict[str, str], float, float]]" = OrderedDict()
+
+    def get(self, signed_session_id: str) -> Optional[Tuple[Dict[str, str], float, float]]:
+        entry = self._entries.get(signed_session_id)
+        if entry is not None:
+            self._entries.move_to_end(signed_session_id)
+        return entry
+
+    def put(self, signed_session_id: str, data: Dict[str, str], refreshed_at: float) -> None:
+        self._entries[signed_session_id] = (data, time.monotonic() + self.ttl, refreshed_at)
+        self._entries.move_to_end(signed_session_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict(self, signed_session_id: str) -> None:
+        self._entries.pop(signed_session_id, None)
+
+
+session_cache = SessionCache()
+
+
+async def create_session(user_id: str, role: str = "admin") -> str:
     """Create a new session in Redis and return the signed session ID."""
     session_id = str(uuid.uuid4())
     session_data = {
@@ -367,21 +766,29 @@ def create_session(user_id: str, role: str = "admin") -> str:
         "role": role,
         "created_at": datetime.utcnow().isoformat()
     }
-    # Store in Redis with TTL
+    # Store in Redis with TTL (one round trip)
     redis_key = f"session:{session_id}"
-    redis_client.hset(redis_key, mapping=session_data)
-    redis_client.expire(redis_key, timedelta(hours=SESSION_TTL_HOURS))
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(redis_key, mapping=session_data)
+    pipe.expire(redis_key, timedelta(hours=SESSION_TTL_HOURS))
+    await pipe.execute()
     
     # Sign the session ID to prevent tampering
     signed_session_id = signer.sign(session_id).decode('utf-8')
+    session_cache.put(signed_session_id, session_data, time.monotonic())
     return signed_session_id
 
-def get_current_session(request: Request) -> Optional[dict]:
-    """Retrieve and validate the session from the cookie."""
+async def get_current_session(request: Request) -> Optional[dict]:
+    """Retrieve and validate the session from the cookie (cached, see SessionCache)."""
     signed_session_id = request.cookies.get("session_id")
     if not signed_session_id:
         return None
     
+    now = time.monotonic()
+    cached = session_cache.get(signed_session_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    
     try:
         # Verify signature and get original session ID
         # max_age ensures the signature itself hasn't expired (double check)
@@ -389,28 +796,34 @@ def get_current_session(request: Request) -> Optional[dict]:
     except (itsdangerous.BadSignature, itsdangerous.SignatureExpired):
         return None
         
-    # Check Redis
+    # Check Redis; refresh TTL on activity (sliding expiration), throttled per session.
+    # EXPIRE on a missing key is a no-op, so both go in one round trip.
     redis_key = f"session:{session_id}"
-    session_data = redis_client.hgetall(redis_key)
+    refreshed_at = cached[2] if cached is not None else 0.0
+    refresh = now - refreshed_at >= SESSION_REFRESH_INTERVAL
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(redis_key)
+    if refresh:
+        pipe.expire(redis_key, timedelta(hours=SESSION_TTL_HOURS))
+    session_data = (await pipe.execute())[0]
     
     if not session_data:
+        session_cache.evict(signed_session_id)
         return None
-        
-    # Refresh TTL on activity (sliding expiration)
-    redis_client.expire(redis_key, timedelta(hours=SESSION_TTL_HOURS))
     
+    session_cache.put(signed_session_id, session_data, now if refresh else refreshed_at)
     return session_data
 
-def verify_auth(request: Request):
+async def verify_auth(request: Request):
     """Dependency to enforce authentication."""
-    session = get_current_session(request)
+    session = await get_current_session(request)
     if not session:
         raise AuthenticationError()
     return True
 
-def verify_auth_soft(request: Request) -> bool:
+async def verify_auth_soft(request: Request) -> bool:
     """Check auth without raising exception (for conditional rendering)."""
-    return get_current_session(request) is not None
+    return await get_current_session(request) is not None
 
 
 # --- Routes ---
@@ -419,46 +832,80 @@ def verify_auth_soft(request: Request) -> bool:
 async def startup_event():
     """Run on startup: Create tables and ensure schema is up to date."""
     try:
-        Base.metadata.create_all(bind=engine)
+        # Note: In production, use Alembic migrations instead of create_all()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         
         # Emergency Schema Sync: Add group_id if it's missing (for existing installations)
-        with engine.connect() as conn:
+        async with engine.connect() as conn:
             try:
-                conn.execute(text("ALTER TABLE monitored_targets ADD COLUMN IF NOT EXISTS group_id INTEGER REFERENCES monitoring_groups(id)"))
-                conn.commit()
+                await conn.execute(text("ALTER TABLE monitored_targets ADD COLUMN IF NOT EXISTS group_id INTEGER REFERENCES monitoring_groups(id)"))
+                await conn.commit()
             except Exception as schema_err:
+                await conn.rollback()
                 logger.warning(f"Schema sync warning (group_id): {schema_err}")
+            
+            # Canonical workstation key (mirrors config/migrate_ws_key.sql)
+            try:
+                await conn.execute(text("ALTER TABLE employees ADD COLUMN IF NOT EXISTS ws_prefix VARCHAR(20), ADD COLUMN IF NOT EXISTS ws_number INTEGER"))
+                await conn.execute(text("CREATE INDEX IF NOT EXISTS idx_employees_ws_key ON employees(ws_prefix, ws_number)"))
+                await conn.execute(text(
+                    "UPDATE employees SET "
+                    "ws_prefix = UPPER(SUBSTRING(workstation FROM '^\\s*([A-Za-z]+)[-\\s]?\\d{1,9}\\s*$')), "
+                    "ws_number = SUBSTRING(workstation FROM '^\\s*[A-Za-z]+[-\\s]?(\\d{1,9})\\s*$')::INTEGER "
+                    "WHERE workstation IS NOT NULL AND ws_prefix IS NULL"
+                ))
+                await conn.commit()
+            except Exception as schema_err:
+                await conn.rollback()
+                logger.warning(f"Schema sync warning (ws_key): {schema_err}")
+
+            # Ranked search function and its indexes, used by the inventory search
+            # (idempotent; CREATE OR REPLACE keeps the function in step with the file)
+            try:
+                with open(SEARCH_MIGRATION_SQL, encoding="utf-8") as f:
+                    migration = f.read()
+                raw = await conn.get_raw_connection()
+                # asyncpg: no arguments = simple query protocol, so the multi-statement file runs as is
+                await raw.driver_connection.execute(migration)
+            except Exception as schema_err:
+                await conn.rollback()
+                logger.warning(f"Schema sync warning (search_employees_ranked): {schema_err}")
                 
         logger.info("Database tables verified/created.")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
 
+@app.on_event("startup")
+async def start_container_state():
+    """Initial container snapshot, then follow Docker events."""
+    await container_state.start()
+
+@app.on_event("shutdown")
+async def stop_container_state():
+    await container_state.stop()
+    docker_executor.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def close_log_streams():
+    for follower in list(log_followers):
+        follower.close()
+
 @app.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db)):
+async def dashboard(request: Request, db: AsyncSession = Depends(get_db)):
     """Main dashboard page."""
-    if not verify_auth_soft(request):
+    if not await verify_auth_soft(request):
         return templates.TemplateResponse("login.html", {"request": request})
     
     # 1. Get Monitoring Stats (with safety fallback)
     targets = []
     try:
-        targets = db.query(MonitoredTarget).all()
+        targets = (await db.scalars(select(MonitoredTarget))).all()
     except Exception as e:
         logger.error(f"Dashboard Monitoring Query Failed: {e}")
     
-    # 2. Get Containers
-    containers = []
-    try:
-        for c in docker_client.containers.list(all=True):
-            if "netadmin" in c.name or "redis" in c.name or "db" in c.name:
-                containers.append({
-                    "id": c.short_id,
-                    "name": c.name,
-                    "status": c.status,
-                    "state": c.attrs['State']['Status']
-                })
-    except Exception as e:
-        logger.error(f"Docker error: {e}")
+    # 2. Get Containers (snapshot kept current by container_state)
+    containers = container_state.containers
 
     # 3. Get Backups
     backups = []
@@ -487,13 +934,18 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/monitoring", response_class=HTMLResponse)
-async def monitoring_page(request: Request, db: Session = Depends(get_db), _: bool = Depends(verify_auth)):
+async def monitoring_page(request: Request, db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
     """Monitoring groups & targets page."""
     groups = []
     ungrouped_targets = []
     try:
-        groups = db.query(MonitoringGroup).order_by(MonitoringGroup.name).all()
-        ungrouped_targets = db.query(MonitoredTarget).filter(MonitoredTarget.group_id == None).all()
+        # Targets eager-loaded: the template walks group.targets (no lazy loads in async)
+        groups = (await db.scalars(
+            select(MonitoringGroup).options(selectinload(MonitoringGroup.targets)).order_by(MonitoringGroup.name)
+        )).all()
+        ungrouped_targets = (await db.scalars(
+            select(MonitoredTarget).where(MonitoredTarget.group_id == None)
+        )).all()
     except Exception as e:
         logger.error(f"Monitoring Page Query Failed: {e}")
     
@@ -508,28 +960,28 @@ async def monitoring_page(request: Request, db: Session = Depends(get_db), _: bo
 async def create_monitoring_group(
     name: str = Form(...),
     interval: int = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Create a new monitoring group."""
     new_group = MonitoringGroup(name=name, interval_seconds=interval)
     db.add(new_group)
-    db.commit()
+    await db.commit()
     return RedirectResponse(url="/monitoring", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.delete("/api/monitoring/groups/{group_id}")
-async def delete_monitoring_group(group_id: int, db: Session = Depends(get_db), _: bool = Depends(verify_auth)):
+async def delete_monitoring_group(group_id: int, db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
     """Delete a monitoring group and all its targets."""
     try:
         # Delete all targets in this group first
-        db.query(MonitoredTarget).filter(MonitoredTarget.group_id == group_id).delete()
+        await db.execute(delete(MonitoredTarget).where(MonitoredTarget.group_id == group_id))
         # Then delete the group
-        deleted = db.query(MonitoringGroup).filter(MonitoringGroup.id == group_id).delete()
-        if not deleted:
+        result = await db.execute(delete(MonitoringGroup).where(MonitoringGroup.id == group_id))
+        if not result.rowcount:
             raise HTTPException(status_code=404, detail="Group not found")
-        db.commit()
+        await db.commit()
         try:
-            redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
+            await redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
         except:
             pass
         logger.info(f"Deleted monitoring group: {group_id}")
@@ -544,19 +996,19 @@ async def create_monitoring_target(
     name: str = Form(...),
     hostname: str = Form(...),
     group_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Create a new monitoring target within a group."""
     interval = 60
     if group_id:
-        group = db.query(MonitoringGroup).filter(MonitoringGroup.id == group_id).first()
+        group = await db.get(MonitoringGroup, group_id)
         if group: interval = group.interval_seconds
 
     new_target = MonitoredTarget(name=name, hostname=hostname, group_id=group_id, interval_seconds=interval)
     db.add(new_target)
-    db.commit()
-    try: redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
+    await db.commit()
+    try: await redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
     except: pass
     return RedirectResponse(url="/monitoring", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -598,7 +1050,7 @@ async def login(request: Request, password: str = Form(...)):
     """Handle login and set session cookie."""
     if verify_password(password, ADMIN_PASSWORD):
         # Create persistent session
-        session_id = create_session("admin_user")
+        session_id = await create_session("admin_user")
         
         response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
         response.set_cookie(
@@ -624,9 +1076,10 @@ async def logout(request: Request):
     # Optional: Delete from Redis explicitly
     signed_session_id = request.cookies.get("session_id")
     if signed_session_id:
+        session_cache.evict(signed_session_id)
         try:
             session_id = signer.unsign(signed_session_id).decode('utf-8')
-            redis_client.delete(f"session:{session_id}")
+            await redis_client.delete(f"session:{session_id}")
         except:
             pass
             
@@ -636,18 +1089,18 @@ async def logout(request: Request):
 
 @app.get("/api/config/ranges")
 @app.get("/api/config/ranges", response_class=HTMLResponse)
-async def get_workstation_config(request: Request, db: Session = Depends(get_db), _: bool = Depends(verify_auth)):
+async def get_workstation_config(request: Request, db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
     """Return HTML partial for workstation ranges configuration."""
-    ranges = db.query(WorkstationRange).filter(WorkstationRange.is_active == True).all()
+    ranges = (await db.scalars(select(WorkstationRange).where(WorkstationRange.is_active == True))).all()
     return templates.TemplateResponse("partials/ws_config.html", {
         "request": request,
         "ranges": ranges
     })
 
 @app.get("/api/workstation-ranges")
-async def get_workstation_ranges(db: Session = Depends(get_db), _: bool = Depends(verify_auth)):
+async def get_workstation_ranges(db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
     """Get all configured workstation ranges (JSON)."""
-    ranges = db.query(WorkstationRange).filter(WorkstationRange.is_active == True).all()
+    ranges = (await db.scalars(select(WorkstationRange).where(WorkstationRange.is_active == True))).all()
     return [{
         "id": r.id,
         "prefix": r.prefix,
@@ -659,7 +1112,7 @@ async def get_workstation_ranges(db: Session = Depends(get_db), _: bool = Depend
 @app.get("/api/free-workstations", response_class=HTMLResponse)
 async def get_free_workstations(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """
@@ -673,27 +1126,30 @@ async def get_free_workstations(
     **Usage:** Called via HTMX lazy load: hx-get="/api/free-workstations" hx-trigger="load"
     """
     # 1. Get all active ranges
-    ranges = db.query(WorkstationRange).filter(WorkstationRange.is_active == True).all()
+    ranges = (await db.scalars(select(WorkstationRange).where(WorkstationRange.is_active == True))).all()
     
-    # 2. Get all occupied workstations
+    # 2. Get occupied workstation keys (indexed equality on ws_prefix)
+    prefixes = {r.prefix.upper() for r in ranges}
     occupied_ws = set()
-    employees = db.query(Employee).filter(Employee.workstation.isnot(None)).all()
-    for emp in employees:
-        if emp.workstation:
-            occupied_ws.add(emp.workstation.strip().upper())
+    if prefixes:
+        result = await db.execute(
+            select(Employee.ws_prefix, Employee.ws_number)
+            .where(Employee.ws_prefix.in_(prefixes), Employee.ws_number.isnot(None))
+        )
+        occupied_ws = {(prefix, number) for prefix, number in result}
     
     # 3. Calculate free workstations per prefix
     groups = []
     for r in ranges:
         prefix = r.prefix.upper()
+        numbers = range(r.range_start, r.range_end + 1)
         # FIX: Ensure 3-digit padding (WS001)
-        all_ws_in_range = [f"{prefix}{i:03d}" for i in range(r.range_start, r.range_end + 1)]
-        free_ws = [ws for ws in all_ws_in_range if ws not in occupied_ws]
+        free_ws = [f"{prefix}{i:03d}" for i in numbers if (prefix, i) not in occupied_ws]
         
         groups.append({
             "prefix": prefix,
             "ids": free_ws,
-            "total": len(all_ws_in_range),
+            "total": len(numbers),
             "range": f"{r.range_start}-{r.range_end}"
         })
     
@@ -709,7 +1165,7 @@ async def create_workstation_range(
     start: int = Form(...),
     end: int = Form(...),
     description: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Create a new workstation range."""
@@ -720,29 +1176,98 @@ async def create_workstation_range(
         description=description
     )
     db.add(new_range)
-    db.commit()
+    await db.commit()
     return {"status": "success"}
 
 @app.delete("/api/workstation-ranges/{range_id}")
-async def delete_workstation_range(range_id: int, db: Session = Depends(get_db), _: bool = Depends(verify_auth)):
+async def delete_workstation_range(range_id: int, db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
     """Delete (deactivate) a workstation range."""
-    r = db.query(WorkstationRange).filter(WorkstationRange.id == range_id).first()
+    r = await db.get(WorkstationRange, range_id)
     if r:
         r.is_active = False
-        db.commit()
+        await db.commit()
     return {"status": "success"}
 
 
 # --- Container Operations ---
 
+@app.get("/api/containers")
+async def list_containers(_: bool = Depends(verify_auth)):
+    """Dashboard containers from the live snapshot."""
+    return {"version": container_state.version, "containers": container_state.containers}
+
+
+@app.get("/api/containers/stream")
+async def stream_containers(request: Request, _: bool = Depends(verify_auth)):
+    """Server-Sent Events: the container list, pushed whenever a container changes state."""
+    queue = container_state.subscribe()
+
+    async def events():
+        try:
+            yield sse_event("containers", container_state.containers)
+            while True:
+                try:
+                    view = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event("containers", view)
+        finally:
+            container_state.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+def container_action(container_id: str, action: str, timeout: int = 10) -> str:
+    """Restart or stop a container (blocking; run via run_docker). Returns its name."""
+    container = docker_client.containers.get(container_id)
+    getattr(container, action)(timeout=timeout)
+    return container.name
+
+
+def container_logs(container_id: str, tail: int, **kwargs) -> str:
+    """Last `tail` log lines of a container (blocking; run via run_docker)."""
+    container = docker_client.containers.get(container_id)
+    return container.logs(tail=tail, **kwargs).decode('utf-8', errors='replace')
+
+
+@app.post("/api/containers/batch")
+async def batch_container_action(batch: ContainerBatchAction, _: bool = Depends(verify_auth)):
+    """Restart or stop several containers concurrently; one result per container."""
+    async def run(container_id: str) -> dict:
+        try:
+            name = await run_docker(container_action, container_id, batch.action, batch.timeout)
+            logger.info(f"Container {name}: {batch.action} done (batch)")
+            return {"container": container_id, "name": name, "status": "success"}
+        except docker.errors.NotFound:
+            return {"container": container_id, "status": "error", "detail": "Container not found"}
+        except Exception as e:
+            logger.error(f"Container {batch.action} error ({container_id}): {e}")
+            return {"container": container_id, "status": "error", "detail": str(e)}
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(run(container_id) for container_id in batch.containers))
+    failed = sum(1 for r in results if r["status"] != "success")
+    return {
+        "status": "success" if not failed else ("partial" if failed < len(results) else "error"),
+        "action": batch.action,
+        "duration_ms": round((time.monotonic() - started) * 1000),
+        "results": results
+    }
+
+
 @app.post("/api/containers/{container_id}/restart")
 async def restart_container(container_id: str, _: bool = Depends(verify_auth)):
     """Restart a Docker container."""
     try:
-        container = docker_client.containers.get(container_id)
-        container.restart()
-        logger.info(f"Container {container.name} restarted")
-        return {"status": "success", "message": f"Container {container.name} restarting..."}
+        name = await run_docker(container_action, container_id, "restart")
+        logger.info(f"Container {name} restarted")
+        return {"status": "success", "message": f"Container {name} restarting..."}
     except docker.errors.NotFound:
         raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
@@ -750,12 +1275,96 @@ async def restart_container(container_id: str, _: bool = Depends(verify_auth)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/containers/{container_id}/logs/stream")
+async def stream_logs(
+    request: Request,
+    container_id: str,
+    since: Optional[str] = Query(None, description="Resume cursor: Docker log timestamp or unix seconds"),
+    tail: int = Query(100, ge=0, le=LOG_STREAM_MAX_TAIL),
+    q: Optional[str] = Query(None, max_length=200),
+    regex: bool = False,
+    ignore_case: bool = False,
+    _: bool = Depends(verify_auth)
+):
+    """
+    Server-Sent Events: follow container logs.
+
+    Starts with the last `tail` lines, or right after the `since` cursor. Each 'logs'
+    event carries a batch of lines and has the Docker timestamp of its last line as
+    id, which EventSource sends back as Last-Event-ID when it reconnects, so nothing
+    is repeated or lost. `q` keeps only matching lines (substring, or regex=true).
+    An 'end' event follows the last line when the container stops.
+    """
+    cursor = request.headers.get("last-event-id") or since
+    since_ns = None
+    if cursor:
+        since_ns = parse_log_timestamp(cursor)
+        if since_ns is None:
+            raise HTTPException(status_code=400, detail="Invalid since cursor")
+
+    match = None
+    if q and regex:
+        try:
+            match = re.compile(q, re.IGNORECASE if ignore_case else 0).search
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid regex: {e}")
+    elif q and ignore_case:
+        needle = q.lower()
+        match = lambda line: needle in line.lower()
+    elif q:
+        match = lambda line: q in line
+
+    if len(log_followers) >= LOG_STREAM_MAX:
+        raise HTTPException(status_code=429, detail="Too many log streams open")
+    try:
+        stream = await run_docker(open_log_stream, container_id, since_ns, tail)
+    except docker.errors.NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
+    except Exception as e:
+        logger.error(f"Log stream error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    follower = LogFollower(stream, asyncio.get_running_loop(), since_ns=since_ns, match=match)
+    log_followers.add(follower)
+    follower.start()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(follower.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                batch = []
+                while item is not LogFollower.END:
+                    batch.append(item)
+                    if len(batch) >= LOG_STREAM_BATCH or follower.queue.empty():
+                        break
+                    item = follower.queue.get_nowait()
+                if batch:
+                    yield sse_log_batch(batch)
+                if item is LogFollower.END:
+                    yield sse_event("end", {"error": follower.error})
+                    break
+        finally:
+            # Also runs when the client disconnects mid-stream (generator cancelled)
+            follower.close()
+            log_followers.discard(follower)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
 @app.get("/api/containers/{container_id}/logs")
 async def get_logs(container_id: str, _: bool = Depends(verify_auth)):
     """Get container logs."""
     try:
-        container = docker_client.containers.get(container_id)
-        logs = container.logs(tail=100).decode('utf-8', errors='replace')
+        logs = await run_docker(container_logs, container_id, 100)
         return {"logs": logs}
     except docker.errors.NotFound:
         raise HTTPException(status_code=404, detail="Container not found")
@@ -771,7 +1380,7 @@ async def create_target(
     name: str = Form(...),
     hostname: str = Form(...),
     interval: int = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Create a new monitoring target."""
@@ -787,11 +1396,11 @@ async def create_target(
         interval_seconds=validated.interval
     )
     db.add(target)
-    db.commit()
+    await db.commit()
     
     # Notify Java Agent
     try:
-        redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
+        await redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
     except Exception as e:
         logger.error(f"Redis publish error: {e}")
     
@@ -802,19 +1411,19 @@ async def create_target(
 @app.delete("/api/targets/{target_id}")
 async def delete_target(
     target_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Delete a monitoring target."""
-    deleted = db.query(MonitoredTarget).filter(MonitoredTarget.id == target_id).delete()
-    if not deleted:
+    result = await db.execute(delete(MonitoredTarget).where(MonitoredTarget.id == target_id))
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Target not found")
     
-    db.commit()
+    await db.commit()
     
     # Notify Java Agent
     try:
-        redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
+        await redis_client.publish("netadmin_events", "CONFIG_UPDATE:MONITORING")
     except Exception as e:
         logger.error(f"Redis publish error: {e}")
     
@@ -841,6 +1450,19 @@ async def download_backup(filename: str, _: bool = Depends(verify_auth)):
 
 # --- Inventory Management ---
 
+WS_KEY_RE = re.compile(r"^\s*([A-Za-z]+)[-\s]?(\d{1,9})\s*$")
+
+
+def parse_workstation(workstation: Optional[str]) -> tuple[Optional[str], Optional[int]]:
+    """Canonical workstation key: 'WS-101' / 'ws 101' / 'WS0101' -> ('WS', 101)."""
+    if not workstation:
+        return (None, None)
+    match = WS_KEY_RE.match(workstation)
+    if not match:
+        return (None, None)
+    return (match.group(1).upper(), int(match.group(2)))
+
+
 def parse_fio(full_name: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
     """Parse Russian FIO format: 'Фамилия Имя Отчество' into parts."""
     if not full_name:
@@ -856,6 +1478,35 @@ def parse_fio(full_name: str) -> tuple[Optional[str], Optional[str], Optional[st
         return (parts[0], parts[1], " ".join(parts[2:]))
 
 
+def ranked_search(search: str):
+    """
+    Ranked, index-backed employee search (config/migrate_search_v3.sql).
+    Returns a derived table (employee_id, rank) to join against Employee.
+    """
+    return func.search_employees_ranked(search).table_valued(
+        "employee_id", "rank"
+    ).render_derived(name="ranked")
+
+
+async def count_rows(db: AsyncSession, query) -> int:
+    """Row count of a select (ordering dropped), like Query.count()."""
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+
+BOT_SEARCH_CACHE_KEY = "bot:search_cache"  # Shared bot search result cache (python-bot/src/core/search_cache.py)
+
+
+async def notify_employees_changed():
+    """Invalidate the bot search cache and tell bot replicas to refresh their employee index."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(BOT_SEARCH_CACHE_KEY)
+        pipe.publish("netadmin_events", "CONFIG_UPDATE:EMPLOYEES")
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis publish error: {e}")
+
+
 @app.get("/inventory/rows", response_class=HTMLResponse)
 @app.get("/inventory", response_class=HTMLResponse)
 async def inventory_page(
@@ -867,7 +1518,7 @@ async def inventory_page(
     company: Optional[str] = Query(None, max_length=100),
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """
@@ -880,36 +1531,27 @@ async def inventory_page(
     
     **Performance:**
     - Server-side filtering/sorting/pagination
+    - Search via index-backed search_employees_ranked() (relevance order by default)
     - Returns full page or HTMX partial (table rows only)
     """
-    query = db.query(Employee)
+    query = select(Employee)
     
-    # 1. Filtering
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Employee.last_name.ilike(search_filter)) |
-            (Employee.first_name.ilike(search_filter)) |
-            (Employee.middle_name.ilike(search_filter)) |
-            (Employee.company.ilike(search_filter)) |
-            (Employee.department.ilike(search_filter)) |
-            (Employee.location.ilike(search_filter)) |
-            (Employee.internal_phone.ilike(search_filter)) |
-            (Employee.workstation.ilike(search_filter)) |
-            (Employee.ad_login.ilike(search_filter)) |
-            (Employee.email.ilike(search_filter))
-        )
+    # 1. Filtering (ranked full-text + trigram search)
+    ranked = None
+    if search and search.strip():
+        ranked = ranked_search(search)
+        query = query.join(ranked, ranked.c.employee_id == Employee.id)
     
     # Department Filter: Only apply if explicitly provided and not empty
     if department and department.strip():
         if department == 'Factory':
-             query = query.filter(Employee.department.ilike("%Factory%"))
+             query = query.where(Employee.department.ilike("%Factory%"))
         else:
-             query = query.filter(Employee.department == department)
+             query = query.where(Employee.department == department)
              
     # Company Filter: Only apply if explicitly provided and not 'all'
     if company and company != 'all':
-        query = query.filter(Employee.company == company)
+        query = query.where(Employee.company == company)
 
     # 2. Sorting - Default to ID ASC for stability
     validated_sort = SortColumn.validate(sort) if sort else None
@@ -923,15 +1565,18 @@ async def inventory_page(
         else:
             # Fallback to ID if column lookup fails
             query = query.order_by(Employee.id.asc())
+    elif ranked is not None:
+        # Searching without explicit sort: most relevant first
+        query = query.order_by(ranked.c.rank.desc(), Employee.id.asc())
     else:
         # Default: Sort by ID ASC (Stable, Predictable)
         query = query.order_by(Employee.id.asc())
 
     # 3. Pagination
-    total_count = query.count()
+    total_count = await count_rows(db, query)
     total_pages = (total_count + limit - 1) // limit
     
-    employees_rows = query.offset((page - 1) * limit).limit(limit).all()
+    employees_rows = (await db.scalars(query.offset((page - 1) * limit).limit(limit))).all()
     
     employees = []
     for e in employees_rows:
@@ -987,14 +1632,14 @@ async def inventory_page(
 async def get_employee_form(
     employee_id: str, # 'new' or integer ID
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Return a server-rendered form for Add/Edit Employee."""
     if employee_id == "new":
         employee = None
     else:
-        employee = db.query(Employee).filter(Employee.id == int(employee_id)).first()
+        employee = await db.get(Employee, int(employee_id))
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
 
@@ -1008,27 +1653,21 @@ async def get_employees(
     search: Optional[str] = Query(None, max_length=100),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Get employees as JSON (for AJAX updates)."""
-    query = db.query(Employee)
+    query = select(Employee)
     
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Employee.last_name.ilike(search_filter)) |
-            (Employee.first_name.ilike(search_filter)) |
-            (Employee.middle_name.ilike(search_filter)) |
-            (Employee.company.ilike(search_filter)) |
-            (Employee.department.ilike(search_filter)) |
-            (Employee.location.ilike(search_filter)) |
-            (Employee.internal_phone.ilike(search_filter)) |
-            (Employee.workstation.ilike(search_filter))
-        )
+    if search and search.strip():
+        ranked = ranked_search(search)
+        query = query.join(ranked, ranked.c.employee_id == Employee.id)
+        query = query.order_by(ranked.c.rank.desc(), Employee.last_name, Employee.first_name)
+    else:
+        query = query.order_by(Employee.last_name, Employee.first_name)
     
-    total = query.count()
-    employees = query.order_by(Employee.last_name, Employee.first_name).offset(offset).limit(limit).all()
+    total = await count_rows(db, query)
+    employees = (await db.scalars(query.offset(offset).limit(limit))).all()
     
     return {
         "total": total,
@@ -1070,7 +1709,7 @@ async def create_employee(
     has_drweb: bool = Form(False),
     has_zabbix: bool = Form(False),
     notes: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Create new employee with all V2.0 fields."""
@@ -1101,6 +1740,7 @@ async def create_employee(
         raise HTTPException(status_code=400, detail=str(e))
     
     last_name, first_name, middle_name = parse_fio(validated.full_name)
+    ws_prefix, ws_number = parse_workstation(validated.workstation)
     employee = Employee(
         company=validated.company,
         last_name=last_name,
@@ -1111,6 +1751,8 @@ async def create_employee(
         internal_phone=validated.internal_phone,
         phone_type=validated.phone_type,
         workstation=validated.workstation,
+        ws_prefix=ws_prefix,
+        ws_number=ws_number,
         device_type=validated.device_type,
         specs_cpu=validated.specs_cpu,
         specs_gpu=validated.specs_gpu,
@@ -1125,16 +1767,18 @@ async def create_employee(
         notes=validated.notes
     )
     db.add(employee)
-    db.commit()
-    db.refresh(employee)
+    await db.commit()
+    await db.refresh(employee)
     
     # Sync sequence after insert
     try:
-        db.execute(text("SELECT sync_employees_id_sequence()"))
-        db.commit()
+        await db.execute(text("SELECT sync_employees_id_sequence()"))
+        await db.commit()
     except Exception as e:
+        await db.rollback()
         logger.warning(f"Failed to sync sequence: {e}")
     
+    await notify_employees_changed()
     logger.info(f"Created employee: {employee.full_name} (ID: {employee.id})")
     return RedirectResponse(url="/inventory", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -1162,12 +1806,12 @@ async def update_employee(
     has_drweb: bool = Form(False),
     has_zabbix: bool = Form(False),
     notes: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Update employee - accepts Form data from HTMX."""
     logger.info(f"PATCH /api/employees/{employee_id} - Data: {full_name}, {company}, {department}")
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = await db.get(Employee, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
@@ -1183,6 +1827,7 @@ async def update_employee(
         employee.internal_phone = internal_phone
         employee.phone_type = phone_type or 'NONE'
         employee.workstation = workstation
+        employee.ws_prefix, employee.ws_number = parse_workstation(workstation)
         employee.device_type = device_type
         employee.specs_cpu = specs_cpu
         employee.specs_gpu = specs_gpu
@@ -1196,11 +1841,12 @@ async def update_employee(
         employee.email = email
         employee.notes = notes
         
-        db.commit()
+        await db.commit()
+        await notify_employees_changed()
         logger.info(f"Updated employee: {full_name} (ID: {employee_id})")
         
         # Return fresh list partial
-        employees = db.query(Employee).order_by(Employee.id.asc()).limit(50).all()
+        employees = (await db.scalars(select(Employee).order_by(Employee.id.asc()).limit(50))).all()
         return templates.TemplateResponse("partials/inventory_rows.html", {
             "request": request,
             "employees": employees
@@ -1213,16 +1859,17 @@ async def update_employee(
 @app.post("/api/employees/{employee_id}/toggle")
 async def toggle_employee(
     employee_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Toggle employee active status (disable/enable)."""
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = await db.get(Employee, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     employee.is_active = not employee.is_active
-    db.commit()
+    await db.commit()
+    await notify_employees_changed()
     
     logger.info(f"Toggled employee {employee_id}: is_active={employee.is_active}")
     return {"status": "success", "is_active": employee.is_active}
@@ -1231,36 +1878,77 @@ async def toggle_employee(
 @app.delete("/api/employees/{employee_id}")
 async def delete_employee(
     employee_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_auth)
 ):
     """Delete employee (hard delete)."""
-    deleted = db.query(Employee).filter(Employee.id == employee_id).delete()
-    if not deleted:
+    result = await db.execute(delete(Employee).where(Employee.id == employee_id))
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    db.commit()
+    await db.commit()
     
     # Sync sequence after delete
     try:
-        db.execute(text("SELECT sync_employees_id_sequence()"))
-        db.commit()
+        await db.execute(text("SELECT sync_employees_id_sequence()"))
+        await db.commit()
     except Exception as e:
+        await db.rollback()
         logger.warning(f"Failed to sync sequence: {e}")
     
+    await notify_employees_changed()
     logger.info(f"Deleted employee: {employee_id}")
     
     return {"status": "success"}
 
 
+# --- Telegram Users (bot RBAC) ---
+
+async def notify_user_role_changed(telegram_id: int):
+    """Drop the user from every bot replica's role cache so the new role applies at once."""
+    try:
+        await redis_client.publish("netadmin_events", f"USER_ROLE_UPDATE:{telegram_id}")
+    except Exception as e:
+        logger.error(f"Redis publish error: {e}")
+
+
+@app.get("/api/telegram-users")
+async def list_telegram_users(db: AsyncSession = Depends(get_db), _: bool = Depends(verify_auth)):
+    """Bot users with their roles."""
+    users = (await db.scalars(select(TelegramUser).order_by(TelegramUser.id))).all()
+    return [
+        {"telegram_id": u.telegram_id, "username": u.username, "role": u.role}
+        for u in users
+    ]
+
+
+@app.patch("/api/telegram-users/{telegram_id}")
+async def update_telegram_user_role(
+    telegram_id: int,
+    data: TelegramUserRoleUpdate,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_auth)
+):
+    """Change a bot user's role."""
+    user = await db.scalar(select(TelegramUser).where(TelegramUser.telegram_id == telegram_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    old_role, user.role = user.role, data.role
+    await db.commit()
+    await notify_user_role_changed(telegram_id)
+
+    logger.info(f"Telegram user {telegram_id} role: {old_role} -> {data.role}")
+    return {"status": "success", "role": data.role}
+
+
 # --- Health Check ---
 
 @app.get("/api/docker/logs/{container_id}")
 async def get_docker_logs(container_id: str, _: bool = Depends(verify_auth)):
     """Fetch Docker container logs (last 50 lines)."""
     try:
-        container = docker_client.containers.get(container_id)
-        logs = container.logs(tail=50, stdout=True, stderr=True).decode('utf-8', errors='replace')
+        logs = await run_docker(container_logs, container_id, 50, stdout=True, stderr=True)
         return Response(content=logs, media_type="text/plain")
     except docker.errors.NotFound:
         raise HTTPException(status_code=404, detail="Container not found")
@@ -0,0 +1,43 @@
+import pytest
+
+from src.log_timestamps import parse_log_timestamp
+
+# 2024-01-02T03:04:05Z
+BASE_NS = 1704164645 * 1_000_000_000
+
+
+def test_rfc3339_nano():
+    assert parse_log_timestamp("2024-01-02T03:04:05.123456789Z") == BASE_NS + 123456789
+
+
+def test_fraction_shorter_than_nanoseconds():
+    assert parse_log_timestamp("2024-01-02T03:04:05.5Z") == BASE_NS + 500_000_000
+    assert parse_log_timestamp("2024-01-02T03:04:05.000001Z") == BASE_NS + 1_000
+
+
+def test_without_fraction():
+    assert parse_log_timestamp("2024-01-02T03:04:05Z") == BASE_NS
+
+
+def test_offset_timezone():
+    assert parse_log_timestamp("2024-01-02T06:04:05.25+03:00") == BASE_NS + 250_000_000
+    assert parse_log_timestamp("2024-01-01T22:04:05-05:00") == BASE_NS
+
+
+def test_surrounding_whitespace():
+    assert parse_log_timestamp("  2024-01-02T03:04:05Z\n") == BASE_NS
+
+
+def test_nanoseconds_survive_float_precision():
+    # A float of seconds cannot hold all nine digits; the parser must not go through one
+    assert parse_log_timestamp("2024-01-02T03:04:05.999999999Z") == BASE_NS + 999_999_999
+
+
+def test_unix_seconds():
+    assert parse_log_timestamp("1704164645") == BASE_NS
+    assert parse_log_timestamp("1704164645.5") == BASE_NS + 500_000_000
+
+
+@pytest.mark.parametrize("value", ["", "abc", "2024-01-02 03:04:05", "2024-01-02T03:04:05", "inf", "nan"])
+def test_invalid(value):
+    assert parse_log_timestamp(value) is None
@@ -0,0 +1,23 @@
+-- Migration: Per-topic alert destinations
+-- Run after init_rbac.sql:
+--   psql -U netadmin -d netadmin_db -f config/migrate_alert_destinations.sql
+--
+-- Alerts for a topic always go to that topic's thread in TELEGRAM_SUPERGROUP_ID.
+-- Rows here add further destinations (on-call private chat, management group...),
+-- delivered in parallel. Managed with /add_destination and /remove_destination
+-- in the target chat; bots reload on CONFIG_UPDATE:TOPICS.
+
+CREATE TABLE IF NOT EXISTS telegram_topic_destinations (
+    id SERIAL PRIMARY KEY,
+    topic_name VARCHAR(50) NOT NULL REFERENCES telegram_topics(name) ON DELETE CASCADE ON UPDATE CASCADE,
+    chat_id BIGINT NOT NULL,
+    thread_id INT,                     -- forum topic in that chat, NULL = main chat
+    label VARCHAR(100),
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- One row per (topic, chat, thread); NULL thread counts as "main chat"
+CREATE UNIQUE INDEX IF NOT EXISTS idx_topic_destinations_unique
+    ON telegram_topic_destinations (topic_name, chat_id, COALESCE(thread_id, 0));
+
+COMMENT ON TABLE telegram_topic_destinations IS 'Additional alert fan-out targets per telegram topic';
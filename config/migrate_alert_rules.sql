@@ -0,0 +1,41 @@
+-- Migration: Alert routing rules
+-- Run after init_rbac.sql:
+--   psql -U netadmin -d netadmin_db -f config/migrate_alert_rules.sql
+--
+-- The bot compiles active rules into an in-memory matcher. Rules are evaluated
+-- in (priority, id) order; the first matching rule decides:
+--   route    - deliver to route_topics (comma-separated) instead of the alert's topic
+--   drop     - discard the alert
+--   throttle - at most one alert per throttle_seconds per rule and target,
+--              delivered to route_topics if set, else the alert's topic
+-- NULL match_* columns match anything. Alerts matching no rule go to their own topic.
+--
+-- match_source / match_group: glob patterns ('monitoring', 'core-*')
+-- match_severity:             comma list ('critical,warning')
+-- match_text:                 case-insensitive regular expression
+--
+-- After editing rows, reload every bot replica:
+--   redis-cli PUBLISH netadmin_events CONFIG_UPDATE:ALERT_RULES
+
+CREATE TABLE IF NOT EXISTS alert_routing_rules (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100),
+    priority INT NOT NULL DEFAULT 100,          -- lower = evaluated first
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+
+    match_topic VARCHAR(50),
+    match_source VARCHAR(100),
+    match_severity VARCHAR(50),
+    match_group VARCHAR(100),                   -- monitoring_groups.name of the alert's target
+    match_text TEXT,
+
+    action VARCHAR(20) NOT NULL DEFAULT 'route' CHECK (action IN ('route', 'drop', 'throttle')),
+    route_topics VARCHAR(255),
+    throttle_seconds INT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_routing_rules_order ON alert_routing_rules (priority, id) WHERE is_active;
+
+COMMENT ON TABLE alert_routing_rules IS 'Bot alert routing: first matching rule (by priority) routes, drops or throttles an alert';
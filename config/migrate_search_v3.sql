@@ -0,0 +1,103 @@
+-- Migration: Ranked employee search (Full-Text + Trigram)
+-- Run after init_inventory.sql / schema_v2.sql and migrate_ws_key.sql:
+--   psql -U netadmin -d netadmin_db -f config/migrate_search_v3.sql
+--
+-- Shared by the Telegram bot (/search, WS/phone queries) and the admin panel
+-- (inventory grid, /api/employees) via search_employees_ranked().
+
+-- ============================================
+-- Extensions
+-- ============================================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ============================================
+-- Full-text vector (weights follow search priority)
+-- A = name, B = AD login, C = email, D = department/company/location
+-- ============================================
+ALTER TABLE employees ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple',
+        COALESCE(last_name, '') || ' ' || COALESCE(first_name, '') || ' ' || COALESCE(middle_name, '')), 'A') ||
+    setweight(to_tsvector('simple', COALESCE(ad_login, '')), 'B') ||
+    setweight(to_tsvector('simple', COALESCE(email, '')), 'C') ||
+    setweight(to_tsvector('simple',
+        COALESCE(department, '') || ' ' || COALESCE(company, '') || ' ' || COALESCE(location, '')), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_employees_search_vector ON employees USING GIN (search_vector);
+
+-- ============================================
+-- Trigram indexes (serve ILIKE '%x%' substring matches)
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_employees_full_name_trgm ON employees USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_ad_login_trgm ON employees USING GIN (ad_login gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_email_trgm ON employees USING GIN (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_workstation_trgm ON employees USING GIN (workstation gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_internal_phone_trgm ON employees USING GIN (internal_phone gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_department_trgm ON employees USING GIN (department gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_company_trgm ON employees USING GIN (company gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_location_trgm ON employees USING GIN (location gin_trgm_ops);
+
+-- ============================================
+-- Exact-match expression index (phone digits)
+-- WS tags match on the canonical key instead: idx_employees_ws_key (migrate_ws_key.sql)
+-- ============================================
+DROP INDEX IF EXISTS idx_employees_workstation_norm;
+CREATE INDEX IF NOT EXISTS idx_employees_internal_phone_norm
+    ON employees ((REGEXP_REPLACE(internal_phone, '\D', '', 'g')));
+
+-- ============================================
+-- Ranked search
+-- Priority: exact WS > exact phone > name > AD login > email > other text
+-- ============================================
+CREATE OR REPLACE FUNCTION search_employees_ranked(q TEXT)
+RETURNS TABLE (employee_id INTEGER, rank REAL) AS $$
+DECLARE
+    query_text TEXT := TRIM(q);
+    pattern TEXT;
+    q_ws_prefix TEXT;
+    q_ws_number INTEGER;
+    phone_key TEXT;
+    tsq tsquery;
+BEGIN
+    IF query_text IS NULL OR query_text = '' THEN
+        RETURN;
+    END IF;
+
+    -- Escape LIKE wildcards in user input
+    pattern := '%' || REPLACE(REPLACE(REPLACE(query_text, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+    -- Same canonical key as parse_workstation(): 'ws-0101' -> ('WS', 101)
+    q_ws_prefix := UPPER(SUBSTRING(query_text FROM '^([A-Za-z]+)[-\s]?\d{1,9}$'));
+    q_ws_number := SUBSTRING(query_text FROM '^[A-Za-z]+[-\s]?(\d{1,9})$')::INTEGER;
+    phone_key := CASE
+        WHEN query_text ~ '^[\d\s\-\(\)]+$' THEN NULLIF(REGEXP_REPLACE(query_text, '\D', '', 'g'), '')
+    END;
+    tsq := plainto_tsquery('simple', query_text);
+
+    RETURN QUERY
+    SELECT
+        e.id,
+        (CASE
+            WHEN e.ws_prefix = q_ws_prefix AND e.ws_number = q_ws_number THEN 1000
+            WHEN REGEXP_REPLACE(e.internal_phone, '\D', '', 'g') = phone_key THEN 900
+            WHEN e.full_name ILIKE pattern THEN 500 + 100 * similarity(e.full_name, query_text)
+            WHEN e.ad_login ILIKE pattern THEN 400 + 100 * similarity(e.ad_login, query_text)
+            WHEN e.email ILIKE pattern THEN 300 + 100 * similarity(e.email, query_text)
+            ELSE 100 * ts_rank(e.search_vector, tsq)
+        END)::REAL
+    FROM employees e
+    WHERE (e.ws_prefix = q_ws_prefix AND e.ws_number = q_ws_number)
+       OR REGEXP_REPLACE(e.internal_phone, '\D', '', 'g') = phone_key
+       OR e.search_vector @@ tsq
+       OR e.full_name ILIKE pattern
+       OR e.ad_login ILIKE pattern
+       OR e.email ILIKE pattern
+       OR e.workstation ILIKE pattern
+       OR e.internal_phone ILIKE pattern
+       OR e.department ILIKE pattern
+       OR e.company ILIKE pattern
+       OR e.location ILIKE pattern;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON COLUMN employees.search_vector IS 'Weighted full-text vector: A=name, B=AD login, C=email, D=department/company/location';
+COMMENT ON FUNCTION search_employees_ranked(TEXT) IS 'Index-backed employee search ranked by: exact WS > exact phone > name > AD login > email > other';
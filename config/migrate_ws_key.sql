@@ -0,0 +1,25 @@
+-- Migration: Canonical workstation key
+-- Run after init_inventory.sql / schema_v2.sql:
+--   psql -U netadmin -d netadmin_db -f config/migrate_ws_key.sql
+--
+-- 'WS-101', 'ws 101', 'WS0101' -> ws_prefix = 'WS', ws_number = 101
+-- Populated by every write path (admin panel create/update, migration scripts).
+-- WS lookups and free-range calculation use exact equality on (ws_prefix, ws_number).
+
+-- Step 1: Add key columns
+ALTER TABLE employees
+ADD COLUMN IF NOT EXISTS ws_prefix VARCHAR(20),
+ADD COLUMN IF NOT EXISTS ws_number INTEGER;
+
+-- Step 2: Backfill from existing workstation tags
+UPDATE employees
+SET
+    ws_prefix = UPPER(SUBSTRING(workstation FROM '^\s*([A-Za-z]+)[-\s]?\d{1,9}\s*$')),
+    ws_number = SUBSTRING(workstation FROM '^\s*[A-Za-z]+[-\s]?(\d{1,9})\s*$')::INTEGER
+WHERE workstation IS NOT NULL;
+
+-- Step 3: Index for exact lookups
+CREATE INDEX IF NOT EXISTS idx_employees_ws_key ON employees(ws_prefix, ws_number);
+
+COMMENT ON COLUMN employees.ws_prefix IS 'Canonical workstation prefix (WS, PWS, NIK...), uppercase';
+COMMENT ON COLUMN employees.ws_number IS 'Canonical workstation number without leading zeros';
@@ -0,0 +1,48 @@
+package com.netadmin.agent.model;
+
+import com.fasterxml.jackson.annotation.JsonInclude;
+import com.fasterxml.jackson.annotation.JsonProperty;
+
+import java.util.UUID;
+
+/**
+ * Versioned alert envelope published to the bot (see python-bot/src/core/alert_envelope.py).
+ *
+ * ts is the event time in epoch milliseconds; fingerprint identifies the condition
+ * (e.g. "monitoring:42:DOWN") so the bot can dedup/group without parsing text.
+ *
+ * traceId / publishedTs are trace context stamped at publish time ({@link #published()}):
+ * the bot continues the trace, so the agent, Redis and bot parts of a late alert can be told apart.
+ */
+@JsonInclude(JsonInclude.Include.NON_NULL)
+public record AlertEnvelope(
+        @JsonProperty("v") int version,
+        @JsonProperty("topic") String topic,
+        @JsonProperty("severity") String severity,
+        @JsonProperty("source") String source,
+        @JsonProperty("target_id") String targetId,
+        @JsonProperty("ts") long timestamp,
+        @JsonProperty("fingerprint") String fingerprint,
+        @JsonProperty("text") String text,
+        @JsonProperty("trace_id") String traceId,
+        @JsonProperty("published_ts") Long publishedTs
+) {
+    public static final int VERSION = 1;
+
+    public static final String SEVERITY_CRITICAL = "critical";
+    public static final String SEVERITY_WARNING = "warning";
+    public static final String SEVERITY_INFO = "info";
+
+    public static AlertEnvelope of(String topic, String severity, String source,
+                                   String targetId, String fingerprint, String text) {
+        return new AlertEnvelope(VERSION, topic, severity, source, targetId,
+                System.currentTimeMillis(), fingerprint, text, null, null);
+    }
+
+    /** Copy stamped with the publish time and a trace id (W3C format: 32 hex chars), kept if already set. */
+    public AlertEnvelope published() {
+        String trace = traceId != null ? traceId : UUID.randomUUID().toString().replace("-", "");
+        return new AlertEnvelope(version, topic, severity, source, targetId, timestamp,
+                fingerprint, text, trace, System.currentTimeMillis());
+    }
+}
@@ -1,33 +1,73 @@
 package com.netadmin.agent.service;
 
+import com.fasterxml.jackson.databind.ObjectMapper;
+import com.netadmin.agent.model.AlertEnvelope;
 import com.netadmin.agent.repository.TelegramTopicRepository;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.data.redis.connection.stream.MapRecord;
+import org.springframework.data.redis.connection.stream.StreamRecords;
 import org.springframework.data.redis.core.StringRedisTemplate;
 import org.springframework.stereotype.Service;
 
+import java.util.Map;
+
 @Service
 public class AlertDispatcher {
 
     private static final Logger logger = LoggerFactory.getLogger(AlertDispatcher.class);
+    private static final ObjectMapper objectMapper = new ObjectMapper();
     private final StringRedisTemplate redisTemplate;
     private final TelegramTopicRepository topicRepository;
 
+    // "pubsub" (PUBLISH bot_alerts) or "streams" (XADD to a consumer-group stream, durable)
+    @Value("${app.alerts.transport:pubsub}")
+    private String transport;
+
+    @Value("${app.alerts.stream-key:bot_alerts:stream}")
+    private String streamKey;
+
+    @Value("${app.alerts.stream-maxlen:100000}")
+    private long streamMaxLen;
+
+    // "json" (AlertEnvelope) or "legacy" ("TOPIC|MESSAGE" for bots that predate the envelope)
+    @Value("${app.alerts.format:json}")
+    private String format;
+
     public AlertDispatcher(StringRedisTemplate redisTemplate, TelegramTopicRepository topicRepository) {
         this.redisTemplate = redisTemplate;
         this.topicRepository = topicRepository;
     }
 
     public void sendAlert(String topicName, String message) {
+        sendAlert(AlertEnvelope.of(topicName, AlertEnvelope.SEVERITY_INFO, "agent", null, null, message));
+    }
+
+    public void sendAlert(AlertEnvelope alert) {
+        alert = alert.published();
         // We verify topic exists, but we push the NAME to Redis.
         // Python bot resolves the actual Thread ID to allow hot-swapping topics.
+        String topicName = alert.topic();
+        String message = alert.text();
         try {
-            String payload = topicName + "|" + message;
-            redisTemplate.convertAndSend("bot_alerts", payload);
-            logger.info("Dispatched alert to [{}]: {}", topicName, message);
+            String payload = "legacy".equalsIgnoreCase(format)
+                    ? topicName + "|" + message
+                    : objectMapper.writeValueAsString(alert);
+            if ("streams".equalsIgnoreCase(transport)) {
+                MapRecord<String, String, String> record = StreamRecords.newRecord()
+                        .in(streamKey)
+                        .ofMap(Map.of("payload", payload));
+                redisTemplate.opsForStream().add(record);
+                // Approximate trim keeps the stream bounded if the bot is down for long
+                redisTemplate.opsForStream().trim(streamKey, streamMaxLen, true);
+            } else {
+                redisTemplate.convertAndSend("bot_alerts", payload);
+            }
+            logger.info("Dispatched {} alert to [{}] via {} (trace {}): {}",
+                    alert.severity(), topicName, transport, alert.traceId(), message);
         } catch (Exception e) {
             logger.error("Failed to dispatch alert", e);
         }
     }
 }
-
@@ -1,10 +1,12 @@
 package com.netadmin.agent.service;
 
+import com.netadmin.agent.model.AlertEnvelope;
 import com.netadmin.agent.model.MonitoredTarget;
 import com.netadmin.agent.repository.MonitoredTargetRepository;
 import jakarta.annotation.PostConstruct;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
+import org.springframework.beans.factory.annotation.Value;
 import org.springframework.scheduling.concurrent.ThreadPoolTaskScheduler;
 import org.springframework.stereotype.Service;
 import org.springframework.transaction.annotation.Transactional;
@@ -36,6 +38,10 @@ public class DynamicSchedulerService {
     private final ThreadPoolTaskScheduler taskScheduler;
     private final Map<Long, ScheduledFuture<?>> scheduledTasks = new ConcurrentHashMap<>();
 
+    // Default topic for monitoring alerts; the bot's alert_routing_rules can re-route per group/severity
+    @Value("${app.alerts.monitoring-topic:monitoring}")
+    private String monitoringTopic;
+
     public DynamicSchedulerService(
             MonitoredTargetRepository repository, 
             AlertDispatcher alertDispatcher,
@@ -127,7 +133,7 @@ public class DynamicSchedulerService {
                         checkTime.format(TIME_FORMATTER),
                         previousStatus != null ? previousStatus : "UNKNOWN"
                     );
-                    alertDispatcher.sendAlert("monitoring", alertMessage);
+                    alertDispatcher.sendAlert(monitoringAlert(target, "DOWN", AlertEnvelope.SEVERITY_CRITICAL, alertMessage));
                     logger.error("🚨 Alert sent: {} is DOWN", target.getName());
                 }
                 
@@ -140,7 +146,7 @@ public class DynamicSchedulerService {
                         checkTime.format(TIME_FORMATTER),
                         target.getLastCheck() != null ? target.getLastCheck().format(TIME_FORMATTER) : "UNKNOWN"
                     );
-                    alertDispatcher.sendAlert("monitoring", recoveryMessage);
+                    alertDispatcher.sendAlert(monitoringAlert(target, "UP", AlertEnvelope.SEVERITY_INFO, recoveryMessage));
                     logger.info("✅ Recovery sent: {} is back UP", target.getName());
                 }
                 
@@ -161,7 +167,7 @@ public class DynamicSchedulerService {
                         e.getMessage(),
                         checkTime.format(TIME_FORMATTER)
                     );
-                    alertDispatcher.sendAlert("monitoring", errorMessage);
+                    alertDispatcher.sendAlert(monitoringAlert(target, "ERROR", AlertEnvelope.SEVERITY_WARNING, errorMessage));
                 }
                 
                 target.setLastStatus("ERROR");
@@ -170,4 +176,10 @@ public class DynamicSchedulerService {
             }
         });
     }
+
+    private AlertEnvelope monitoringAlert(MonitoredTarget target, String status, String severity, String text) {
+        String targetId = String.valueOf(target.getId());
+        return AlertEnvelope.of(monitoringTopic, severity, "monitoring", targetId,
+                "monitoring:" + targetId + ":" + status, text);
+    }
 }
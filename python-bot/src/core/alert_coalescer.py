@@ -0,0 +1,201 @@
+"""
+Alert Coalescing.
+
+During an alert storm (switch down -> one alert per dead host) individual
+messages flood the topic and hit Telegram limits. Per topic and destination chat:
+
+- Up to ALERT_COALESCE_THRESHOLD alerts within ALERT_COALESCE_WINDOW seconds
+  are delivered individually, immediately
+- Beyond that, alerts are absorbed into a single digest message which is
+  edited (at most every ALERT_DIGEST_EDIT_INTERVAL seconds) as more arrive
+- The digest closes once the topic has been quiet for a full window
+- An absorbed alert counts as delivered only once a digest showing it was sent
+  (offer() hands back a future), so streamed entries are not ACKed before that
+"""
+
+import asyncio
+import contextvars
+import html
+import logging
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from src.core.outbound import send_priority, PRIORITY_ALERT
+
+logger = logging.getLogger(__name__)
+
+# Config
+ALERT_COALESCE_WINDOW = float(os.getenv("ALERT_COALESCE_WINDOW", 10))          # seconds, 0 = disabled
+ALERT_COALESCE_THRESHOLD = int(os.getenv("ALERT_COALESCE_THRESHOLD", 3))       # individual alerts per window
+ALERT_DIGEST_EDIT_INTERVAL = float(os.getenv("ALERT_DIGEST_EDIT_INTERVAL", 3))  # seconds between digest edits
+ALERT_DIGEST_MAX_LINES = int(os.getenv("ALERT_DIGEST_MAX_LINES", 20))
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_LINE_MAX_LEN = 150
+
+
+class _Digest:
+    def __init__(self, bot, chat_id, thread_id, topic: str):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.thread_id = thread_id
+        self.topic = topic
+        self.message_id: Optional[int] = None
+        self.count = 0
+        self.lines: Deque[str] = deque(maxlen=ALERT_DIGEST_MAX_LINES)
+        self.started = time.time()
+        self.last_alert = time.monotonic()
+        self.dirty = False
+        self.task: Optional[asyncio.Task] = None
+        self.waiters: List[asyncio.Future] = []  # absorbed alerts not yet shown in a sent digest
+
+    def add(self, text: str) -> asyncio.Future:
+        # Digest lines are plain text: alert HTML could be cut mid-tag
+        line = html.unescape(_TAG_RE.sub("", text)).strip().replace("\n", " ")
+        if len(line) > _LINE_MAX_LEN:
+            line = line[:_LINE_MAX_LEN - 1] + "…"
+        self.lines.append(line)
+        self.count += 1
+        self.last_alert = time.monotonic()
+        self.dirty = True
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        return waiter
+
+    def settle(self, waiters: List[asyncio.Future], delivered: bool) -> None:
+        for waiter in waiters:
+            if not waiter.done():  # The caller may have timed out
+                waiter.set_result(delivered)
+
+    def render(self, closed: bool = False) -> str:
+        started = datetime.fromtimestamp(self.started).strftime("%H:%M:%S")
+        status = "ended" if closed else "ongoing"
+        text = (
+            f"🚨 <b>Alert storm: {html.escape(self.topic)}</b> ({status})\n"
+            f"{self.count} alerts since {started}\n\n"
+        )
+        text += "\n".join(f"• {html.escape(line)}" for line in self.lines)
+        hidden = self.count - len(self.lines)
+        if hidden > 0:
+            text += f"\n… and {hidden} earlier"
+        return text
+
+
+class AlertCoalescer:
+    """Per-topic storm detection with a single, periodically edited digest message."""
+
+    def __init__(
+        self,
+        window: float = ALERT_COALESCE_WINDOW,
+        threshold: int = ALERT_COALESCE_THRESHOLD,
+        edit_interval: float = ALERT_DIGEST_EDIT_INTERVAL
+    ):
+        self.window = window
+        self.threshold = threshold
+        self.edit_interval = edit_interval
+        self._arrivals: Dict[str, Deque[float]] = {}
+        self._digests: Dict[str, _Digest] = {}
+        self.coalesced = 0
+
+    def offer(self, key: str, text: str, bot, chat_id, thread_id, title: Optional[str] = None) -> Optional[asyncio.Future]:
+        """
+        Register an alert for key (topic + destination); title is shown in the digest header.
+
+        Returns None if the caller should deliver it individually. If it was absorbed
+        into the topic's digest, returns a future that resolves to True once a digest
+        showing it has been sent, or False if the digest closed without getting out.
+        """
+        if self.window <= 0:
+            return None
+
+        now = time.monotonic()
+        digest = self._digests.get(key)
+        if digest is None:
+            arrivals = self._arrivals.setdefault(key, deque())
+            while arrivals and now - arrivals[0] > self.window:
+                arrivals.popleft()
+            arrivals.append(now)
+            if len(arrivals) <= self.threshold:
+                return None
+
+            logger.warning(f"🌩️ Alert storm on '{key}': coalescing into a digest")
+            arrivals.clear()
+            digest = self._digests[key] = _Digest(bot, chat_id, thread_id, title or key)
+            # Own context: the digest outlives the alert (and trace) that opened it
+            digest.task = asyncio.create_task(self._run_digest(key, digest), context=contextvars.Context())
+
+        waiter = digest.add(text)
+        self.coalesced += 1
+        return waiter
+
+    async def _run_digest(self, key: str, digest: _Digest) -> None:
+        send_priority.set(PRIORITY_ALERT)
+        try:
+            while True:
+                await asyncio.sleep(self.edit_interval)
+                closed = time.monotonic() - digest.last_alert >= self.window
+                if digest.dirty or closed:
+                    await self._publish(digest, closed)
+                if closed:
+                    logger.info(f"🌤️ Alert storm on '{key}' ended: {digest.count} alerts coalesced")
+                    return
+        except asyncio.CancelledError:
+            if digest.dirty:
+                await self._publish(digest, closed=True)
+            raise
+        finally:
+            if self._digests.get(key) is digest:
+                del self._digests[key]
+            # Never shown: the alerts are reported undelivered (streams: left pending for retry)
+            digest.settle(digest.waiters, False)
+            digest.waiters = []
+
+    async def _publish(self, digest: _Digest, closed: bool) -> None:
+        text = digest.render(closed)
+        digest.dirty = False
+        waiters, digest.waiters = digest.waiters, []
+        try:
+            if digest.message_id is None:
+                message = await digest.bot.send_message(
+                    chat_id=digest.chat_id,
+                    text=text,
+                    message_thread_id=digest.thread_id,
+                    parse_mode="HTML"
+                )
+                digest.message_id = message.message_id
+            else:
+                await digest.bot.edit_message_text(
+                    chat_id=digest.chat_id,
+                    message_id=digest.message_id,
+                    text=text,
+                    parse_mode="HTML"
+                )
+        except Exception as e:
+            logger.warning(f"Digest update for '{digest.topic}' failed: {e}")
+            digest.dirty = True
+            digest.waiters = waiters + digest.waiters
+            if digest.message_id is None and digest.thread_id is not None:
+                # Same fallback as single alerts: next attempt goes to the general chat
+                digest.thread_id = None
+        except asyncio.CancelledError:
+            # Interrupted send: the final flush on close retries these
+            digest.dirty = True
+            digest.waiters = waiters + digest.waiters
+            raise
+        else:
+            digest.settle(waiters, True)
+
+    async def close(self) -> None:
+        """Flush and stop all open digests."""
+        tasks = [d.task for d in self._digests.values() if d.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Shared instance
+alert_coalescer = AlertCoalescer()
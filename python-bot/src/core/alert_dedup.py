@@ -0,0 +1,116 @@
+"""
+Alert De-duplication.
+
+Several agents (or an agent restart re-detecting DOWN hosts) can emit the same
+alert more than once. Each alert gets a fingerprint:
+
+- the envelope's explicit fingerprint (e.g. "monitoring:42:DOWN"), or
+- topic + normalized text (lowercased, timestamps and whitespace runs removed)
+
+The first copy claims the fingerprint with an atomic SET NX EX in Redis (shared
+by all bot replicas); repeats within ALERT_DEDUP_TTL seconds are suppressed.
+Suppressed counts are logged every ALERT_DEDUP_REPORT_INTERVAL seconds.
+
+Explicit fingerprints are "<condition>:<state>". A new state of a condition
+releases the claim of its previous state, so a host flapping DOWN -> UP -> DOWN
+within the window still gets its second DOWN; only repeats of the current
+state are suppressed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+from src.core.alert_envelope import Alert
+
+logger = logging.getLogger(__name__)
+
+# Config
+ALERT_DEDUP_TTL = int(os.getenv("ALERT_DEDUP_TTL", 300))  # seconds, 0 = disabled
+ALERT_DEDUP_REPORT_INTERVAL = int(os.getenv("ALERT_DEDUP_REPORT_INTERVAL", 300))  # seconds
+ALERT_DEDUP_PREFIX = "bot:alert_dedup:"
+ALERT_DEDUP_STATE_PREFIX = "bot:alert_dedup:state:"  # condition -> claim key of its current state
+
+# Applied to lowercased text, hence [ tT]
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}[ tT]\d{2}:\d{2}(:\d{2})?(\.\d+)?|\b\d{1,2}:\d{2}(:\d{2})?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def alert_fingerprint(alert: Alert) -> str:
+    """Explicit fingerprint if present, else topic + normalized text."""
+    if alert.fingerprint:
+        key = f"fp|{alert.fingerprint}"
+    else:
+        text = _TIMESTAMP_RE.sub("", alert.text.lower())
+        key = f"txt|{alert.topic}|{_SPACE_RE.sub(' ', text).strip()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def alert_condition(alert: Alert) -> Optional[str]:
+    """Condition part of an explicit "<condition>:<state>" fingerprint, None otherwise."""
+    if not alert.fingerprint:
+        return None
+    condition, sep, state = alert.fingerprint.rpartition(":")
+    return condition if sep and condition and state else None
+
+
+class AlertDeduplicator:
+    """Redis SET NX based suppression window."""
+
+    def __init__(self, ttl: int = ALERT_DEDUP_TTL):
+        self.ttl = ttl
+        self.suppressed = Counter()  # per topic, since last report
+        self.suppressed_total = 0
+
+    async def is_duplicate(self, redis_client, alert: Alert) -> bool:
+        """Claim the alert's fingerprint; True if another copy already claimed it."""
+        if self.ttl <= 0:
+            return False
+        claim_key = ALERT_DEDUP_PREFIX + alert_fingerprint(alert)
+        condition = alert_condition(alert)
+        try:
+            if condition is not None:
+                # State change: release the previous state's claim so a flap back to it is delivered
+                previous = await redis_client.set(
+                    ALERT_DEDUP_STATE_PREFIX + hashlib.sha1(condition.encode("utf-8")).hexdigest(),
+                    claim_key, ex=self.ttl, get=True
+                )
+                if previous and previous != claim_key:
+                    await redis_client.delete(previous)
+            claimed = await redis_client.set(claim_key, 1, nx=True, ex=self.ttl)
+        except Exception as e:
+            # Fail open: a duplicate is better than a lost alert
+            logger.warning(f"Alert dedup check failed: {e}")
+            return False
+
+        if claimed:
+            return False
+        self.suppressed[alert.topic] += 1
+        self.suppressed_total += 1
+        return True
+
+    async def release(self, redis_client, alert: Alert) -> None:
+        """Drop the claim after a failed delivery so the retry isn't suppressed."""
+        if self.ttl <= 0:
+            return
+        try:
+            await redis_client.delete(ALERT_DEDUP_PREFIX + alert_fingerprint(alert))
+        except Exception as e:
+            logger.warning(f"Alert dedup release failed: {e}")
+
+    async def report_loop(self, interval: int = ALERT_DEDUP_REPORT_INTERVAL) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if self.suppressed:
+                counts = self.suppressed
+                self.suppressed = Counter()
+                details = ", ".join(f"{topic}={n}" for topic, n in counts.most_common())
+                logger.info(f"🔇 Suppressed {sum(counts.values())} duplicate alerts in the last {interval}s ({details})")
+
+
+# Shared instance
+alert_dedup = AlertDeduplicator()
@@ -0,0 +1,94 @@
+"""
+Alert Envelope.
+
+Versioned JSON envelope published by the Java agent on "bot_alerts":
+
+    {"v": 1, "topic": "monitoring", "severity": "critical", "source": "monitoring",
+     "target_id": "42", "ts": 1700000000123, "fingerprint": "monitoring:42:DOWN",
+     "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736", "published_ts": 1700000000125,
+     "text": "🚨 ALERT: Host ..."}
+
+- ts: event time, epoch milliseconds (end-to-end latency is measured from it)
+- fingerprint: stable identity of the condition (dedup/grouping key)
+- trace_id / published_ts (optional): trace context set by the agent when it
+  publishes; the bot continues the trace (core/tracing.py)
+
+The legacy "TOPIC|MESSAGE" string is still accepted (decoded as version 0).
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_VERSION = 1
+
+SEVERITY_CRITICAL = "critical"
+SEVERITY_WARNING = "warning"
+SEVERITY_INFO = "info"
+
+
+@dataclass(frozen=True)
+class Alert:
+    """Decoded alert, independent of the wire format."""
+    topic: str
+    text: str
+    severity: str = SEVERITY_INFO
+    source: str = ""
+    target_id: Optional[str] = None
+    ts: Optional[float] = None  # epoch seconds
+    fingerprint: Optional[str] = None
+    version: int = 0
+    trace_id: Optional[str] = None
+    published_ts: Optional[float] = None  # epoch seconds
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds since the event was produced (None for legacy alerts)."""
+        if self.ts is None:
+            return None
+        return max(0.0, time.time() - self.ts)
+
+
+def decode_alert(data: Optional[str]) -> Optional[Alert]:
+    """Decode an envelope or legacy pipe string; None if malformed."""
+    if not data:
+        return None
+
+    if data[0] != "{":
+        # Legacy: "TOPIC|MESSAGE"
+        topic, sep, text = data.partition("|")
+        topic = topic.strip()
+        if not sep or not topic:
+            return None
+        return Alert(topic=topic, text=text)
+
+    try:
+        obj = json.loads(data)
+        version = int(obj.get("v", 0))
+        if version > ENVELOPE_VERSION:
+            logger.warning(f"Alert envelope v{version} is newer than supported v{ENVELOPE_VERSION}, decoding known fields")
+        topic = str(obj["topic"]).strip()
+        ts = obj.get("ts")
+        target_id = obj.get("target_id")
+        published_ts = obj.get("published_ts")
+        trace_id = obj.get("trace_id")
+        alert = Alert(
+            topic=topic,
+            text=str(obj.get("text", "")),
+            severity=str(obj.get("severity") or SEVERITY_INFO).lower(),
+            source=str(obj.get("source") or ""),
+            target_id=str(target_id) if target_id is not None else None,
+            ts=float(ts) / 1000 if ts is not None else None,
+            fingerprint=obj.get("fingerprint"),
+            version=version,
+            trace_id=str(trace_id).lower() if trace_id else None,
+            published_ts=float(published_ts) / 1000 if published_ts is not None else None,
+        )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    return alert if alert.topic else None
+
@@ -0,0 +1,222 @@
+"""
+Alert Routing Rules.
+
+alert_routing_rules (config/migrate_alert_rules.sql) is compiled into an
+in-memory matcher; the first matching rule by (priority, id) decides whether
+an alert is routed to other topics, dropped or throttled.
+
+Evaluation cost is kept to a few dict lookups plus the candidate rules' checks:
+- rules are pre-bucketed by severity, so only rules that can match are scanned
+- glob patterns without wildcards compile to plain string equality
+- checks run cheapest first (topic, source, group, then text regex)
+
+Rules and the target -> monitoring group map reload on CONFIG_UPDATE:ALERT_RULES
+(and CONFIG_UPDATE:MONITORING for group membership).
+"""
+
+import asyncio
+import fnmatch
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple, Union
+
+from sqlalchemy import select, text
+
+from src.core.alert_envelope import Alert, SEVERITY_CRITICAL, SEVERITY_WARNING, SEVERITY_INFO
+from src.core.database import async_session, AlertRoutingRule
+
+logger = logging.getLogger(__name__)
+
+ALERT_RULES_UPDATE_EVENT = "CONFIG_UPDATE:ALERT_RULES"
+MONITORING_UPDATE_EVENT = "CONFIG_UPDATE:MONITORING"
+ALERT_THROTTLE_PREFIX = "bot:alert_throttle:"
+
+ACTION_ROUTE = "route"
+ACTION_DROP = "drop"
+ACTION_THROTTLE = "throttle"
+
+_KNOWN_SEVERITIES = (SEVERITY_CRITICAL, SEVERITY_WARNING, SEVERITY_INFO)
+
+Matcher = Union[None, str, Pattern]
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    action: str
+    topics: Tuple[str, ...]
+    rule_id: Optional[int] = None
+    throttle_seconds: int = 0
+
+
+def _compile_glob(pattern: Optional[str]) -> Matcher:
+    """None = any; plain string = case-insensitive equality; else compiled glob."""
+    if not pattern or pattern == "*":
+        return None
+    pattern = pattern.strip().lower()
+    if not any(ch in pattern for ch in "*?["):
+        return pattern
+    return re.compile(fnmatch.translate(pattern))
+
+
+def _match(matcher: Matcher, value: Optional[str]) -> bool:
+    if matcher is None:
+        return True
+    if value is None:
+        return False
+    value = value.lower()
+    if isinstance(matcher, str):
+        return matcher == value
+    return matcher.match(value) is not None
+
+
+class _CompiledRule:
+    __slots__ = ("id", "name", "topic", "source", "group", "severities", "text_re", "decision")
+
+    def __init__(self, rule: AlertRoutingRule):
+        self.id = rule.id
+        self.name = rule.name or f"rule #{rule.id}"
+        self.topic = rule.match_topic.strip() if rule.match_topic else None
+        self.source = _compile_glob(rule.match_source)
+        self.group = _compile_glob(rule.match_group)
+        self.severities = frozenset(
+            s.strip().lower() for s in rule.match_severity.split(",") if s.strip()
+        ) if rule.match_severity else None
+        self.text_re = re.compile(rule.match_text, re.IGNORECASE) if rule.match_text else None
+
+        action = (rule.action or ACTION_ROUTE).lower()
+        if action not in (ACTION_ROUTE, ACTION_DROP, ACTION_THROTTLE):
+            raise ValueError(f"unknown action '{rule.action}'")
+        if action == ACTION_THROTTLE and not rule.throttle_seconds:
+            raise ValueError("throttle rule without throttle_seconds")
+        topics = tuple(t.strip() for t in (rule.route_topics or "").split(",") if t.strip())
+        self.decision = RouteDecision(action, topics, rule.id, rule.throttle_seconds or 0)
+
+    def matches(self, alert: Alert, group: Optional[str]) -> bool:
+        if self.topic is not None and self.topic != alert.topic:
+            return False
+        if not _match(self.source, alert.source):
+            return False
+        if not _match(self.group, group):
+            return False
+        if self.text_re is not None and not self.text_re.search(alert.text):
+            return False
+        return True
+
+
+class AlertRouter:
+    """Compiled alert routing rules."""
+
+    def __init__(self):
+        self._by_severity: Dict[str, Tuple[_CompiledRule, ...]] = {}
+        self._any_severity: Tuple[_CompiledRule, ...] = ()
+        self._target_groups: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._retry_at = 0.0
+        self.rule_count = 0
+        self.dropped = 0
+        self.throttled = 0
+
+    async def reload(self) -> None:
+        """Load and compile active rules plus the target -> group map."""
+        async with self._lock:
+            await self._load()
+
+    async def _load(self) -> None:
+        async with async_session() as session:
+            result = await session.execute(
+                select(AlertRoutingRule)
+                .where(AlertRoutingRule.is_active.is_(True))
+                .order_by(AlertRoutingRule.priority, AlertRoutingRule.id)
+            )
+            rows = result.scalars().all()
+
+            try:
+                result = await session.execute(text(
+                    "SELECT t.id, g.name FROM monitored_targets t "
+                    "JOIN monitoring_groups g ON g.id = t.group_id"
+                ))
+                target_groups = {str(target_id): name for target_id, name in result.all()}
+            except Exception as e:
+                # monitoring_groups is created by the admin panel; may not exist yet
+                logger.warning(f"Monitoring group map not loaded: {e}")
+                await session.rollback()
+                target_groups = {}
+
+        self.apply(rows, target_groups)
+        logger.info(f"🧭 Alert rules loaded: {self.rule_count} rules, {len(target_groups)} grouped targets")
+
+    def apply(self, rows: List[AlertRoutingRule], target_groups: Dict[str, str]) -> None:
+        """Compile rules (already in (priority, id) order) and swap them in; invalid rules are skipped."""
+        rules: List[_CompiledRule] = []
+        for row in rows:
+            try:
+                rules.append(_CompiledRule(row))
+            except (re.error, ValueError) as e:
+                logger.error(f"❌ Alert rule #{row.id} ({row.name}) skipped: {e}")
+
+        # Pre-bucket by severity: each bucket keeps the global (priority, id) order
+        self._by_severity = {
+            severity: tuple(r for r in rules if r.severities is None or severity in r.severities)
+            for severity in _KNOWN_SEVERITIES
+        }
+        self._any_severity = tuple(r for r in rules if r.severities is None)
+        self._target_groups = target_groups
+        self.rule_count = len(rules)
+        self._loaded = True
+
+    async def ensure_loaded(self) -> None:
+        """Lazy first load; on failure alerts keep flowing with default routing (retried every 60s)."""
+        if self._loaded or time.monotonic() < self._retry_at:
+            return
+        async with self._lock:
+            # Alerts queued behind a load (or a failed attempt) do not repeat it
+            if self._loaded or time.monotonic() < self._retry_at:
+                return
+            try:
+                await self._load()
+            except Exception as e:
+                self._retry_at = time.monotonic() + 60
+                logger.error(f"❌ Alert rules load failed, using default routing: {e}")
+
+    def route(self, alert: Alert) -> RouteDecision:
+        """First matching rule's decision; default routes the alert to its own topic."""
+        candidates = self._by_severity.get(alert.severity)
+        if candidates is None:
+            candidates = self._any_severity
+        if candidates:
+            group = self._target_groups.get(alert.target_id) if alert.target_id else None
+            for rule in candidates:
+                if rule.matches(alert, group):
+                    decision = rule.decision
+                    if not decision.topics and decision.action != ACTION_DROP:
+                        return RouteDecision(decision.action, (alert.topic,), rule.id, decision.throttle_seconds)
+                    return decision
+        return RouteDecision(ACTION_ROUTE, (alert.topic,))
+
+    async def allow(self, redis_client, alert: Alert, decision: RouteDecision) -> bool:
+        """Apply drop/throttle; True if the alert should be delivered."""
+        if decision.action == ACTION_DROP:
+            self.dropped += 1
+            return False
+        if decision.action != ACTION_THROTTLE:
+            return True
+
+        subject = alert.target_id or alert.fingerprint or alert.topic
+        try:
+            claimed = await redis_client.set(
+                f"{ALERT_THROTTLE_PREFIX}{decision.rule_id}:{subject}", 1,
+                nx=True, ex=decision.throttle_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Alert throttle check failed: {e}")
+            return True
+        if not claimed:
+            self.throttled += 1
+        return bool(claimed)
+
+
+# Shared instance
+alert_router = AlertRouter()
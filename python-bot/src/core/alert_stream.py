@@ -0,0 +1,210 @@
+"""
+Durable Alert Transport (Redis Streams).
+
+Enabled with ALERT_TRANSPORT=streams (the Java agent then XADDs instead of PUBLISH).
+Pub/Sub on "bot_alerts" remains the default compatibility mode.
+
+- Consumer group: each alert is delivered to exactly one bot replica
+- XACK only after the alert was handled, so alerts published while the bot
+  is down or reconnecting are picked up later instead of lost
+- Reclaim loop (XAUTOCLAIM) takes over entries left pending by a crashed consumer
+- Entries delivered ALERT_STREAM_MAX_DELIVERIES times go to the dead-letter
+  stream; /replay_alerts moves them back
+
+Stream entry fields: {"payload": <alert envelope>}
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+# Config
+ALERT_TRANSPORT = os.getenv("ALERT_TRANSPORT", "pubsub").strip().lower()  # pubsub | streams
+ALERT_STREAM_KEY = os.getenv("ALERT_STREAM_KEY", "bot_alerts:stream")     # Must match Java agent
+ALERT_STREAM_DEAD_KEY = os.getenv("ALERT_STREAM_DEAD_KEY", "bot_alerts:dead")
+ALERT_STREAM_GROUP = os.getenv("ALERT_STREAM_GROUP", "netadmin_bot")
+ALERT_STREAM_CONSUMER = os.getenv("ALERT_STREAM_CONSUMER") or f"{socket.gethostname()}-{os.getpid()}"
+ALERT_STREAM_BATCH = int(os.getenv("ALERT_STREAM_BATCH", 50))
+ALERT_STREAM_MIN_IDLE = int(os.getenv("ALERT_STREAM_MIN_IDLE", 60))              # seconds before reclaim
+ALERT_STREAM_RECLAIM_INTERVAL = int(os.getenv("ALERT_STREAM_RECLAIM_INTERVAL", 30))  # seconds
+ALERT_STREAM_MAX_DELIVERIES = int(os.getenv("ALERT_STREAM_MAX_DELIVERIES", 5))
+ALERT_STREAM_DEAD_MAXLEN = int(os.getenv("ALERT_STREAM_DEAD_MAXLEN", 10000))
+ALERT_MAX_IN_FLIGHT = int(os.getenv("ALERT_MAX_IN_FLIGHT", 100))  # Shared with the pub/sub path
+
+AlertHandler = Callable[[str], Awaitable[bool]]
+
+
+class AlertStreamConsumer:
+    """Consumer-group reader for the alert stream."""
+
+    def __init__(
+        self,
+        stream: str = ALERT_STREAM_KEY,
+        dead_stream: str = ALERT_STREAM_DEAD_KEY,
+        group: str = ALERT_STREAM_GROUP,
+        consumer: str = ALERT_STREAM_CONSUMER,
+        max_in_flight: int = ALERT_MAX_IN_FLIGHT
+    ):
+        self.stream = stream
+        self.dead_stream = dead_stream
+        self.group = group
+        self.consumer = consumer
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = set()
+        self._handling = set()  # entry ids currently being handled in this process
+        self.acked = 0
+        self.reclaimed = 0
+        self.dead_lettered = 0
+
+    async def ensure_group(self, redis_client) -> None:
+        try:
+            # id="0": a freshly created group also delivers entries that are already in the stream
+            await redis_client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+            logger.info(f"✅ Created consumer group '{self.group}' on {self.stream}")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _spawn(self, redis_client, handler: AlertHandler, entry_id: str, fields: Dict[str, str]) -> None:
+        if entry_id in self._handling:
+            return
+        await self._slots.acquire()
+        self._handling.add(entry_id)
+        task = asyncio.create_task(self._handle(redis_client, handler, entry_id, fields))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, redis_client, handler: AlertHandler, entry_id: str, fields: Dict[str, str]) -> None:
+        try:
+            payload = fields.get("payload", "")
+            if await handler(payload):
+                await redis_client.xack(self.stream, self.group, entry_id)
+                self.acked += 1
+            else:
+                # Left pending: the reclaim loop retries it after ALERT_STREAM_MIN_IDLE
+                logger.warning(f"Alert {entry_id} not delivered, left pending for retry")
+        except Exception as e:
+            logger.error(f"❌ Alert {entry_id} handling error: {e}", exc_info=True)
+        finally:
+            self._handling.discard(entry_id)
+            self._slots.release()
+
+    @property
+    def tasks(self) -> List[asyncio.Task]:
+        """Deliveries in flight; cancelling run() leaves them to the caller to drain."""
+        return list(self._tasks)
+
+    async def run(self, redis_client, handler: AlertHandler) -> None:
+        """Read new entries for this consumer until cancelled (reconnects with backoff)."""
+        delay = 1
+        while True:
+            try:
+                await self.ensure_group(redis_client)
+                logger.info(f"🎧 Alert stream consumer '{self.consumer}' reading {self.stream}")
+
+                # Own entries left pending by a previous run of this consumer
+                await self._read(redis_client, handler, "0")
+                delay = 1
+                while True:
+                    await self._read(redis_client, handler, ">", block=5000)
+            except Exception as e:
+                logger.error(f"❌ Alert stream error: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    async def _read(self, redis_client, handler: AlertHandler, start: str, block: Optional[int] = None) -> None:
+        response = await redis_client.xreadgroup(
+            self.group, self.consumer, {self.stream: start},
+            count=ALERT_STREAM_BATCH, block=block
+        )
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                await self._spawn(redis_client, handler, entry_id, fields)
+
+    async def reclaim_loop(self, redis_client, handler: AlertHandler) -> None:
+        """Take over entries idle in other (crashed) consumers; dead-letter exhausted ones."""
+        while True:
+            await asyncio.sleep(ALERT_STREAM_RECLAIM_INTERVAL)
+            try:
+                await self.reclaim(redis_client, handler)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Alert stream reclaim failed: {e}")
+
+    async def reclaim(self, redis_client, handler: AlertHandler) -> int:
+        claimed_total = 0
+        start = "0-0"
+        while True:
+            result = await redis_client.xautoclaim(
+                self.stream, self.group, self.consumer,
+                min_idle_time=ALERT_STREAM_MIN_IDLE * 1000,
+                start_id=start,
+                count=ALERT_STREAM_BATCH
+            )
+            start, entries = result[0], result[1]
+
+            for entry_id, fields in entries:
+                if entry_id in self._handling:
+                    continue
+                if fields is None:  # Trimmed from the stream while pending
+                    await redis_client.xack(self.stream, self.group, entry_id)
+                    continue
+                if await self._deliveries(redis_client, entry_id) > ALERT_STREAM_MAX_DELIVERIES:
+                    await self._dead_letter(redis_client, entry_id, fields)
+                    continue
+                claimed_total += 1
+                self.reclaimed += 1
+                await self._spawn(redis_client, handler, entry_id, fields)
+
+            if start == "0-0":
+                break
+
+        if claimed_total:
+            logger.info(f"♻️ Reclaimed {claimed_total} pending alerts")
+        return claimed_total
+
+    async def _deliveries(self, redis_client, entry_id: str) -> int:
+        pending = await redis_client.xpending_range(
+            self.stream, self.group, min=entry_id, max=entry_id, count=1
+        )
+        return pending[0]["times_delivered"] if pending else 0
+
+    async def _dead_letter(self, redis_client, entry_id: str, fields: Dict[str, str]) -> None:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.xadd(
+            self.dead_stream,
+            {**fields, "source_id": entry_id},
+            maxlen=ALERT_STREAM_DEAD_MAXLEN,
+            approximate=True
+        )
+        pipe.xack(self.stream, self.group, entry_id)
+        await pipe.execute()
+        self.dead_lettered += 1
+        logger.error(f"💀 Alert {entry_id} dead-lettered after {ALERT_STREAM_MAX_DELIVERIES} deliveries")
+
+    async def dead_letters(self, redis_client, count: int = 10) -> List[Tuple[str, Dict[str, str]]]:
+        """Newest dead-lettered entries first."""
+        return await redis_client.xrevrange(self.dead_stream, count=count)
+
+    async def replay(self, redis_client, count: int = 10) -> int:
+        """Move up to count oldest dead-lettered alerts back onto the main stream."""
+        entries = await redis_client.xrange(self.dead_stream, count=count)
+        for entry_id, fields in entries:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.xadd(self.stream, {"payload": fields.get("payload", "")})
+            pipe.xdel(self.dead_stream, entry_id)
+            await pipe.execute()
+        if entries:
+            logger.info(f"🔁 Replayed {len(entries)} dead-lettered alerts")
+        return len(entries)
+
+
+# Shared instance
+alert_stream = AlertStreamConsumer()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Enum, TIMESTAMP, func
+from sqlalchemy import Column, Integer, String, BigInteger, Boolean, Enum, TIMESTAMP, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -41,6 +41,36 @@ class TelegramTopic(Base):
     thread_id = Column(Integer, nullable=False)
     description = Column(String)
 
+class TelegramTopicDestination(Base):
+    """Extra chats an alert topic fans out to (on-call private chat, management group...)."""
+    __tablename__ = 'telegram_topic_destinations'
+    
+    id = Column(Integer, primary_key=True)
+    topic_name = Column(String, nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    thread_id = Column(Integer)  # Forum topic in that chat, NULL = main chat
+    label = Column(String)
+    is_active = Column(Boolean, default=True)
+
+class AlertRoutingRule(Base):
+    """Alert routing rule (see config/migrate_alert_rules.sql)."""
+    __tablename__ = 'alert_routing_rules'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    priority = Column(Integer, default=100)
+    is_active = Column(Boolean, default=True)
+    
+    match_topic = Column(String)
+    match_source = Column(String)
+    match_severity = Column(String)
+    match_group = Column(String)
+    match_text = Column(String)
+    
+    action = Column(String, default='route')  # 'route', 'drop', 'throttle'
+    route_topics = Column(String)
+    throttle_seconds = Column(Integer)
+
 class Employee(Base):
     __tablename__ = 'employees'
     
@@ -62,6 +92,8 @@ class Employee(Base):
     
     # Hardware Inventory
     workstation = Column(String)
+    ws_prefix = Column(String)   # Canonical WS key (see core/workstation.py)
+    ws_number = Column(Integer)
     device_type = Column(String)  # 'PC', 'Laptop', 'Monoblock', 'Server', 'Other'
     specs_cpu = Column(String)
     specs_gpu = Column(String)
@@ -97,7 +129,13 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
 # Use asyncpg driver
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}/{POSTGRES_DB}"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Pool size also caps concurrent update handlers (see core/update_executor.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Log every SQL statement (debugging only: floods the log on the hot path)
+DB_ECHO = os.getenv("DB_ECHO", "false").strip().lower() in ("true", "1", "yes")
+
+engine = create_async_engine(DATABASE_URL, echo=DB_ECHO, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 async def get_db():
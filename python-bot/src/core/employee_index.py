@@ -0,0 +1,195 @@
+"""
+Employee Search Index - in-process index over the employees table.
+
+- Exact workstation lookup on the canonical (ws_prefix, ws_number) key: O(1)
+- Phone and text queries are not served here: they go to search_employees_ranked()
+  in the DB, so the bot ranks them exactly like the admin inventory
+
+Built at startup and kept fresh incrementally from employees.updated_at,
+plus an immediate refresh on CONFIG_UPDATE:EMPLOYEES events from the admin panel.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from .database import async_session, Employee
+from .workstation import parse_workstation
+
+logger = logging.getLogger(__name__)
+
+# Config
+EMPLOYEE_INDEX_REFRESH_INTERVAL = float(os.getenv("EMPLOYEE_INDEX_REFRESH_INTERVAL", 30))  # seconds
+EMPLOYEE_INDEX_FULL_REBUILD_INTERVAL = float(os.getenv("EMPLOYEE_INDEX_FULL_REBUILD_INTERVAL", 3600))  # seconds
+
+# Redis event (published on netadmin_events by the admin panel)
+EMPLOYEES_UPDATE_EVENT = "CONFIG_UPDATE:EMPLOYEES"
+
+@dataclass(frozen=True)
+class EmployeeRecord:
+    """Compact read-only employee row (only fields used by formatters)."""
+    id: int
+    full_name: Optional[str]
+    department: Optional[str]
+    workstation: Optional[str]
+    internal_phone: Optional[str]
+    ad_login: Optional[str]
+    email: Optional[str]
+    notes: Optional[str]
+    ws_key: Optional[Tuple[str, int]] = None
+
+
+class EmployeeIndex:
+    """In-memory index of active employees."""
+
+    def __init__(self):
+        self._records: Dict[int, EmployeeRecord] = {}
+        self._by_ws: Dict[Tuple[str, int], Set[int]] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_full_build = 0.0
+        self._ready = False
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # --- Maintenance ---
+
+    def _add(self, record: EmployeeRecord) -> None:
+        self._records[record.id] = record
+
+        if record.ws_key:
+            self._by_ws.setdefault(record.ws_key, set()).add(record.id)
+
+    def _remove(self, employee_id: int) -> None:
+        record = self._records.pop(employee_id, None)
+        if record is None:
+            return
+
+        if record.ws_key:
+            self._discard(self._by_ws, record.ws_key, employee_id)
+
+    @staticmethod
+    def _discard(index: Dict, key, employee_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(employee_id)
+            if not ids:
+                del index[key]
+
+    @staticmethod
+    def _to_record(row) -> EmployeeRecord:
+        full_name = " ".join(p for p in (row.last_name, row.first_name, row.middle_name) if p).strip() or None
+        return EmployeeRecord(
+            id=row.id,
+            full_name=full_name,
+            department=row.department,
+            workstation=row.workstation,
+            internal_phone=row.internal_phone,
+            ad_login=row.ad_login,
+            email=row.email,
+            notes=row.notes,
+            ws_key=(row.ws_prefix, row.ws_number) if row.ws_prefix and row.ws_number is not None else None,
+        )
+
+    @staticmethod
+    def _select_rows():
+        return select(
+            Employee.id, Employee.last_name, Employee.first_name, Employee.middle_name,
+            Employee.department, Employee.workstation, Employee.ws_prefix, Employee.ws_number,
+            Employee.internal_phone,
+            Employee.ad_login, Employee.email, Employee.notes,
+            Employee.is_active, Employee.updated_at,
+        )
+
+    def _apply(self, rows: Iterable) -> int:
+        count = 0
+        for row in rows:
+            self._remove(row.id)
+            if row.is_active:
+                self._add(self._to_record(row))
+            if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+                self._watermark = row.updated_at
+            count += 1
+        return count
+
+    async def rebuild(self) -> None:
+        """Full rebuild from the employees table."""
+        async with self._lock:
+            async with async_session() as session:
+                result = await session.execute(self._select_rows())
+                rows = result.all()
+
+            self._records.clear()
+            self._by_ws.clear()
+            self._watermark = None
+            self._apply(rows)
+
+            self._last_full_build = time.monotonic()
+            self._ready = True
+            logger.info(f"📇 Employee index built: {len(self._records)} active employees")
+
+    async def refresh(self) -> None:
+        """Incremental refresh: rows changed since the watermark, then drop deleted ids."""
+        async with self._lock:
+            async with async_session() as session:
+                stmt = self._select_rows()
+                if self._watermark is not None:
+                    # >= so rows sharing the watermark timestamp are not missed (upsert is idempotent)
+                    stmt = stmt.where(Employee.updated_at >= self._watermark)
+                changed = (await session.execute(stmt)).all()
+                existing_ids = set((await session.execute(select(Employee.id))).scalars().all())
+
+            updated = self._apply(changed)
+            deleted = [emp_id for emp_id in self._records if emp_id not in existing_ids]
+            for emp_id in deleted:
+                self._remove(emp_id)
+
+            if deleted or updated > 1:
+                logger.debug(f"📇 Employee index refreshed: {updated} changed, {len(deleted)} deleted")
+
+    def request_refresh(self) -> None:
+        """Wake the background loop for an immediate refresh (change notification)."""
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Background loop: initial build, then periodic incremental refresh."""
+        while True:
+            try:
+                due_full = time.monotonic() - self._last_full_build > EMPLOYEE_INDEX_FULL_REBUILD_INTERVAL
+                if not self._ready or due_full:
+                    await self.rebuild()
+                else:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Employee index refresh failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=EMPLOYEE_INDEX_REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # --- Lookups ---
+
+    def find_by_workstation(self, query: str, limit: int = 10) -> List[EmployeeRecord]:
+        """Exact canonical key match, by id (the order the ranked DB search gives equal ranks)."""
+        key = parse_workstation(query)
+        if key is None:
+            return []
+        return [self._records[i] for i in sorted(self._by_ws.get(key, ()))[:limit]]
+
+
+# Shared index instance
+employee_index = EmployeeIndex()
@@ -0,0 +1,213 @@
+"""
+Prometheus Metrics.
+
+Served on http://<bot>:METRICS_PORT/metrics (0 disables the endpoint).
+
+- bot_updates_total{type} / bot_update_seconds{type}   every dispatched update
+- bot_handler_seconds{handler}                          handler body only
+- bot_middleware_seconds{stage}                          middleware self-time (excl. downstream)
+- bot_topic_filter_total{topic,outcome}
+- bot_db_query_seconds{operation} / bot_db_pool_wait_seconds
+- bot_alert_receive_to_send_seconds / bot_alert_end_to_end_seconds
+- bot_telegram_api_seconds{method} / bot_telegram_api_errors_total{method,code}
+- bot_update_executor_shed_total                        updates dropped by the update executor
+- gauges for queue depths (outbound, update executor)
+
+The update/middleware/handler middlewares also open the matching trace spans
+(core/tracing.py): update -> middleware.<stage> -> handler.<name>.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import (
+    TelegramRetryAfter, TelegramBadRequest, TelegramForbiddenError, TelegramNotFound,
+    TelegramConflictError, TelegramUnauthorizedError, TelegramEntityTooLarge,
+    TelegramServerError, TelegramNetworkError, TelegramMigrateToChat
+)
+from aiogram.types import TelegramObject
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import event
+
+from src.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Config
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+_SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+UPDATES = Counter("bot_updates_total", "Updates dispatched", ["type"])
+UPDATE_SECONDS = Histogram("bot_update_seconds", "Update handling time incl. middlewares", ["type"], buckets=_SLOW_BUCKETS)
+HANDLER_SECONDS = Histogram("bot_handler_seconds", "Handler time", ["handler"], buckets=_SLOW_BUCKETS)
+MIDDLEWARE_SECONDS = Histogram("bot_middleware_seconds", "Middleware self-time", ["stage"], buckets=_FAST_BUCKETS)
+TOPIC_FILTER = Counter("bot_topic_filter_total", "Topic filter decisions", ["topic", "outcome"])
+
+DB_QUERY_SECONDS = Histogram("bot_db_query_seconds", "DB statement time", ["operation"], buckets=_FAST_BUCKETS)
+DB_POOL_WAIT_SECONDS = Histogram("bot_db_pool_wait_seconds", "Time waiting for a pooled connection", buckets=_FAST_BUCKETS)
+
+ALERT_RECEIVE_TO_SEND = Histogram("bot_alert_receive_to_send_seconds", "Alert received -> sent", buckets=_SLOW_BUCKETS)
+ALERT_END_TO_END = Histogram("bot_alert_end_to_end_seconds", "Alert event time -> sent", buckets=_SLOW_BUCKETS)
+ALERTS = Counter("bot_alerts_total", "Alerts by outcome", ["outcome"])
+
+TELEGRAM_SECONDS = Histogram("bot_telegram_api_seconds", "Telegram Bot API call time", ["method"], buckets=_SLOW_BUCKETS)
+TELEGRAM_ERRORS = Counter("bot_telegram_api_errors_total", "Telegram Bot API errors", ["method", "code"])
+UPDATES_SHED = Counter("bot_update_executor_shed_total", "Updates dropped by the update executor")
+OUTBOUND_QUEUE_SECONDS = Histogram("bot_outbound_queue_seconds", "Time a send waited in the outbound scheduler", buckets=_SLOW_BUCKETS)
+
+_ERROR_CODES = (
+    (TelegramRetryAfter, "429"),
+    (TelegramMigrateToChat, "400_migrate"),
+    (TelegramEntityTooLarge, "413"),
+    (TelegramBadRequest, "400"),
+    (TelegramUnauthorizedError, "401"),
+    (TelegramForbiddenError, "403"),
+    (TelegramNotFound, "404"),
+    (TelegramConflictError, "409"),
+    (TelegramServerError, "5xx"),
+    (TelegramNetworkError, "network"),
+)
+
+
+def telegram_error_code(error: BaseException) -> str:
+    for cls, code in _ERROR_CODES:
+        if isinstance(error, cls):
+            return code
+    return "other"
+
+
+def observe_telegram_call(method: str, seconds: float, error: BaseException = None) -> None:
+    TELEGRAM_SECONDS.labels(method).observe(seconds)
+    if error is not None:
+        TELEGRAM_ERRORS.labels(method, telegram_error_code(error)).inc()
+
+
+def observe_alert_sent(received_at: float, alert_latency) -> None:
+    """received_at: time.monotonic() when the alert was read from Redis."""
+    ALERT_RECEIVE_TO_SEND.observe(time.monotonic() - received_at)
+    if alert_latency is not None:
+        ALERT_END_TO_END.observe(alert_latency)
+
+
+def register_gauge(name: str, documentation: str, func: Callable[[], float]) -> None:
+    Gauge(name, documentation).set_function(func)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware: count and time every update (root span of its trace)."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        update_type = getattr(event, "event_type", "unknown")
+        UPDATES.labels(update_type).inc()
+        start = time.perf_counter()
+        try:
+            with span("update", type=update_type, update_id=getattr(event, "update_id", None)):
+                return await handler(event, data)
+        finally:
+            UPDATE_SECONDS.labels(update_type).observe(time.perf_counter() - start)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Innermost middleware: times the matched handler body."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        start = time.perf_counter()
+        try:
+            with span(f"handler.{name}"):
+                return await handler(event, data)
+        finally:
+            HANDLER_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+class TimedMiddleware(BaseMiddleware):
+    """Wraps a middleware and records its self-time (total minus downstream)."""
+
+    def __init__(self, stage: str, inner: BaseMiddleware):
+        self.stage = stage
+        self.inner = inner
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        downstream = 0.0
+
+        async def timed_handler(e, d):
+            nonlocal downstream
+            t = time.perf_counter()
+            try:
+                return await handler(e, d)
+            finally:
+                downstream += time.perf_counter() - t
+
+        start = time.perf_counter()
+        try:
+            with span(f"middleware.{self.stage}"):
+                return await self.inner(timed_handler, event, data)
+        finally:
+            MIDDLEWARE_SECONDS.labels(self.stage).observe(time.perf_counter() - start - downstream)
+
+
+def instrument_engine(engine) -> None:
+    """Statement timing via cursor events; pool wait by timing the pool's checkout."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    # No public "before checkout" hook (the checkout event fires once the connection
+    # is already in hand): wrap the pool's internal getter. Private API - SQLAlchemy
+    # is pinned below 2.2 in requirements.txt; re-check this on upgrades.
+    pool = sync_engine.pool
+    do_get = getattr(pool, "_do_get", None)
+    if do_get is None:
+        logger.warning("DB pool wait metric disabled: pool has no _do_get")
+        return
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+
+def start_metrics_server() -> None:
+    if METRICS_PORT <= 0:
+        return
+    start_http_server(METRICS_PORT)
+    logger.info(f"📈 Metrics served on :{METRICS_PORT}/metrics")
@@ -1,12 +1,57 @@
 from typing import Callable, Dict, Any, Awaitable
+from dataclasses import replace
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from sqlalchemy import select, update
+from sqlalchemy import select
 import logging
+import time
 from .database import async_session, TelegramUser, UserRole
+from .user_cache import CachedUser, user_cache, username_flusher
+from .prefilter import is_actionable
+from .perf import perf, STAGE_RBAC
 
 logger = logging.getLogger(__name__)
 
+
+async def load_user(user_id: int, username: str) -> CachedUser:
+    """Fetch user from DB, auto-registering with role USER if new."""
+    async with async_session() as session:
+        result = await session.execute(
+            select(TelegramUser).where(TelegramUser.telegram_id == user_id)
+        )
+        user = result.scalar_one_or_none()
+
+        # Auto-register if new (Default role USER)
+        if not user:
+            user = TelegramUser(telegram_id=user_id, username=username, role=UserRole.USER)
+            session.add(user)
+            await session.commit()
+            logger.info(f"✅ New user registered: {username} ({user_id}) with role {user.role.value}")
+
+        logger.debug(f"🔍 Role fetched from DB: {user.role.value} for {username} ({user_id})")
+        return CachedUser.from_model(user)
+
+
+async def resolve_user(user_id: int, username: str) -> CachedUser:
+    """
+    Resolve user from cache, falling back to DB on miss/expiry.
+    Username changes are written behind (batched), never blocking the message.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await load_user(user_id, username)
+        user_cache.put(user)
+
+    # Update username if changed (but PRESERVE existing role)
+    if user.username != username:
+        logger.debug(f"📝 Username changed for {user_id}: {user.username} → {username}")
+        user = replace(user, username=username)
+        user_cache.put(user)
+        username_flusher.schedule(user_id, username)
+
+    return user
+
+
 class RoleMiddleware(BaseMiddleware):
     """
     RBAC Middleware that:
@@ -14,6 +59,11 @@ class RoleMiddleware(BaseMiddleware):
     2. Updates username if changed (but NEVER overwrites role)
     3. Checks role permissions for protected handlers
     4. Injects user object into handler data
+
+    Users are resolved through a bounded TTL cache; role changes are
+    picked up on expiry (USER_CACHE_PRIVILEGED_TTL for elevated roles)
+    or at once via USER_ROLE_UPDATE events. Messages that
+    no real handler acts on (see prefilter) skip RBAC entirely.
     """
     async def __call__(
         self,
@@ -21,53 +71,36 @@ class RoleMiddleware(BaseMiddleware):
         event: Message,
         data: Dict[str, Any]
     ) -> Any:
+        # Get required role from handler flags
+        required_role = data.get("handler", {}).flags.get("role")
+
+        # Chatter bound for the catch-all handler: no DB work
+        if not required_role and not is_actionable(event):
+            return await handler(event, data)
+
         user_id = event.from_user.id
         username = event.from_user.username or "Unknown"
 
-        async with async_session() as session:
-            # Fetch user from DB
-            result = await session.execute(
-                select(TelegramUser).where(TelegramUser.telegram_id == user_id)
-            )
-            user = result.scalar_one_or_none()
-
-            # Auto-register if new (Default role USER)
-            if not user:
-                user = TelegramUser(telegram_id=user_id, username=username, role=UserRole.USER)
-                session.add(user)
-                await session.commit()
-                logger.info(f"✅ New user registered: {username} ({user_id}) with role {user.role.value}")
+        start = time.perf_counter()
+        user = await resolve_user(user_id, username)
+        perf.record(STAGE_RBAC, time.perf_counter() - start)
+
+        # If handler requires specific role, check it
+        if required_role:
+            if user.role >= required_role:
+                # Inject user into handler
+                data["user"] = user
+                logger.debug(f"✅ Access granted: {username} ({user.role.value}) >= {required_role.value}")
+                return await handler(event, data)
             else:
-                # Update username if changed (but PRESERVE existing role)
-                if user.username != username:
-                    user.username = username
-                    await session.commit()
-                    logger.debug(f"📝 Updated username for {user_id}: {user.username} → {username}")
-                
-                # Refresh from DB to ensure we have latest role (critical!)
-                await session.refresh(user)
-                logger.debug(f"🔍 Role fetched from DB: {user.role.value} for {username} ({user_id})")
-
-            # Get required role from handler flags
-            required_role = data.get("handler", {}).flags.get("role")
-            
-            # If handler requires specific role, check it
-            if required_role:
-                if user.role >= required_role:
-                    # Inject user into handler
-                    data["user"] = user
-                    logger.debug(f"✅ Access granted: {username} ({user.role.value}) >= {required_role.value}")
-                    return await handler(event, data)
-                else:
-                    logger.warning(f"⛔ Access denied: {username} ({user.role.value}) < {required_role.value}")
-                    await event.reply(
-                        f"⛔ Access Denied.\n"
-                        f"Required: {required_role.value}\n"
-                        f"Your Role: {user.role.value}"
-                    )
-                    return
-            
-            # No role requirement - inject user anyway for convenience
-            data["user"] = user
-            return await handler(event, data)
+                logger.warning(f"⛔ Access denied: {username} ({user.role.value}) < {required_role.value}")
+                await event.reply(
+                    f"⛔ Access Denied.\n"
+                    f"Required: {required_role.value}\n"
+                    f"Your Role: {user.role.value}"
+                )
+                return
 
+        # No role requirement - inject user anyway for convenience
+        data["user"] = user
+        return await handler(event, data)
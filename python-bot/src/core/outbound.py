@@ -0,0 +1,260 @@
+"""
+Outbound Telegram Send Scheduler.
+
+Registered as an aiogram request middleware (bot.session.middleware), so every
+send/edit call made by the bot - message.reply(), bot.send_message() - goes
+through one place:
+
+- Global token bucket (Telegram: ~30 msg/s per bot)
+- Per-chat token buckets (~1 msg/s private chats, ~20 msg/min groups)
+- Priority lanes: alerts are dispatched ahead of interactive replies
+- TelegramRetryAfter (429) pauses the affected chat and re-queues the call
+- Bounded queue (callers wait for a slot when full) + fixed worker pool
+
+Non-send methods (getUpdates, getMe, setWebhook...) bypass the queue.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.core.metrics import observe_telegram_call, OUTBOUND_QUEUE_SECONDS
+from src.core.perf import perf, STAGE_TELEGRAM
+from src.core.tracing import Span, current_span, span
+
+logger = logging.getLogger(__name__)
+
+# Config
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", 8))
+OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", 1000))
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", 30))         # msg/s per bot
+OUTBOUND_PRIVATE_RATE = float(os.getenv("OUTBOUND_PRIVATE_RATE", 1))        # msg/s per private chat
+OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", 20 / 60))      # msg/s per group
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", 3))
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", 5))
+
+# Priority lanes (lower = sooner)
+PRIORITY_ALERT = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BULK = 2
+
+# Priority of sends made from the current task (alert path sets PRIORITY_ALERT)
+send_priority: contextvars.ContextVar[int] = contextvars.ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+_SEND_PREFIXES = ("send", "edit", "copy", "forward")
+
+
+class TokenBucket:
+    """Non-blocking token bucket: try_acquire() returns seconds to wait (0 = acquired)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def try_acquire(self) -> float:
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, seconds: float) -> None:
+        """Pause the bucket (Telegram RetryAfter)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        # Refill only from the end of the pause, not across it
+        self.tokens = 0
+        self.updated = self.blocked_until
+
+    @property
+    def idle(self) -> bool:
+        return time.monotonic() >= self.blocked_until and \
+            self.tokens + (time.monotonic() - self.updated) * self.rate >= self.capacity
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    make_request: Any = field(compare=False)
+    bot: Any = field(compare=False)
+    method: Any = field(compare=False)
+    chat_id: Any = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    enqueued: float = field(default_factory=time.monotonic, compare=False)
+    trace_parent: Optional[Span] = field(default=None, compare=False)  # caller's span (workers run outside it)
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Rate-limited, prioritized send queue for all bot API calls that post to a chat."""
+
+    def __init__(self, workers: int = OUTBOUND_WORKERS, queue_size: int = OUTBOUND_QUEUE_SIZE):
+        self.workers = workers
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._queue_size = queue_size
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks = []
+        self._seq = itertools.count()
+        self._global = TokenBucket(OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_RATE)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        # Queue itself is unbounded so delayed re-queues never fail; admission is bounded by slots
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self._queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📤 Outbound scheduler started: {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        api_method = getattr(method, "__api_method__", "")
+        if self._queue is None or chat_id is None or not api_method.startswith(_SEND_PREFIXES):
+            if api_method == "getUpdates":  # Long poll: its duration is not API latency
+                return await make_request(bot, method)
+            with span(f"telegram.{api_method}", if_traced=True):
+                return await self._timed_request(make_request, bot, method, api_method)
+
+        async with self._slots:
+            future = asyncio.get_running_loop().create_future()
+            job = _Job(
+                priority=send_priority.get(),
+                seq=next(self._seq),
+                make_request=make_request,
+                bot=bot,
+                method=method,
+                chat_id=chat_id,
+                future=future,
+                trace_parent=current_span(),
+            )
+            self._queue.put_nowait(job)
+            return await future
+
+    @staticmethod
+    async def _timed_request(make_request, bot, method, api_method: str):
+        start = time.perf_counter()
+        try:
+            result = await make_request(bot, method)
+        except Exception as e:
+            observe_telegram_call(api_method, time.perf_counter() - start, e)
+            raise
+        observe_telegram_call(api_method, time.perf_counter() - start)
+        return result
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        # "-100123" (from env) and -100123 (from a Message) are the same chat
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                # Drop idle buckets (full and not paused) to bound memory
+                self._chats = {k: b for k, b in self._chats.items() if not b.idle}
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = OUTBOUND_GROUP_RATE if is_group else OUTBOUND_PRIVATE_RATE
+            bucket = self._chats[chat_id] = TokenBucket(rate, OUTBOUND_CHAT_BURST)
+        return bucket
+
+    def _requeue_later(self, job: _Job, delay: float) -> None:
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():  # Caller gave up (cancelled)
+                    continue
+
+                # Per-chat limit: don't block the worker, come back later
+                wait = self._chat_bucket(job.chat_id).try_acquire()
+                if wait > 0:
+                    self._requeue_later(job, wait)
+                    continue
+
+                # Global limit applies to every job - wait in place
+                wait = self._global.try_acquire()
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self._global.try_acquire()
+
+                if job.attempts == 0:
+                    OUTBOUND_QUEUE_SECONDS.observe(time.monotonic() - job.enqueued)
+                try:
+                    api_method = job.method.__api_method__
+                    with span(
+                        f"telegram.{api_method}", parent=job.trace_parent, if_traced=True,
+                        chat_id=job.chat_id, attempt=job.attempts + 1
+                    ):
+                        result = await self._timed_request(job.make_request, job.bot, job.method, api_method)
+                except TelegramRetryAfter as e:
+                    job.attempts += 1
+                    self._chat_bucket(job.chat_id).block(e.retry_after)
+                    if job.attempts > OUTBOUND_MAX_RETRIES:
+                        self.failed += 1
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                        continue
+                    self.retried += 1
+                    logger.warning(
+                        f"⏳ Flood control for chat {job.chat_id}: retry in {e.retry_after}s "
+                        f"(attempt {job.attempts}/{OUTBOUND_MAX_RETRIES})"
+                    )
+                    self._requeue_later(job, e.retry_after)
+                    continue
+                except Exception as e:
+                    self.failed += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                    continue
+
+                self.sent += 1
+                # Caller-visible send time: queueing, rate limits and retries included
+                perf.record(STAGE_TELEGRAM, time.monotonic() - job.enqueued)
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"❌ Outbound worker {worker_id} error: {e}", exc_info=True)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+
+# Shared scheduler instance
+outbound = OutboundScheduler()
@@ -0,0 +1,94 @@
+"""
+In-Process Latency Recorder (/perf).
+
+One fixed-size ring buffer per stage (search, rbac, alert, telegram) holding
+the last PERF_RING_SIZE samples as (monotonic timestamp, seconds) pairs in
+preallocated C double arrays: recording on the hot path is two stores and an
+index bump, no allocation, no lock (single event loop).
+
+Percentiles are only computed when /perf asks for them, over the samples of
+the last PERF_WINDOW_MINUTES still in the ring.
+"""
+
+import math
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+# Config
+PERF_RING_SIZE = int(os.getenv("PERF_RING_SIZE", 4096))            # samples kept per stage
+PERF_WINDOW_MINUTES = float(os.getenv("PERF_WINDOW_MINUTES", 5))   # default /perf window
+
+STAGE_SEARCH = "search"
+STAGE_RBAC = "rbac"
+STAGE_ALERT = "alert"
+STAGE_TELEGRAM = "telegram"
+
+
+class LatencyRing:
+    """Fixed-size ring of (timestamp, seconds) samples."""
+
+    __slots__ = ("size", "_ts", "_values", "_next", "count")
+
+    def __init__(self, size: int = PERF_RING_SIZE):
+        self.size = size
+        self._ts = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._next = 0
+        self.count = 0  # total samples ever recorded
+
+    def record(self, seconds: float) -> None:
+        i = self._next
+        self._ts[i] = time.monotonic()
+        self._values[i] = seconds
+        self._next = i + 1 if i + 1 < self.size else 0
+        self.count += 1
+
+    def window(self, seconds: float) -> List[float]:
+        """Samples recorded within the last `seconds`, unordered."""
+        since = time.monotonic() - seconds
+        filled = min(self.count, self.size)
+        ts, values = self._ts, self._values
+        return [values[i] for i in range(filled) if ts[i] >= since]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class PerfRecorder:
+    """Latency rings by stage."""
+
+    def __init__(self, size: int = PERF_RING_SIZE):
+        self._rings: Dict[str, LatencyRing] = {
+            stage: LatencyRing(size)
+            for stage in (STAGE_SEARCH, STAGE_RBAC, STAGE_ALERT, STAGE_TELEGRAM)
+        }
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._rings)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self._rings[stage].record(seconds)
+
+    def summary(self, stage: str, minutes: float = PERF_WINDOW_MINUTES) -> Optional[dict]:
+        """count/p50/p95/p99/max in seconds over the window, None without samples."""
+        samples = self._rings[stage].window(minutes * 60)
+        if not samples:
+            return None
+        samples.sort()
+        return {
+            "count": len(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": samples[-1],
+        }
+
+
+# Shared instance
+perf = PerfRecorder()
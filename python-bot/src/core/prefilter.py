@@ -0,0 +1,63 @@
+"""
+Message Pre-classification.
+
+Cheap, DB-free check run before RBAC resolution. Decides from chat type,
+thread id, command prefix and the WS/phone patterns whether a message can
+reach a real handler. Ordinary chatter that ends up in the catch-all
+handler skips the user lookup entirely.
+"""
+
+import os
+import re
+from aiogram.types import Message
+from .topic_registry import topic_registry
+
+# Patterns shared with handler filters in main.py
+WS_PATTERN = r"^[Ww][Ss][-\s]?\d+$"   # Workstation: WS-123, ws123, WS 123
+PHONE_PATTERN = r"^\d{3,}$"           # Phone: 1234 or longer
+
+_WS_RE = re.compile(WS_PATTERN)
+_PHONE_RE = re.compile(PHONE_PATTERN)
+
+ASSETS_TOPIC = "assets"
+
+
+def _in_assets_topic(message: Message) -> bool:
+    """Synchronous mirror of is_in_topic(message, 'assets') using cached topics."""
+    supergroup_id = os.getenv("TELEGRAM_SUPERGROUP_ID")
+    if not supergroup_id or str(message.chat.id) != supergroup_id:
+        return False
+
+    if not topic_registry.loaded:
+        # Can't decide without topics - let the handler check it
+        return True
+
+    thread_id = topic_registry.get_cached(ASSETS_TOPIC)
+    message_thread_id = message.message_thread_id or 0
+    if not thread_id:
+        return message_thread_id == 0
+    return message_thread_id == thread_id
+
+
+def is_actionable(message: Message) -> bool:
+    """
+    Return True if the message can reach a handler that acts on it.
+
+    - Commands (/start, /search ...) are always actionable
+    - WS/phone queries only inside the #assets topic
+    - Anything else falls through to the catch-all handler
+    """
+    if message.from_user is None:
+        return False
+
+    text = message.text
+    if not text:
+        return False
+
+    if text.startswith("/"):
+        return True
+
+    if _WS_RE.match(text) or _PHONE_RE.match(text):
+        return _in_assets_topic(message)
+
+    return False
@@ -0,0 +1,103 @@
+"""
+Shared Search Result Cache.
+
+- Rendered search responses cached in one Redis hash shared by all bot replicas
+  (field = normalized query, value = rendered HTML)
+- Singleflight: concurrent identical queries in this process share one computation
+- Invalidated by the admin panel (DEL of the hash) on every employees write
+"""
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Config
+SEARCH_CACHE_KEY = "bot:search_cache"  # Must match admin panel invalidation
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 300))  # seconds
+
+
+class SearchCache:
+    """Redis-backed result cache with in-process singleflight."""
+
+    def __init__(self, key: str = SEARCH_CACHE_KEY, ttl: int = SEARCH_CACHE_TTL):
+        self.key = key
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # callers served by another caller's in-flight computation
+
+    def invalidate_local(self) -> None:
+        """Results computed before this point must not be written back."""
+        self._epoch += 1
+
+    async def clear(self, redis_client) -> None:
+        """Drop all shared entries."""
+        self.invalidate_local()
+        try:
+            await redis_client.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Search cache clear failed: {e}")
+
+    async def _get(self, redis_client, field: str) -> Optional[str]:
+        try:
+            return await redis_client.hget(self.key, field)
+        except Exception as e:
+            logger.warning(f"Search cache read failed: {e}")
+            return None
+
+    async def _set(self, redis_client, field: str, value: str) -> None:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hset(self.key, field, value)
+            pipe.expire(self.key, self.ttl, nx=True)  # TTL starts with the first entry
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    async def get_or_compute(
+        self,
+        redis_client,
+        field: str,
+        compute: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return cached value for field, computing it at most once per process."""
+        cached = await self._get(redis_client, field)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        inflight = self._inflight.get(field)
+        if inflight is not None:
+            self.shared += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[field] = future
+        epoch = self._epoch
+        try:
+            value = await compute()
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure without waiters isn't logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(field, None)
+
+        if epoch == self._epoch:
+            await self._set(redis_client, field, value)
+        return value
+
+
+# Shared instance
+search_cache = SearchCache()
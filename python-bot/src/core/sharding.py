@@ -0,0 +1,177 @@
+"""
+Horizontal Sharding.
+
+BOT_ROLE selects what a process does:
+
+- all      (default) receive updates, handle them, consume alerts - single process
+- ingress  receive updates (polling or webhook) and push each one to the Redis
+           list of its shard: bot:updates:<chat_id % SHARD_COUNT>
+- worker   run the dispatcher for SHARD_INDEX only, reading its list in order
+
+All updates of a chat land on the same shard and a worker feeds its list to
+the dispatcher in order; the update executor (core/update_executor.py) keeps
+each chat serialized while different chats run concurrently. Handlers (CPU, DB)
+spread over SHARD_COUNT worker processes/containers.
+
+Each worker moves an update to bot:updates:<n>:processing while handling it
+(BLMOVE) and puts it back on restart, so a crashed worker doesn't drop it.
+
+Alerts are consumed by one designated process (ALERT_CONSUMER, default: the
+ingress / single process), never by every worker.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# Config
+BOT_ROLE = os.getenv("BOT_ROLE", "all").strip().lower()   # all | ingress | worker
+SHARD_COUNT = max(1, int(os.getenv("SHARD_COUNT", 1)))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+SHARD_QUEUE_PREFIX = "bot:updates:"
+SHARD_QUEUE_MAXLEN = int(os.getenv("SHARD_QUEUE_MAXLEN", 10000))  # per shard, oldest dropped beyond
+# auto = ingress or single process; true/false to override
+ALERT_CONSUMER = os.getenv("ALERT_CONSUMER", "auto").strip().lower()
+
+
+def handles_updates() -> bool:
+    return BOT_ROLE in ("all", "worker")
+
+
+def receives_updates() -> bool:
+    return BOT_ROLE in ("all", "ingress")
+
+
+def consumes_alerts() -> bool:
+    if ALERT_CONSUMER in ("true", "1", "yes"):
+        return True
+    if ALERT_CONSUMER in ("false", "0", "no"):
+        return False
+    return BOT_ROLE in ("all", "ingress")
+
+
+def shard_for(chat_id: int) -> int:
+    return abs(chat_id) % SHARD_COUNT
+
+
+def shard_queue(shard: int) -> str:
+    return f"{SHARD_QUEUE_PREFIX}{shard}"
+
+
+class ShardRouter(BaseMiddleware):
+    """
+    Ingress: outer update middleware that forwards every update to its shard
+    queue instead of handling it locally.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.forwarded = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        # event_chat / event_from_user are resolved by aiogram's UserContextMiddleware
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else (user.id if user else 0)
+
+        queue = shard_queue(shard_for(key))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(queue, event.model_dump_json(exclude_unset=True))
+        pipe.ltrim(queue, -SHARD_QUEUE_MAXLEN, -1)
+        await pipe.execute()
+        self.forwarded += 1
+        # Forwarding is this node's handling: any result other than UNHANDLED
+        # keeps aiogram from logging "Update ... is not handled" for it
+        return True
+
+
+class ShardWorker:
+    """Worker: feeds this shard's updates to the dispatcher, in order."""
+
+    def __init__(self, bot: Bot, dp: Dispatcher, redis_client, window: int, shard: int = SHARD_INDEX):
+        self.bot = bot
+        self.dp = dp
+        self.redis = redis_client
+        self.queue = shard_queue(shard)
+        self.processing = f"{self.queue}:processing"
+        # Updates taken off the queue but not finished; the rest stays in Redis
+        self._window = asyncio.Semaphore(window)
+        self._tasks = set()
+        self._recovered = False
+        self.handled = 0
+
+    async def _recover(self) -> None:
+        """Put updates a previous (crashed) run was handling back at the head of the queue."""
+        recovered = 0
+        while await self.redis.lmove(self.processing, self.queue, "RIGHT", "LEFT"):
+            recovered += 1
+        if recovered:
+            logger.warning(f"♻️ Re-queued {recovered} unfinished updates on {self.queue}")
+
+    async def run(self) -> None:
+        await self.dp.emit_startup(bot=self.bot)
+        try:
+            delay = 1
+            while True:
+                try:
+                    if not self._recovered:
+                        await self._recover()
+                        self._recovered = True
+                    logger.info(f"🧩 Shard worker reading {self.queue} ({SHARD_COUNT} shards)")
+                    delay = 1
+                    while True:
+                        await self._window.acquire()
+                        try:
+                            raw = await self.redis.blmove(self.queue, self.processing, 5, "LEFT", "RIGHT")
+                        except BaseException:
+                            self._window.release()
+                            raise
+                        if raw is None:
+                            self._window.release()
+                            continue
+                        # Started in queue order; the update executor serializes per chat
+                        task = asyncio.create_task(self._process(raw))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Shard worker error: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 60)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            await self.dp.emit_shutdown(bot=self.bot)
+
+    async def _process(self, raw: str) -> None:
+        try:
+            await self._handle(raw)
+            await self.redis.lrem(self.processing, 1, raw)
+        except Exception as e:
+            logger.error(f"❌ Shard update ack failed: {e}")
+        finally:
+            self._window.release()
+
+    async def _handle(self, raw: str) -> None:
+        try:
+            update = Update.model_validate_json(raw, context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Dropping malformed update on {self.queue}: {e}")
+            return
+        try:
+            await self.dp.feed_update(self.bot, update)
+            self.handled += 1
+        except Exception as e:
+            logger.error(f"❌ Update {update.update_id} handling error: {e}", exc_info=True)
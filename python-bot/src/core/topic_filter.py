@@ -6,20 +6,15 @@ import os
 import logging
 from typing import Optional
 from aiogram.types import Message
-from sqlalchemy import select
-from .database import async_session, TelegramTopic
+from .topic_registry import topic_registry
+from .metrics import TOPIC_FILTER
 
 logger = logging.getLogger(__name__)
 
 
 async def get_topic_thread_id(topic_name: str) -> Optional[int]:
-    """Get thread_id for a topic name from database."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(TelegramTopic).where(TelegramTopic.name == topic_name)
-        )
-        topic = result.scalar_one_or_none()
-        return topic.thread_id if topic else None
+    """Get thread_id for a topic name (served from the in-memory registry)."""
+    return await topic_registry.get_thread_id(topic_name)
 
 
 async def is_in_topic(message: Message, topic_name: str) -> bool:
@@ -39,6 +34,7 @@ async def is_in_topic(message: Message, topic_name: str) -> bool:
     # If not in supergroup, deny
     if not supergroup_id or str(message.chat.id) != supergroup_id:
         logger.debug(f"❌ Not in supergroup: chat_id={message.chat.id}, expected={supergroup_id}")
+        TOPIC_FILTER.labels(topic_name, "not_supergroup").inc()
         return False
     
     # Get configured thread_id for topic
@@ -49,12 +45,15 @@ async def is_in_topic(message: Message, topic_name: str) -> bool:
         # Allow if in general topic (no thread_id) or thread_id=0
         if message.message_thread_id is None or message.message_thread_id == 0:
             logger.debug(f"✅ In general topic (topic '{topic_name}' not configured)")
+            TOPIC_FILTER.labels(topic_name, "general").inc()
             return True
+        TOPIC_FILTER.labels(topic_name, "mismatch").inc()
         return False
     
     # Topic is configured - must match exactly
     message_thread_id = message.message_thread_id or 0
     is_match = message_thread_id == thread_id
+    TOPIC_FILTER.labels(topic_name, "match" if is_match else "mismatch").inc()
     
     if is_match:
         logger.debug(f"✅ In topic '{topic_name}': thread_id={message_thread_id}")
@@ -0,0 +1,136 @@
+"""
+Topic Registry - in-process cache of the telegram_topics table.
+
+The whole table is tiny (a handful of rows), so it is loaded once and every
+lookup is served from memory. Replicas are kept in sync through a Redis
+invalidation event published on the `netadmin_events` channel whenever a
+topic mapping changes (see /set_topic).
+
+A failed reload keeps the last good snapshot; if the first load fails, lookups
+retry at most every TOPIC_RELOAD_RETRY seconds instead of hitting the DB on
+every alert.
+
+Alert destinations (telegram_topic_destinations) are loaded alongside: each
+topic delivers to its thread in the supergroup plus any extra chats. Without
+that table the topics still load, with no extra destinations.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from .database import async_session, TelegramTopic, TelegramTopicDestination
+
+logger = logging.getLogger(__name__)
+
+# Redis channel/event used to tell every bot replica to reload topics
+TOPICS_EVENT_CHANNEL = "netadmin_events"
+TOPICS_UPDATE_EVENT = "CONFIG_UPDATE:TOPICS"
+
+TELEGRAM_SUPERGROUP_ID = os.getenv("TELEGRAM_SUPERGROUP_ID")
+TOPIC_RELOAD_RETRY = 60  # seconds between lazy load attempts while the DB is unreachable
+
+
+@dataclass(frozen=True)
+class Destination:
+    """One chat (and optional forum thread) an alert is delivered to."""
+    chat_id: int
+    thread_id: Optional[int] = None
+    label: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.chat_id}:{self.thread_id or 0}"
+
+
+class TopicRegistry:
+    """In-memory mapping of topic name -> thread_id (+ extra alert destinations)."""
+
+    def __init__(self):
+        self._topics: Dict[str, int] = {}
+        self._destinations: Dict[str, Tuple[Destination, ...]] = {}
+        self._loaded = False
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def reload(self) -> None:
+        """Load the whole telegram_topics table and swap it in atomically."""
+        async with self._lock:
+            await self._load()
+
+    async def _load(self) -> None:
+        async with async_session() as session:
+            result = await session.execute(select(TelegramTopic.name, TelegramTopic.thread_id))
+            topics = {name: thread_id for name, thread_id in result.all()}
+
+            extra: Dict[str, List[Destination]] = {}
+            try:
+                result = await session.execute(
+                    select(
+                        TelegramTopicDestination.topic_name,
+                        TelegramTopicDestination.chat_id,
+                        TelegramTopicDestination.thread_id,
+                        TelegramTopicDestination.label,
+                    ).where(TelegramTopicDestination.is_active.is_(True))
+                    .order_by(TelegramTopicDestination.id)
+                )
+                for topic_name, chat_id, thread_id, label in result.all():
+                    extra.setdefault(topic_name, []).append(Destination(chat_id, thread_id, label or ""))
+            except Exception as e:
+                # Table comes from config/migrate_alert_destinations.sql; older databases may lack it
+                logger.warning(f"Alert destinations not loaded, topics deliver to the supergroup only: {e}")
+                await session.rollback()
+
+        self._topics = topics
+        self._destinations = {name: tuple(dests) for name, dests in extra.items()}
+        self._loaded = True
+        logger.info(
+            f"🗂 Topic registry loaded: {len(topics)} topics, "
+            f"{sum(len(d) for d in extra.values())} extra alert destinations"
+        )
+
+    async def ensure_loaded(self) -> None:
+        """Lazy first load; on failure lookups see an empty registry (retried every TOPIC_RELOAD_RETRY)."""
+        if self._loaded or time.monotonic() < self._retry_at:
+            return
+        async with self._lock:
+            # Alerts queued behind a failed attempt do not retry it
+            if self._loaded or time.monotonic() < self._retry_at:
+                return
+            try:
+                await self._load()
+            except Exception as e:
+                self._retry_at = time.monotonic() + TOPIC_RELOAD_RETRY
+                logger.error(f"❌ Topic registry load failed, alerts go to the main chat: {e}")
+
+    async def get_thread_id(self, topic_name: str) -> Optional[int]:
+        """Get thread_id for a topic name (loads the table on first use)."""
+        await self.ensure_loaded()
+        return self._topics.get(topic_name)
+
+    def get_cached(self, topic_name: str) -> Optional[int]:
+        """Synchronous lookup; returns None if the registry is not loaded yet."""
+        return self._topics.get(topic_name)
+
+    async def get_destinations(self, topic_name: str) -> List[Destination]:
+        """All alert destinations for a topic: its supergroup thread first, then extra chats."""
+        await self.ensure_loaded()
+
+        destinations = []
+        if TELEGRAM_SUPERGROUP_ID:
+            destinations.append(Destination(int(TELEGRAM_SUPERGROUP_ID), self._topics.get(topic_name) or None, "supergroup"))
+        for dest in self._destinations.get(topic_name, ()):
+            if all(dest.key != d.key for d in destinations):
+                destinations.append(dest)
+        return destinations
+
+
+# Shared registry instance
+topic_registry = TopicRegistry()
@@ -0,0 +1,253 @@
+"""
+Lightweight Tracing.
+
+Spans are kept in a contextvar, so nesting follows the asyncio task tree
+without passing anything around:
+
+    with span("alert.route", topic=alert.topic):
+        ...
+
+- Alerts: the Java agent puts trace_id + published_ts in the envelope; the bot
+  continues that trace (agent -> Redis -> receive -> route -> topic lookup ->
+  every Telegram send attempt), so a late alert shows where the time went
+- Updates: one trace per update with a span per middleware and handler
+
+TRACE_EXPORT selects where finished spans go (batched every TRACE_EXPORT_INTERVAL):
+
+- off   (default) spans are not recorded
+- file  JSON lines appended to TRACE_FILE
+- otlp  OTLP/HTTP JSON POSTed to TRACE_OTLP_ENDPOINT (any OpenTelemetry collector)
+
+The buffer is bounded (TRACE_MAX_QUEUE); spans beyond it are dropped and counted.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Config
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "off").strip().lower()  # off | file | otlp
+TRACE_FILE = os.getenv("TRACE_FILE", "/app/logs/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://otel-collector:4318/v1/traces")
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", 5))  # seconds
+TRACE_MAX_QUEUE = int(os.getenv("TRACE_MAX_QUEUE", 10000))            # finished spans awaiting export
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "netadmin-bot")
+
+_TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def is_valid_trace_id(trace_id: Optional[str]) -> bool:
+    """W3C / OTLP trace id: 32 lowercase hex chars, not all zero."""
+    return bool(trace_id) and _TRACE_ID_RE.match(trace_id) is not None and trace_id != "0" * 32
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    span_id: str = field(default_factory=new_span_id)
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+class Tracer:
+    """Collects finished spans and exports them in batches."""
+
+    def __init__(self, mode: str = TRACE_EXPORT):
+        self.mode = mode
+        self.enabled = mode in ("file", "otlp")
+        self._finished: Deque[Span] = deque()
+        self.exported = 0
+        self.dropped = 0
+
+    def finish(self, finished: Span) -> None:
+        if len(self._finished) >= TRACE_MAX_QUEUE:
+            self.dropped += 1
+            return
+        self._finished.append(finished)
+
+    def _drain(self) -> List[Span]:
+        batch = list(self._finished)
+        self._finished.clear()
+        return batch
+
+    async def run(self) -> None:
+        """Export loop; flushes what is left on cancellation."""
+        if not self.enabled:
+            return
+        logger.info(f"🔭 Tracing enabled: exporting to {TRACE_FILE if self.mode == 'file' else TRACE_OTLP_ENDPOINT}")
+        try:
+            while True:
+                await asyncio.sleep(TRACE_EXPORT_INTERVAL)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch = self._drain()
+        if not batch:
+            return
+        try:
+            if self.mode == "file":
+                await asyncio.to_thread(self._write_file, batch)
+            else:
+                await self._post_otlp(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning(f"Trace export of {len(batch)} spans failed: {e}")
+
+    @staticmethod
+    def _write_file(batch: List[Span]) -> None:
+        os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            for finished in batch:
+                f.write(json.dumps(finished.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    @staticmethod
+    async def _post_otlp(batch: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "netadmin.bot"},
+                    "spans": [finished.to_otlp() for finished in batch],
+                }],
+            }]
+        }
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            async with session.post(TRACE_OTLP_ENDPOINT, json=payload) as response:
+                if response.status >= 300:
+                    raise RuntimeError(f"collector answered {response.status}")
+
+
+# Shared instance
+tracer = Tracer()
+
+
+@contextmanager
+def span(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent: Optional[Span] = None,
+    if_traced: bool = False,
+    **attributes
+) -> Iterator[Optional[Span]]:
+    """
+    Open a child of `parent` (default: the current span) for the block.
+
+    trace_id starts/continues a given trace when there is no parent;
+    if_traced=True records nothing outside a trace instead of starting one.
+    Yields None when nothing is recorded.
+    """
+    if not tracer.enabled:
+        yield None
+        return
+
+    if parent is None:
+        parent = _current.get()
+    if parent is None and if_traced:
+        yield None
+        return
+    opened = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else (trace_id if is_valid_trace_id(trace_id) else new_trace_id()),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    token = _current.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        opened.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        opened.end_ns = time.time_ns()
+        tracer.finish(opened)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes) -> None:
+    """Record an already elapsed interval (e.g. publish -> receive) under parent/current span."""
+    if not tracer.enabled:
+        return
+    if parent is None:
+        parent = _current.get()
+    if parent is None:
+        return
+    tracer.finish(Span(
+        name=name,
+        trace_id=parent.trace_id,
+        parent_id=parent.span_id,
+        start_ns=start_ns,
+        end_ns=max(start_ns, end_ns),
+        attributes=attributes,
+    ))
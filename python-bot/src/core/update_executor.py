@@ -0,0 +1,118 @@
+"""
+Update Executor.
+
+Outer update middleware that controls how dispatched updates run:
+
+- Per-chat FIFO: updates of one chat are handled one at a time, in order
+- Cross-chat concurrency, capped at UPDATE_MAX_IN_FLIGHT handlers (defaults to
+  the SQLAlchemy pool size + overflow, so handlers never queue on the pool)
+- Backpressure: updates wait (deferred) for their chat / a free slot; beyond
+  UPDATE_MAX_PER_CHAT waiting updates for one chat, or UPDATE_MAX_PENDING in
+  total, new updates are shed (dropped) so one flooding chat can't starve others
+
+Counters (in_flight, pending, deferred, shed, handled) are exposed for /perf
+and metrics.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.core.database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from src.core.metrics import UPDATES_SHED
+
+logger = logging.getLogger(__name__)
+
+# Config
+UPDATE_MAX_IN_FLIGHT = int(os.getenv("UPDATE_MAX_IN_FLIGHT", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", 500))
+UPDATE_MAX_PER_CHAT = int(os.getenv("UPDATE_MAX_PER_CHAT", 20))
+
+_SHED_LOG_INTERVAL = 10  # seconds
+
+
+class _ChatSlot:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # FIFO: waiters acquire in arrival order
+        self.pending = 0
+
+
+class UpdateExecutor(BaseMiddleware):
+    """Per-chat serialized, globally bounded update handling."""
+
+    def __init__(
+        self,
+        max_in_flight: int = UPDATE_MAX_IN_FLIGHT,
+        max_pending: int = UPDATE_MAX_PENDING,
+        max_per_chat: int = UPDATE_MAX_PER_CHAT
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.max_per_chat = max_per_chat
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._chats: Dict[int, _ChatSlot] = {}
+        self._last_shed_log = 0.0
+        self.in_flight = 0
+        self.pending = 0
+        self.deferred = 0
+        self.shed = 0
+        self.handled = 0
+
+    def _shed(self, key, reason: str) -> None:
+        self.shed += 1
+        UPDATES_SHED.inc()
+        now = time.monotonic()
+        if now - self._last_shed_log > _SHED_LOG_INTERVAL:
+            self._last_shed_log = now
+            logger.warning(f"⚠️ Shedding updates ({reason}, chat {key}): {self.shed} shed so far")
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        # event_chat / event_from_user are resolved by aiogram's UserContextMiddleware
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else (user.id if user else 0)
+
+        if self.pending >= self.max_pending:
+            self._shed(key, "executor full")
+            return None
+        slot = self._chats.get(key)
+        if slot is None:
+            slot = self._chats[key] = _ChatSlot()
+        elif slot.pending >= self.max_per_chat:
+            self._shed(key, "chat flooding")
+            return None
+
+        slot.pending += 1
+        self.pending += 1
+        try:
+            if slot.lock.locked() or self._slots.locked():
+                self.deferred += 1
+            async with slot.lock:
+                async with self._slots:
+                    self.in_flight += 1
+                    try:
+                        return await handler(event, data)
+                    finally:
+                        self.in_flight -= 1
+                        self.handled += 1
+        finally:
+            slot.pending -= 1
+            self.pending -= 1
+            if slot.pending == 0 and self._chats.get(key) is slot:
+                del self._chats[key]
+
+
+# Shared instance
+update_executor = UpdateExecutor()
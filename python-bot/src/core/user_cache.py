@@ -0,0 +1,165 @@
+"""
+User Cache for RBAC resolution.
+
+- Bounded TTL cache: telegram_id -> CachedUser (role, username); privileged
+  users expire after USER_CACHE_PRIVILEGED_TTL so a demotion applies quickly
+  even when nobody publishes USER_ROLE_UPDATE (the admin panel's role
+  endpoint does; hand edits in the DB don't)
+- Write-behind flusher that batches username changes into one UPDATE
+- Invalidated per user (role change) or globally via Redis events
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from sqlalchemy import update, bindparam
+from .database import async_session, TelegramUser, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Config
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))  # seconds
+USER_CACHE_PRIVILEGED_TTL = int(os.getenv("USER_CACHE_PRIVILEGED_TTL", 30))  # seconds, roles above USER
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+USERNAME_FLUSH_INTERVAL = float(os.getenv("USERNAME_FLUSH_INTERVAL", 5))  # seconds
+
+# Redis events (published on netadmin_events)
+USER_ROLE_UPDATE_PREFIX = "USER_ROLE_UPDATE:"  # USER_ROLE_UPDATE:<telegram_id>
+USERS_UPDATE_EVENT = "CONFIG_UPDATE:USERS"     # drop the whole cache
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable snapshot of a telegram_users row injected into handlers."""
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    role: UserRole
+
+    @classmethod
+    def from_model(cls, user: TelegramUser) -> "CachedUser":
+        return cls(id=user.id, telegram_id=user.telegram_id, username=user.username, role=user.role)
+
+
+class UserCache:
+    """Bounded LRU cache with per-entry TTL."""
+
+    def __init__(
+        self,
+        ttl: float = USER_CACHE_TTL,
+        max_size: int = USER_CACHE_MAX_SIZE,
+        privileged_ttl: float = USER_CACHE_PRIVILEGED_TTL
+    ):
+        self.ttl = ttl
+        self.privileged_ttl = min(privileged_ttl, ttl)
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[CachedUser, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[CachedUser]:
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[telegram_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return user
+
+    def put(self, user: CachedUser) -> None:
+        ttl = self.ttl if user.role == UserRole.USER else self.privileged_ttl
+        self._entries[user.telegram_id] = (user, time.monotonic() + ttl)
+        self._entries.move_to_end(user.telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._entries.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UsernameFlusher:
+    """Collects username changes and writes them to DB in batches."""
+
+    def __init__(self, interval: float = USERNAME_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending: Dict[int, str] = {}
+
+    def schedule(self, telegram_id: int, username: str) -> None:
+        # Latest value wins if the user renamed twice within one interval
+        self._pending[telegram_id] = username
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        table = TelegramUser.__table__
+        stmt = (
+            update(table)
+            .where(table.c.telegram_id == bindparam("tid"))
+            .values(username=bindparam("uname"))
+        )
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    stmt, [{"tid": tid, "uname": uname} for tid, uname in pending.items()]
+                )
+                await session.commit()
+            logger.debug(f"📝 Flushed {len(pending)} username updates")
+        except Exception as e:
+            logger.error(f"❌ Username flush failed ({len(pending)} pending): {e}")
+            # Re-queue, keeping any newer values that arrived meanwhile
+            for tid, uname in pending.items():
+                self._pending.setdefault(tid, uname)
+
+    async def run(self) -> None:
+        """Background loop; flushes remaining changes on cancellation."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+
+def handle_user_event(data: str) -> bool:
+    """Apply a user invalidation event. Returns True if the event was recognized."""
+    if data == USERS_UPDATE_EVENT:
+        user_cache.clear()
+        logger.info("🧹 User cache cleared")
+        return True
+
+    if data.startswith(USER_ROLE_UPDATE_PREFIX):
+        try:
+            telegram_id = int(data[len(USER_ROLE_UPDATE_PREFIX):])
+        except ValueError:
+            logger.warning(f"Invalid user event: {data}")
+            return True
+        user_cache.invalidate(telegram_id)
+        logger.info(f"🧹 User cache invalidated for {telegram_id}")
+        return True
+
+    return False
+
+
+# Shared instances
+user_cache = UserCache()
+username_flusher = UsernameFlusher()
@@ -0,0 +1,129 @@
+"""
+Webhook Delivery Mode.
+
+BOT_MODE=webhook replaces long polling with an embedded aiohttp server:
+
+- Telegram POSTs each update to WEBHOOK_PATH
+- X-Telegram-Bot-Api-Secret-Token is checked against WEBHOOK_SECRET
+- The update is handed to the dispatcher in a background task and 200 is
+  returned immediately; concurrency and per-chat order are up to the update
+  executor (core/update_executor.py), so a flooding chat waits on its own
+  chat lock without holding a slot other chats need
+- Above WEBHOOK_MAX_PENDING queued updates the server answers 503, so Telegram
+  redelivers later instead of the bot buffering without limit
+- Startup registers the webhook (set_webhook) with WEBHOOK_URL + WEBHOOK_PATH
+
+Local test with a recorded update (no Telegram needed):
+
+    curl -X POST http://localhost:8443/telegram/webhook \\
+         -H "Content-Type: application/json" \\
+         -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \\
+         -d @update.json
+
+Set WEBHOOK_URL empty to skip set_webhook while testing locally.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Config
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()  # polling | webhook
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")      # Public base URL, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8443))
+WEBHOOK_MAX_PENDING = int(os.getenv("WEBHOOK_MAX_PENDING", 1000))        # accepted but not yet handled
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", 40))  # Telegram-side parallel connections
+
+
+class WebhookServer:
+    """aiohttp app feeding Telegram updates to the dispatcher."""
+
+    def __init__(self, bot: Bot, dp: Dispatcher, **workflow_data):
+        self.bot = bot
+        self.dp = dp
+        self.workflow_data = workflow_data
+        self._tasks = set()
+        self.received = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(WEBHOOK_PATH, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "pending": self.pending})
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if WEBHOOK_SECRET:
+            token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(token, WEBHOOK_SECRET):
+                return web.Response(status=401)
+
+        if self.pending >= WEBHOOK_MAX_PENDING:
+            self.rejected += 1
+            logger.warning(f"⚠️ Webhook backlog full ({self.pending}), asking Telegram to retry")
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Invalid webhook update: {e}")
+            return web.Response(status=400)
+
+        self.received += 1
+        task = asyncio.create_task(self._feed(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response(status=200)
+
+    async def _feed(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update, **self.workflow_data)
+        except Exception as e:
+            logger.error(f"❌ Update {update.update_id} handling error: {e}", exc_info=True)
+
+    async def run(self, allowed_updates: Optional[List[str]] = None) -> None:
+        """Serve until cancelled."""
+        runner = web.AppRunner(self.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+        await site.start()
+        logger.info(f"🌐 Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+        await self.dp.emit_startup(bot=self.bot, **self.workflow_data)
+        try:
+            if WEBHOOK_URL:
+                await self.bot.set_webhook(
+                    url=f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+                    secret_token=WEBHOOK_SECRET or None,
+                    allowed_updates=allowed_updates,
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                )
+                logger.info(f"✅ Webhook registered: {WEBHOOK_URL}{WEBHOOK_PATH}")
+            else:
+                logger.warning("WEBHOOK_URL not set - webhook not registered with Telegram")
+
+            await asyncio.Event().wait()
+        finally:
+            # Webhook stays registered: Telegram queues updates until the bot is back
+            await runner.cleanup()
+            for task in list(self._tasks):
+                task.cancel()
+            await self.dp.emit_shutdown(bot=self.bot, **self.workflow_data)
@@ -0,0 +1,21 @@
+"""
+Canonical workstation key.
+
+'WS-101', 'ws 101', 'WS0101' -> ('WS', 101). Mirrors config/migrate_ws_key.sql
+and the admin panel's parse_workstation().
+"""
+
+import re
+from typing import Optional, Tuple
+
+WS_KEY_RE = re.compile(r"^\s*([A-Za-z]+)[-\s]?(\d{1,9})\s*$")
+
+
+def parse_workstation(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Parse a workstation tag into (PREFIX, number); None if it isn't a tag."""
+    if not value:
+        return None
+    match = WS_KEY_RE.match(value)
+    if not match:
+        return None
+    return match.group(1).upper(), int(match.group(2))
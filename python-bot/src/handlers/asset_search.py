@@ -5,18 +5,24 @@ Searches employees/assets in PostgreSQL and returns formatted results.
 
 import logging
 import re
-from typing import Optional, List
-from sqlalchemy import select, or_
+import time
+from typing import Optional, List, Union
+from sqlalchemy import select, func
 from aiogram.types import Message
 
 from src.core.database import async_session, Employee
+from src.core.employee_index import employee_index, EmployeeRecord
+from src.core.workstation import parse_workstation
+from src.core.search_cache import search_cache
+from src.core.perf import perf, STAGE_SEARCH
 
 logger = logging.getLogger(__name__)
 
 
 def is_workstation_query(query: str) -> bool:
-    """Check if query is a workstation pattern (WS-123, ws123, etc.)"""
-    return bool(re.match(r'^ws[-\s]?\d+', query.lower()))
+    """Check if query is a workstation tag (WS-123, ws123, etc.); anything else goes to text search."""
+    ws_key = parse_workstation(query)
+    return ws_key is not None and ws_key[0] == "WS"
 
 
 def is_phone_query(query: str) -> bool:
@@ -26,59 +32,69 @@ def is_phone_query(query: str) -> bool:
     return cleaned.isdigit() and len(cleaned) >= 3
 
 
-async def search_employees(query: str, limit: int = 10) -> List[Employee]:
+def normalize_search_key(query: str) -> str:
+    """Cache key for a query: equivalent spellings share one entry (WS-101 == ws 101)."""
+    query = query.strip()
+    if is_workstation_query(query):
+        ws_key = parse_workstation(query)
+        if ws_key:
+            return f"ws:{ws_key[0]}{ws_key[1]}"
+    if is_phone_query(query):
+        return "phone:" + re.sub(r'[\s\-\(\)]+', '', query)
+    return "text:" + " ".join(query.lower().split())
+
+
+async def search_employees(query: str, limit: int = 10) -> List[Union[Employee, EmployeeRecord]]:
     """
     Search employees by multiple criteria.
     
-    Priority:
+    Priority (search_employees_ranked, shared with the admin inventory):
     1. Exact workstation match (WS-101)
     2. Exact phone match
     3. Full name contains (case-insensitive)
     4. AD login contains
     5. Email contains
+    6. Other text (department, company, location)
+    
+    WS queries are exact lookups on the canonical key, served from the in-memory
+    employee index once it is built; everything else is ranked in the DB.
     """
     query = query.strip()
     
     if not query:
         return []
     
+    ws_key = parse_workstation(query) if is_workstation_query(query) else None
+    if ws_key and employee_index.ready:
+        employees = employee_index.find_by_workstation(query, limit)
+        logger.info(f"Search '{query}' returned {len(employees)} results (index)")
+        return employees
+    
     async with async_session() as session:
-        # Build search filters based on query type
-        filters = []
-        
-        if is_workstation_query(query):
-            # Extract WS number (e.g., "WS-101" or "ws 101" -> "WS-101")
-            ws_number = re.sub(r'[^\d]+', '', query)
-            ws_patterns = [
-                f"WS-{ws_number}",
-                f"WS{ws_number}",
-                f"ws-{ws_number}",
-                f"ws{ws_number}",
-                ws_number  # Just the number
-            ]
-            for pattern in ws_patterns:
-                filters.append(Employee.workstation.ilike(f"%{pattern}%"))
-        
-        elif is_phone_query(query):
-            # Phone search
-            cleaned_phone = re.sub(r'[\s\-\(\)]+', '', query)
-            filters.append(Employee.internal_phone.ilike(f"%{cleaned_phone}%"))
+        if ws_key:
+            # Exact indexed equality on the canonical workstation key
+            stmt = select(Employee).where(
+                Employee.is_active == True,
+                Employee.ws_prefix == ws_key[0],
+                Employee.ws_number == ws_key[1]
+            ).order_by(Employee.id).limit(limit)
+            result = await session.execute(stmt)
+            employees = result.scalars().all()
+            logger.info(f"Search '{query}' returned {len(employees)} results (WS key)")
+            return employees
         
-        else:
-            # General text search (name parts, ad_login, email)
-            search_pattern = f"%{query}%"
-            filters.append(Employee.last_name.ilike(search_pattern))
-            filters.append(Employee.first_name.ilike(search_pattern))
-            filters.append(Employee.middle_name.ilike(search_pattern))
-            filters.append(Employee.ad_login.ilike(search_pattern))
-            filters.append(Employee.email.ilike(search_pattern))
-            filters.append(Employee.department.ilike(search_pattern))
+        # Ranked, index-backed search (config/migrate_search_v3.sql)
+        ranked = func.search_employees_ranked(query).table_valued(
+            "employee_id", "rank"
+        ).render_derived(name="ranked")
         
-        # Execute query
-        stmt = select(Employee).where(
-            Employee.is_active == True,  # Only active employees
-            or_(*filters)
-        ).limit(limit)
+        stmt = (
+            select(Employee)
+            .join(ranked, ranked.c.employee_id == Employee.id)
+            .where(Employee.is_active == True)  # Only active employees
+            .order_by(ranked.c.rank.desc(), Employee.id)
+            .limit(limit)
+        )
         
         result = await session.execute(stmt)
         employees = result.scalars().all()
@@ -166,10 +182,20 @@ def format_multiple_results(employees: List[Employee], query: str) -> str:
     return "\n".join(lines)
 
 
-async def handle_asset_search(message: Message, query: str):
+async def render_search(query: str) -> str:
+    """Search and format the response (cache miss path)."""
+    employees = await search_employees(query, limit=10)
+    logger.info(f"✅ Search completed: found {len(employees)} results for '{query}'")
+    return format_multiple_results(employees, query)
+
+
+async def handle_asset_search(message: Message, query: str, redis_client):
     """
     Main handler for asset search queries.
     Called when user sends WS-* or text query.
+    
+    Rendered responses are shared across replicas via the Redis search cache;
+    concurrent identical queries collapse into one DB call.
     """
     user_id = message.from_user.id
     username = message.from_user.username or "Unknown"
@@ -177,13 +203,14 @@ async def handle_asset_search(message: Message, query: str):
     logger.info(f"🔍 Asset search started: user={username} ({user_id}), query='{query}'")
     
     try:
-        # Search in database
-        employees = await search_employees(query, limit=10)
-        
-        logger.info(f"✅ Search completed: found {len(employees)} results for '{query}'")
-        
-        # Format and send response
-        response = format_multiple_results(employees, query)
+        # Search (cached, singleflight) and send response
+        start = time.perf_counter()
+        response = await search_cache.get_or_compute(
+            redis_client,
+            normalize_search_key(query),
+            lambda: render_search(query)
+        )
+        perf.record(STAGE_SEARCH, time.perf_counter() - start)
         await message.reply(response, parse_mode="HTML")
         
         logger.info(f"📤 Response sent to {username}: {len(response)} chars")
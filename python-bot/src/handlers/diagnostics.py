@@ -11,6 +11,9 @@ from datetime import datetime, timedelta
 from aiogram.types import Message
 from sqlalchemy import select, func
 from src.core.database import async_session, TelegramUser, Employee
+from src.core.user_cache import CachedUser, user_cache
+from src.core.search_cache import search_cache
+from src.core.perf import perf, PERF_WINDOW_MINUTES
 
 logger = logging.getLogger(__name__)
 
@@ -77,7 +80,7 @@ def format_uptime(seconds: float) -> str:
     return " ".join(parts) if parts else "<1m"
 
 
-async def handle_test_command(message: Message, user: TelegramUser, redis_client):
+async def handle_test_command(message: Message, user: CachedUser, redis_client):
     """
     Handle /test command - show system diagnostics.
     """
@@ -149,3 +152,62 @@ async def handle_test_command(message: Message, user: TelegramUser, redis_client
             parse_mode="HTML"
         )
 
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+
+def format_hit_ratio(hits: int, misses: int) -> str:
+    total = hits + misses
+    if not total:
+        return "n/a"
+    return f"{hits / total:.0%} ({hits}/{total})"
+
+
+async def handle_perf_command(message: Message, queue_depths: dict):
+    """
+    Handle /perf [minutes] - latency percentiles, queue depths, cache hit ratios.
+    """
+    args = message.text.split()
+    try:
+        minutes = float(args[1]) if len(args) > 1 else PERF_WINDOW_MINUTES
+        if minutes <= 0:
+            raise ValueError
+    except ValueError:
+        await message.reply("Usage: /perf [minutes]")
+        return
+    
+    logger.info(f"📊 /perf command from {message.from_user.username} ({message.from_user.id})")
+    
+    response_lines = [
+        f"📊 <b>Performance (last {minutes:g} min)</b>",
+        "════════════════════════════",
+        "⏱ <b>Latency</b> (p50 / p95 / p99)",
+    ]
+    for stage in perf.stages:
+        summary = perf.summary(stage, minutes)
+        if summary is None:
+            response_lines.append(f"   • {stage}: no samples")
+            continue
+        response_lines.append(
+            f"   • {stage}: {format_ms(summary['p50'])} / {format_ms(summary['p95'])} / "
+            f"{format_ms(summary['p99'])} (n={summary['count']}, max {format_ms(summary['max'])})"
+        )
+    
+    response_lines.append("")
+    response_lines.append("📥 <b>Queues</b>")
+    for name, depth in queue_depths.items():
+        response_lines.append(f"   • {html.escape(name)}: {depth}")
+    
+    response_lines.append("")
+    response_lines.append("🗄 <b>Cache hit ratio</b>")
+    response_lines.append(f"   • RBAC users: {format_hit_ratio(user_cache.hits, user_cache.misses)}")
+    response_lines.append(f"   • Search: {format_hit_ratio(search_cache.hits, search_cache.misses)}")
+    
+    response_lines.append("")
+    response_lines.append("════════════════════════════")
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    response_lines.append(f"⏰ <i>Checked at: {timestamp}</i>")
+    
+    await message.reply("\n".join(response_lines), parse_mode="HTML")
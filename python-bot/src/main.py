@@ -1,19 +1,45 @@
 import asyncio
+import html
 import logging
 import os
 import json
+import time
 import redis.asyncio as redis
 from aiogram import Bot, Dispatcher, F
 from aiogram.filters import Command
 from aiogram.types import Message
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Core imports
-from src.core.database import async_session, TelegramTopic, UserRole, TelegramUser, Employee
+from src.core.metrics import (
+    UpdateMetricsMiddleware, HandlerMetricsMiddleware, TimedMiddleware,
+    instrument_engine, register_gauge, start_metrics_server, observe_alert_sent, ALERTS
+)
+from src.core.database import engine, async_session, TelegramTopic, TelegramTopicDestination, UserRole, TelegramUser, Employee
 from src.core.middlewares import RoleMiddleware
+from src.core.update_executor import update_executor
+from src.core.user_cache import CachedUser, username_flusher, handle_user_event
+from src.core.prefilter import WS_PATTERN, PHONE_PATTERN
+from src.core.employee_index import employee_index, EMPLOYEES_UPDATE_EVENT
+from src.core.search_cache import search_cache
+from src.core.outbound import outbound, send_priority, PRIORITY_ALERT
+from src.core.perf import perf, STAGE_ALERT
+from src.core.tracing import tracer, span, record_span
+from src.core.alert_coalescer import alert_coalescer
+from src.core.alert_envelope import decode_alert
+from src.core.alert_dedup import alert_dedup
+from src.core.alert_rules import alert_router, ALERT_RULES_UPDATE_EVENT, MONITORING_UPDATE_EVENT
+from src.core.alert_stream import alert_stream, ALERT_TRANSPORT, ALERT_MAX_IN_FLIGHT
+from src.core.webhook import WebhookServer, BOT_MODE, WEBHOOK_SECRET
+from src.core.sharding import (
+    ShardRouter, ShardWorker, BOT_ROLE, SHARD_COUNT, SHARD_INDEX,
+    handles_updates, receives_updates, consumes_alerts
+)
 from src.core.topic_filter import require_topic, is_in_topic
+from src.core.topic_registry import topic_registry, TOPICS_EVENT_CHANNEL, TOPICS_UPDATE_EVENT
 from src.handlers.asset_search import handle_asset_search
-from src.handlers.diagnostics import handle_test_command, set_bot_start_time
+from src.handlers.diagnostics import handle_test_command, handle_perf_command, set_bot_start_time
 
 # Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -23,27 +49,47 @@ logger = logging.getLogger(__name__)
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+# Update types requested from Telegram: "auto" = only types with registered handlers,
+# comma-separated list (e.g. "message,callback_query"), or empty for Telegram's default
+BOT_ALLOWED_UPDATES = os.getenv("BOT_ALLOWED_UPDATES", "auto").strip()
 
 # Initialize Bot
 bot = Bot(token=BOT_TOKEN)
 dp = Dispatcher()
 
+# All outgoing sends go through the rate-limited scheduler
+bot.session.middleware(outbound)
+
 # Redis
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 
+# Set in main() when BOT_MODE=webhook (queue depth for /perf)
+webhook_server = None
+
 # Register Middleware
-dp.message.middleware(RoleMiddleware())
+dp.update.outer_middleware(UpdateMetricsMiddleware())
+dp.message.middleware(TimedMiddleware("role", RoleMiddleware()))
+dp.message.middleware(HandlerMetricsMiddleware())  # Innermost: times the handler body
+if handles_updates():
+    # Per-chat ordered, globally bounded handling (ingress only forwards updates)
+    dp.update.outer_middleware(TimedMiddleware("update_executor", update_executor))
+
+# Metrics
+instrument_engine(engine)
+register_gauge("bot_outbound_queue_depth", "Sends waiting in the outbound scheduler", lambda: outbound.depth)
+register_gauge("bot_update_executor_in_flight", "Updates being handled", lambda: update_executor.in_flight)
+register_gauge("bot_update_executor_pending", "Updates waiting or being handled", lambda: update_executor.pending)
+register_gauge("bot_alerts_in_flight", "Alerts being delivered", lambda: len(_alert_tasks))
 
 # --- Topic Helper ---
-async def get_topic_id(session, topic_name):
-    result = await session.execute(select(TelegramTopic).where(TelegramTopic.name == topic_name))
-    topic = result.scalar_one_or_none()
-    return topic.thread_id if topic else None
+async def get_topic_id(topic_name):
+    """Resolve topic name to thread_id via the in-memory topic registry."""
+    return await topic_registry.get_thread_id(topic_name)
 
 # --- Handlers ---
 
 @dp.message(Command("start"))
-async def cmd_start(message: Message, user: TelegramUser):
+async def cmd_start(message: Message, user: CachedUser):
     """Welcome message with user info"""
     await message.answer(
         f"NetAdmin v3.0 (RBAC Enabled)\n"
@@ -53,12 +99,26 @@ async def cmd_start(message: Message, user: TelegramUser):
     )
 
 @dp.message(Command("test"))
-async def cmd_test(message: Message, user: TelegramUser):
+async def cmd_test(message: Message, user: CachedUser):
     """System diagnostics command"""
     await handle_test_command(message, user, redis_client)
 
+@dp.message(Command("perf"), flags={"role": UserRole.SENIOR_ADMIN})
+async def cmd_perf(message: Message):
+    """Latency percentiles, queue depths and cache hit ratios"""
+    queue_depths = {
+        "Outbound sends": outbound.depth,
+        "Updates in flight": update_executor.in_flight,
+        "Updates pending": update_executor.pending,
+        "Updates shed (total)": update_executor.shed,
+        "Alerts in flight": len(_alert_tasks),
+    }
+    if webhook_server is not None:
+        queue_depths["Webhook pending"] = webhook_server.pending
+    await handle_perf_command(message, queue_depths)
+
 @dp.message(Command("admin"), flags={"role": UserRole.SENIOR_ADMIN})
-async def cmd_admin(message: Message, user: TelegramUser):
+async def cmd_admin(message: Message, user: CachedUser):
     """Restricted to Senior Admin+"""
     await message.answer(f"🔧 Admin Console Active.\nWelcome, {user.username} ({user.role.value}).")
 
@@ -81,15 +141,126 @@ async def cmd_set_topic(message: Message):
         result = await session.execute(stmt)
         topic = result.scalar_one_or_none()
 
-        if topic:
-            topic.thread_id = thread_id
-            await message.answer(f"✅ Topic '{topic_name}' updated to Thread ID: {thread_id}")
-        else:
+        if not topic:
             await message.answer(f"❌ Topic '{topic_name}' not found in DB schema.")
-        
+            return
+
+        topic.thread_id = thread_id
+        await session.commit()
+
+    await publish_topics_update()
+
+    await message.answer(f"✅ Topic '{topic_name}' updated to Thread ID: {thread_id}")
+
+async def publish_topics_update():
+    """Refresh local registry immediately, then notify other replicas."""
+    await topic_registry.reload()
+    try:
+        await redis_client.publish(TOPICS_EVENT_CHANNEL, TOPICS_UPDATE_EVENT)
+    except Exception as e:
+        logger.error(f"Redis publish error (topic invalidation): {e}")
+
+@dp.message(Command("add_destination"), flags={"role": UserRole.CTO})
+async def cmd_add_destination(message: Message):
+    """
+    Also deliver a topic's alerts to the current chat/thread (on-call chat, management group).
+    Usage: /add_destination monitoring [label]
+    """
+    args = message.text.split(maxsplit=2)
+    if len(args) < 2:
+        await message.answer("Usage: /add_destination <topic> [label]")
+        return
+
+    topic_name = args[1]
+    label = args[2] if len(args) > 2 else (message.chat.title or message.chat.full_name)
+
+    async with async_session() as session:
+        topic = await session.scalar(select(TelegramTopic.id).where(TelegramTopic.name == topic_name))
+        if not topic:
+            await message.answer(f"❌ Topic '{topic_name}' not found in DB schema.")
+            return
+
+        # ON CONFLICT DO NOTHING: already registered for this chat/thread
+        await session.execute(
+            pg_insert(TelegramTopicDestination)
+            .values(
+                topic_name=topic_name,
+                chat_id=message.chat.id,
+                thread_id=message.message_thread_id,
+                label=label,
+                is_active=True,
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+
+    await publish_topics_update()
+    await message.answer(f"✅ '{topic_name}' alerts will also be sent here ({label}).")
+
+@dp.message(Command("remove_destination"), flags={"role": UserRole.CTO})
+async def cmd_remove_destination(message: Message):
+    """
+    Stop delivering a topic's alerts to the current chat/thread.
+    Usage: /remove_destination monitoring
+    """
+    args = message.text.split()
+    if len(args) < 2:
+        await message.answer("Usage: /remove_destination <topic>")
+        return
+
+    topic_name = args[1]
+    async with async_session() as session:
+        result = await session.execute(
+            delete(TelegramTopicDestination).where(
+                TelegramTopicDestination.topic_name == topic_name,
+                TelegramTopicDestination.chat_id == message.chat.id,
+                TelegramTopicDestination.thread_id.is_(None) if message.message_thread_id is None
+                else TelegramTopicDestination.thread_id == message.message_thread_id,
+            )
+        )
         await session.commit()
 
-@dp.message(F.text.regexp(r"^[Ww][Ss][-\s]?\d+$")) # Workstation Pattern: WS-123, ws123, WS 123
+    if not result.rowcount:
+        await message.answer(f"ℹ️ This chat is not an extra destination of '{topic_name}'.")
+        return
+
+    await publish_topics_update()
+    await message.answer(f"✅ '{topic_name}' alerts will no longer be sent here.")
+
+@dp.message(Command("replay_alerts"), flags={"role": UserRole.SENIOR_ADMIN})
+async def cmd_replay_alerts(message: Message):
+    """
+    Re-deliver dead-lettered alerts (streams transport).
+    Usage: /replay_alerts [count]   (default 10; /replay_alerts list to preview)
+    """
+    if ALERT_TRANSPORT != "streams":
+        await message.answer("ℹ️ Alert replay requires ALERT_TRANSPORT=streams.")
+        return
+
+    args = message.text.split()
+    try:
+        if len(args) > 1 and args[1] == "list":
+            entries = await alert_stream.dead_letters(redis_client)
+            if not entries:
+                await message.answer("✅ Dead-letter stream is empty.")
+                return
+            lines = [f"<code>{entry_id}</code> {html.escape(fields.get('payload', '')[:80])}" for entry_id, fields in entries]
+            await message.answer("💀 Dead-lettered alerts (newest first):\n" + "\n".join(lines), parse_mode="HTML")
+            return
+
+        count = int(args[1]) if len(args) > 1 else 10
+        replayed = await alert_stream.replay(redis_client, count)
+    except ValueError:
+        await message.answer("Usage: /replay_alerts [count|list]")
+        return
+    except Exception as e:
+        logger.error(f"Alert replay failed: {e}")
+        await message.answer("❌ Replay failed, see bot logs.")
+        return
+
+    await message.answer(f"🔁 Replayed {replayed} alert(s).")
+
+@dp.message(F.text.regexp(WS_PATTERN)) # Workstation Pattern: WS-123, ws123, WS 123
 async def handle_workstation_query(message: Message):
     """Handle workstation queries like WS-101 - ONLY in #assets topic"""
     # Topic isolation: Only allow in assets topic
@@ -99,9 +270,9 @@ async def handle_workstation_query(message: Message):
     
     query = message.text.strip()
     logger.info(f"🔍 Workstation query from {message.from_user.username} ({message.from_user.id}): '{query}'")
-    await handle_asset_search(message, query)
+    await handle_asset_search(message, query, redis_client)
 
-@dp.message(F.text.regexp(r"^\d{3,}$")) # Phone Pattern: 1234 or longer
+@dp.message(F.text.regexp(PHONE_PATTERN)) # Phone Pattern: 1234 or longer
 async def handle_phone_query(message: Message):
     """Handle phone number queries - ONLY in #assets topic"""
     # Topic isolation: Only allow in assets topic
@@ -111,7 +282,7 @@ async def handle_phone_query(message: Message):
     
     query = message.text.strip()
     logger.info(f"📞 Phone query from {message.from_user.username} ({message.from_user.id}): '{query}'")
-    await handle_asset_search(message, query)
+    await handle_asset_search(message, query, redis_client)
 
 @dp.message(Command("search"))
 async def cmd_search(message: Message):
@@ -128,7 +299,7 @@ async def cmd_search(message: Message):
     
     query = args[1].strip()
     logger.info(f"🔎 Search command from {message.from_user.username}: '{query}'")
-    await handle_asset_search(message, query)
+    await handle_asset_search(message, query, redis_client)
 
 @dp.message(Command("cookie"))
 async def cmd_cookie(message: Message):
@@ -155,7 +326,7 @@ async def cmd_cookie(message: Message):
 async def handle_unhandled_message(message: Message):
     """Catch-all handler for debugging unhandled messages"""
     text = message.text or "[non-text message]"
-    logger.info(f"❓ Unhandled message from {message.from_user.username} ({message.from_user.id}): '{text}' (type: {message.content_type})")
+    logger.debug(f"❓ Unhandled message from {message.from_user.username} ({message.from_user.id}): '{text}' (type: {message.content_type})")
     
     # Optionally reply with help
     if message.chat.type == "private":
@@ -177,6 +348,40 @@ async def handle_unhandled_message(message: Message):
 REDIS_RECONNECT_BASE_DELAY = 1  # seconds
 REDIS_RECONNECT_MAX_DELAY = 60  # seconds
 REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds
+# Per-destination alert delivery budget (includes flood-control waits in the scheduler)
+ALERT_DESTINATION_TIMEOUT = float(os.getenv("ALERT_DESTINATION_TIMEOUT", 60))
+# On shutdown, alerts being delivered get this long to finish before they are cancelled
+ALERT_DRAIN_TIMEOUT = float(os.getenv("ALERT_DRAIN_TIMEOUT", 10))
+
+# Alerts are delivered in background tasks so a slow send never stalls the listener
+_alert_slots = asyncio.Semaphore(ALERT_MAX_IN_FLIGHT)
+_alert_tasks = set()
+
+
+async def dispatch_alert(data: str):
+    """Start alert delivery in the background (waits only if ALERT_MAX_IN_FLIGHT is reached)."""
+    received_at = time.monotonic()
+    await _alert_slots.acquire()
+
+    async def run():
+        try:
+            await process_alert(data, received_at)
+        finally:
+            _alert_slots.release()
+
+    task = asyncio.create_task(run())
+    _alert_tasks.add(task)
+    task.add_done_callback(_alert_tasks.discard)
+
+
+async def process_streamed_alert(data: str) -> bool:
+    """process_alert for the streams consumer (its own task), tracked like pub/sub deliveries."""
+    task = asyncio.current_task()
+    _alert_tasks.add(task)
+    try:
+        return await process_alert(data)
+    finally:
+        _alert_tasks.discard(task)
 
 
 async def redis_listener():
@@ -188,7 +393,12 @@ async def redis_listener():
     - Periodic health checks
     - Graceful error handling
     
-    Message Format: "TOPIC_NAME|MESSAGE"
+    Message Format: JSON alert envelope (core/alert_envelope.py) or legacy "TOPIC_NAME|MESSAGE"
+    With ALERT_TRANSPORT=streams, "bot_alerts" is not subscribed (see core/alert_stream.py).
+    Config events ("netadmin_events"): CONFIG_UPDATE:TOPICS reloads the topic registry,
+    USER_ROLE_UPDATE:<telegram_id> / CONFIG_UPDATE:USERS invalidate the user cache,
+    CONFIG_UPDATE:EMPLOYEES refreshes the employee index and drops cached search results,
+    CONFIG_UPDATE:ALERT_RULES / CONFIG_UPDATE:MONITORING recompile alert routing rules.
     """
     reconnect_delay = REDIS_RECONNECT_BASE_DELAY
     consecutive_failures = 0
@@ -201,9 +411,18 @@ async def redis_listener():
             logger.info("✅ Redis connection established")
             
             pubsub = redis_client.pubsub()
-            await pubsub.subscribe("bot_alerts", "netadmin_tasks")
+            # With ALERT_TRANSPORT=streams alerts are read from the stream consumer group instead
+            channels = ["netadmin_tasks", TOPICS_EVENT_CHANNEL]
+            if consumes_alerts() and ALERT_TRANSPORT != "streams":
+                channels.insert(0, "bot_alerts")
+            await pubsub.subscribe(*channels)
+            
+            logger.info(f"🎧 Redis Listener Active - Subscribed to: {', '.join(channels)}")
             
-            logger.info("🎧 Redis Listener Active - Subscribed to: bot_alerts, netadmin_tasks")
+            # Reload topics and alert rules after (re)connect - invalidations may have been missed
+            await handle_config_event(TOPICS_UPDATE_EVENT)
+            if consumes_alerts():
+                await handle_config_event(ALERT_RULES_UPDATE_EVENT)
             
             # Reset backoff on successful connection
             reconnect_delay = REDIS_RECONNECT_BASE_DELAY
@@ -232,10 +451,13 @@ async def redis_listener():
                 logger.debug(f"📨 Received message on {channel}: {data[:100] if data else 'empty'}...")
                 
                 if channel == "bot_alerts":
-                    await process_alert(data)
+                    await dispatch_alert(data)
                 
                 elif channel == "netadmin_tasks":
                     logger.info(f"📋 Task received: {data[:100] if data else 'empty'}...")
+                
+                elif channel == TOPICS_EVENT_CHANNEL:
+                    await handle_config_event(data)
         
         except asyncio.CancelledError:
             logger.info("🛑 Redis listener cancelled")
@@ -263,55 +485,212 @@ async def redis_listener():
                     pass
 
 
-async def process_alert(data: str):
-    """Process an alert message from Redis."""
+async def handle_config_event(data: str):
+    """Handle config invalidation events published on netadmin_events."""
+    if handle_user_event(data):
+        return
+
+    if data == EMPLOYEES_UPDATE_EVENT:
+        if employee_index.ready:
+            try:
+                await employee_index.refresh()
+            except Exception as e:
+                logger.error(f"❌ Employee index refresh failed: {e}")
+                employee_index.request_refresh()
+        # Drop results rendered from the pre-refresh index (admin already cleared its copy);
+        # clear() also bumps the local epoch, so searches still in flight are not written back
+        await search_cache.clear(redis_client)
+        return
+
+    if data == TOPICS_UPDATE_EVENT:
+        try:
+            await topic_registry.reload()
+        except Exception as e:
+            logger.error(f"❌ Topic registry reload failed: {e}")
+        return
+
+    if data in (ALERT_RULES_UPDATE_EVENT, MONITORING_UPDATE_EVENT):
+        try:
+            await alert_router.reload()
+        except Exception as e:
+            logger.error(f"❌ Alert rules reload failed: {e}")
+
+
+def _latency_note(alert) -> str:
+    latency = alert.latency
+    return f", latency {latency:.2f}s" if latency is not None else ""
+
+
+async def process_alert(data: str, received_at: float = None) -> bool:
+    """
+    Process an alert message from Redis.
+    
+    Returns False only if delivery failed and should be retried (streams transport);
+    malformed alerts are logged and dropped. received_at (monotonic) is when the
+    alert was read from Redis; defaults to now.
+    """
+    if received_at is None:
+        received_at = time.monotonic()
     try:
-        if not data or "|" not in data:
-            logger.warning(f"Invalid alert format (missing |): {data}")
-            return
+        alert = decode_alert(data)
+        if alert is None:
+            logger.warning(f"Invalid alert format: {data[:200] if data else data}")
+            ALERTS.labels("invalid").inc()
+            return True
         
-        topic_name, text = data.split("|", 1)
-        topic_name = topic_name.strip()
+        # Continues the agent's trace (trace_id in the envelope) when present
+        with span("alert", trace_id=alert.trace_id, topic=alert.topic, severity=alert.severity, source=alert.source) as root:
+            record_alert_transit(root, alert, received_at)
+            delivered = await route_and_deliver(alert)
+            if root is not None:
+                root.set(delivered=delivered)
         
-        logger.info(f"🚨 Alert for topic '{topic_name}': {text[:50]}...")
-        
-        async with async_session() as session:
-            thread_id = await get_topic_id(session, topic_name)
-            
-            chat_id = os.getenv("TELEGRAM_SUPERGROUP_ID")
-            
-            if not chat_id:
-                logger.error("❌ TELEGRAM_SUPERGROUP_ID not set - cannot send alert")
-                return
-            
-            # Send to Telegram with retry
-            for attempt in range(3):
-                try:
-                    await bot.send_message(
-                        chat_id=chat_id, 
-                        text=text, 
-                        message_thread_id=thread_id,
-                        parse_mode="HTML"
-                    )
-                    logger.info(f"✅ Alert sent to topic '{topic_name}' (thread_id={thread_id})")
-                    return
-                except Exception as send_error:
-                    logger.warning(f"Send attempt {attempt + 1} failed: {send_error}")
-                    if attempt < 2:
-                        await asyncio.sleep(1)
-            
-            # Fallback: Send to general chat without topic
-            try:
-                await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
-                logger.info("✅ Alert sent to general chat (fallback)")
-            except Exception as fallback_error:
-                logger.error(f"Fallback send also failed: {fallback_error}")
+        if delivered:
+            observe_alert_sent(received_at, alert.latency)
+            perf.record(STAGE_ALERT, time.monotonic() - received_at)
+        return delivered
     
     except Exception as e:
+        ALERTS.labels("failed").inc()
         logger.error(f"❌ Alert processing error: {e}", exc_info=True)
+        return False
+
+
+def record_alert_transit(root, alert, received_at: float) -> None:
+    """Spans for the time before processing: agent, Redis transport, in-bot backlog."""
+    if root is None:
+        return
+    now_ns = time.time_ns()
+    received_ns = now_ns - int((time.monotonic() - received_at) * 1e9)
+    # The root span covers the whole path, from the event to the last send
+    root.start_ns = min(root.start_ns, received_ns, *(
+        int(t * 1e9) for t in (alert.ts, alert.published_ts) if t is not None
+    ))
+    if alert.ts is not None and alert.published_ts is not None:
+        record_span("alert.agent", int(alert.ts * 1e9), int(alert.published_ts * 1e9))
+    if alert.published_ts is not None:
+        record_span("alert.transport", int(alert.published_ts * 1e9), received_ns, transport=ALERT_TRANSPORT)
+    record_span("alert.receive", received_ns, now_ns)
+
+
+async def route_and_deliver(alert) -> bool:
+    """Routing rules, dedup and delivery of a decoded alert (see process_alert)."""
+    topic_name, text = alert.topic, alert.text
+    
+    # Routing rules: target topics, drop, throttle
+    with span("alert.route") as route_span:
+        await alert_router.ensure_loaded()
+        decision = alert_router.route(alert)
+        allowed = await alert_router.allow(redis_client, alert, decision)
+        if route_span is not None:
+            route_span.set(action=decision.action, rule_id=decision.rule_id, topics=",".join(decision.topics))
+    if not allowed:
+        logger.debug(f"🧭 Alert {decision.action} by rule #{decision.rule_id} for topic '{topic_name}': {text[:50]}...")
+        ALERTS.labels("dropped" if decision.action == "drop" else "throttled").inc()
+        return True
+    
+    # Repeats of the same alert (other agent, agent restart) within the dedup window
+    with span("alert.dedup"):
+        duplicate = await alert_dedup.is_duplicate(redis_client, alert)
+    if duplicate:
+        logger.debug(f"🔇 Duplicate alert suppressed for topic '{topic_name}': {text[:50]}...")
+        ALERTS.labels("duplicate").inc()
+        return True
+    
+    logger.info(f"🚨 Alert [{alert.severity}] for topic '{topic_name}': {text[:50]}...")
+    
+    delivered = await deliver_alert(alert, decision.topics)
+    if delivered:
+        ALERTS.labels("delivered").inc()
+    else:
+        ALERTS.labels("failed").inc()
+        # Let the retry through the dedup window
+        await alert_dedup.release(redis_client, alert)
+    return delivered
+
+
+async def deliver_alert(alert, topics) -> bool:
+    """
+    Fan one decoded alert out to every destination of the routed topics, in parallel.
+    
+    Each destination is isolated (own timeout, own fallback); the alert counts as
+    delivered if at least one destination got it.
+    """
+    targets = {}
+    with span("alert.topic_lookup", topics=",".join(topics)):
+        for topic_name in topics:
+            for dest in await topic_registry.get_destinations(topic_name):
+                targets.setdefault(dest.key, (topic_name, dest))
+    if not targets:
+        logger.error(f"❌ No destinations for topics {list(topics)} (TELEGRAM_SUPERGROUP_ID not set?)")
+        return False
+    
+    # Alerts jump ahead of interactive replies; flood control (429) is retried by the scheduler
+    send_priority.set(PRIORITY_ALERT)
+    
+    results = await asyncio.gather(*(
+        deliver_to_destination(alert, topic_name, dest) for topic_name, dest in targets.values()
+    ))
+    delivered = sum(results)
+    if delivered < len(targets):
+        logger.warning(f"⚠️ Alert for '{alert.topic}' delivered to {delivered}/{len(targets)} destinations")
+    return delivered > 0
+
+
+async def deliver_to_destination(alert, topic_name, dest) -> bool:
+    try:
+        with span("alert.deliver", topic=topic_name, chat_id=dest.chat_id, thread_id=dest.thread_id):
+            return await asyncio.wait_for(send_to_destination(alert, topic_name, dest), ALERT_DESTINATION_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"❌ Alert to {dest.label or dest.chat_id} timed out after {ALERT_DESTINATION_TIMEOUT}s")
+    except Exception as e:
+        logger.error(f"❌ Alert to {dest.label or dest.chat_id} failed: {e}")
+    return False
+
+
+async def send_to_destination(alert, topic_name, dest) -> bool:
+    """Send to one destination of topic_name (its thread, or the main chat as fallback)."""
+    text = alert.text
+    
+    # During a storm the alert goes into this destination's digest message instead
+    absorbed = alert_coalescer.offer(f"{topic_name}@{dest.key}", text, bot, dest.chat_id, dest.thread_id, title=topic_name)
+    if absorbed is not None:
+        if ALERT_TRANSPORT == "streams":
+            # The entry is ACKed only once the digest showing it has been sent
+            return await absorbed
+        return True  # Pub/sub has no redelivery: don't hold a delivery slot for the digest
+    
+    try:
+        await bot.send_message(
+            chat_id=dest.chat_id, 
+            text=text, 
+            message_thread_id=dest.thread_id,
+            parse_mode="HTML"
+        )
+        logger.info(f"✅ Alert sent to '{topic_name}' → {dest.label or dest.chat_id} (thread_id={dest.thread_id}){_latency_note(alert)}")
+        return True
+    except Exception as send_error:
+        if dest.thread_id is None:
+            raise
+        logger.warning(f"Send to '{topic_name}' → {dest.label or dest.chat_id} failed: {send_error}")
+    
+    # Fallback: Send to the main chat without topic
+    await bot.send_message(chat_id=dest.chat_id, text=text, parse_mode="HTML")
+    logger.info(f"✅ Alert sent to {dest.label or dest.chat_id} main chat (fallback){_latency_note(alert)}")
+    return True
+
+def get_allowed_updates():
+    """Resolve BOT_ALLOWED_UPDATES into the allowed_updates list for polling."""
+    if not BOT_ALLOWED_UPDATES:
+        return None
+    if BOT_ALLOWED_UPDATES == "auto":
+        return dp.resolve_used_update_types()
+    return [u.strip() for u in BOT_ALLOWED_UPDATES.split(",") if u.strip()]
+
 
 async def main():
     """Main entry point."""
+    global webhook_server
     # Set bot startup time for uptime calculation
     set_bot_start_time()
     
@@ -327,17 +706,80 @@ async def main():
     
     redis_task.add_done_callback(handle_redis_exception)
     
+    logger.info(
+        f"🤖 Role: {BOT_ROLE} (shard {SHARD_INDEX}/{SHARD_COUNT}), "
+        f"alerts: {'yes' if consumes_alerts() else 'no'}"
+    )
+    background_tasks = []
+    
+    if handles_updates():
+        # Start write-behind username flusher
+        background_tasks.append(asyncio.create_task(username_flusher.run()))
+        
+        # Build and maintain the employee search index
+        background_tasks.append(asyncio.create_task(employee_index.run()))
+    
+    # Start outbound send workers
+    outbound.start()
+    start_metrics_server()
+    
+    # Batched span export (TRACE_EXPORT=file|otlp)
+    if tracer.enabled:
+        background_tasks.append(asyncio.create_task(tracer.run()))
+    
+    if consumes_alerts():
+        # Periodic report of suppressed duplicate alerts
+        background_tasks.append(asyncio.create_task(alert_dedup.report_loop()))
+        
+        # Durable alert transport: consumer group reader + reclaim of crashed consumers' entries
+        if ALERT_TRANSPORT == "streams":
+            background_tasks.append(asyncio.create_task(alert_stream.run(redis_client, process_streamed_alert)))
+            background_tasks.append(asyncio.create_task(alert_stream.reclaim_loop(redis_client, process_streamed_alert)))
+    
     try:
+        if not receives_updates():
+            # Worker: handle this shard's updates pushed by the ingress process
+            await ShardWorker(bot, dp, redis_client, window=update_executor.max_pending).run()
+            return
+        
+        if BOT_ROLE == "ingress":
+            # Forward every update to its shard instead of handling it here
+            dp.update.outer_middleware(ShardRouter(redis_client))
+        
         # Start Bot
-        await dp.start_polling(bot)
+        allowed_updates = get_allowed_updates()
+        if BOT_MODE == "webhook":
+            if not WEBHOOK_SECRET:
+                logger.warning("⚠️ WEBHOOK_SECRET not set - webhook requests are not authenticated")
+            logger.info(f"📥 Webhook allowed_updates: {allowed_updates or 'Telegram default'}")
+            webhook_server = WebhookServer(bot, dp)
+            await webhook_server.run(allowed_updates)
+        else:
+            # A webhook left registered by webhook mode makes getUpdates fail
+            await bot.delete_webhook()
+            logger.info(f"📥 Polling allowed_updates: {allowed_updates or 'Telegram default'}")
+            # Each update runs as its own task; the update executor bounds and orders them
+            await dp.start_polling(bot, allowed_updates=allowed_updates, handle_as_tasks=True)
     finally:
         # Cleanup on shutdown
         logger.info("Shutting down...")
-        redis_task.cancel()
-        try:
-            await redis_task
-        except asyncio.CancelledError:
-            pass
+        for task in (redis_task, *background_tasks):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Alert readers are stopped; let deliveries already started by either transport
+        # finish (the outbound scheduler is still running), streamed ones up to their XACK
+        deliveries = _alert_tasks.union(alert_stream.tasks)
+        if deliveries:
+            logger.info(f"⏳ Waiting up to {ALERT_DRAIN_TIMEOUT:.0f}s for {len(deliveries)} alert deliveries")
+            await asyncio.wait(deliveries, timeout=ALERT_DRAIN_TIMEOUT)
+        for task in deliveries:
+            task.cancel()
+        await alert_coalescer.close()
+        await outbound.stop()
+        await tracer.flush()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.core.alert_coalescer import AlertCoalescer
+
+
+class FakeBot:
+    def __init__(self, fail: int = 0):
+        self.fail = fail
+        self.sent = []
+        self.edited = []
+
+    async def send_message(self, chat_id, text, message_thread_id=None, parse_mode=None):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("send failed")
+        self.sent.append(text)
+        return SimpleNamespace(message_id=1)
+
+    async def edit_message_text(self, chat_id, message_id, text, parse_mode=None):
+        self.edited.append(text)
+
+
+def make_coalescer() -> AlertCoalescer:
+    return AlertCoalescer(window=0.2, threshold=2, edit_interval=0.05)
+
+
+def test_below_threshold_delivers_individually():
+    async def run():
+        coalescer = make_coalescer()
+        bot = FakeBot()
+        return [coalescer.offer("net@1:0", f"alert {i}", bot, 1, None) for i in range(2)]
+
+    assert asyncio.run(run()) == [None, None]
+
+
+def test_absorbed_alert_resolves_once_digest_is_sent():
+    async def run():
+        coalescer = make_coalescer()
+        bot = FakeBot()
+        offers = [coalescer.offer("net@1:0", f"alert {i}", bot, 1, None) for i in range(4)]
+        absorbed = [o for o in offers if o is not None]
+        assert not any(w.done() for w in absorbed)  # nothing sent yet
+        results = await asyncio.gather(*absorbed)
+        await coalescer.close()
+        return results, bot
+
+    results, bot = asyncio.run(run())
+    assert results == [True, True]
+    assert len(bot.sent) == 1
+
+
+def test_absorbed_alert_fails_when_digest_never_gets_out():
+    async def run():
+        coalescer = make_coalescer()
+        bot = FakeBot(fail=1000)
+        offers = [coalescer.offer("net@1:0", f"alert {i}", bot, 1, None) for i in range(3)]
+        return await offers[-1]
+
+    assert asyncio.run(run()) is False
+
+
+def test_failed_send_is_retried_before_resolving():
+    async def run():
+        coalescer = make_coalescer()
+        bot = FakeBot(fail=1)
+        offers = [coalescer.offer("net@1:0", f"alert {i}", bot, 1, None) for i in range(3)]
+        result = await offers[-1]
+        await coalescer.close()
+        return result, bot
+
+    result, bot = asyncio.run(run())
+    assert result is True
+    assert len(bot.sent) == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.core.alert_dedup import AlertDeduplicator, alert_condition, alert_fingerprint
+from src.core.alert_envelope import Alert
+
+
+class FakeRedis:
+    """The SET/DEL subset the deduplicator uses (expiry is not simulated)."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, ex=None, get=False):
+        previous = self.data.get(key)
+        if nx and previous is not None:
+            return None
+        self.data[key] = value
+        return previous if get else True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class BrokenRedis:
+    async def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+
+def monitoring(status):
+    return Alert(topic="monitoring", text=f"Host 42 is {status}", fingerprint=f"monitoring:42:{status}")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fingerprint_ignores_timestamps_case_and_spacing():
+    a = Alert(topic="mail", text="Queue stuck at 2024-05-01 12:00:03  retry 10:15")
+    b = Alert(topic="mail", text="queue STUCK at 2024-05-02T08:30:00.5 retry   11:45")
+    assert alert_fingerprint(a) == alert_fingerprint(b)
+
+
+def test_fingerprint_depends_on_topic_and_text():
+    assert alert_fingerprint(Alert(topic="a", text="x")) != alert_fingerprint(Alert(topic="b", text="x"))
+    assert alert_fingerprint(Alert(topic="a", text="disk full")) != alert_fingerprint(Alert(topic="a", text="disk ok"))
+
+
+def test_explicit_fingerprint_wins_over_text():
+    a = Alert(topic="monitoring", text="one wording", fingerprint="monitoring:42:DOWN")
+    b = Alert(topic="monitoring", text="another wording", fingerprint="monitoring:42:DOWN")
+    assert alert_fingerprint(a) == alert_fingerprint(b)
+
+
+@pytest.mark.parametrize("fingerprint, condition", [
+    ("monitoring:42:DOWN", "monitoring:42"),
+    ("mail:queue:WARN", "mail:queue"),
+    ("nocolon", None),
+    ("monitoring:42:", None),
+    (None, None),
+])
+def test_alert_condition(fingerprint, condition):
+    assert alert_condition(Alert(topic="t", text="x", fingerprint=fingerprint)) == condition
+
+
+def test_repeats_are_suppressed():
+    dedup, redis = AlertDeduplicator(ttl=300), FakeRedis()
+    assert not run(dedup.is_duplicate(redis, monitoring("DOWN")))
+    assert run(dedup.is_duplicate(redis, monitoring("DOWN")))
+    assert dedup.suppressed_total == 1
+    assert dedup.suppressed["monitoring"] == 1
+
+
+def test_flapping_host_gets_every_state_change():
+    dedup, redis = AlertDeduplicator(ttl=300), FakeRedis()
+    results = [run(dedup.is_duplicate(redis, monitoring(status))) for status in ("DOWN", "UP", "DOWN", "DOWN", "UP")]
+    assert results == [False, False, False, True, False]
+
+
+def test_other_conditions_are_independent():
+    dedup, redis = AlertDeduplicator(ttl=300), FakeRedis()
+    other = Alert(topic="monitoring", text="Host 7 is UP", fingerprint="monitoring:7:UP")
+    assert not run(dedup.is_duplicate(redis, monitoring("DOWN")))
+    assert not run(dedup.is_duplicate(redis, other))
+    assert run(dedup.is_duplicate(redis, monitoring("DOWN")))
+
+
+def test_release_lets_the_retry_through():
+    dedup, redis = AlertDeduplicator(ttl=300), FakeRedis()
+    alert = Alert(topic="mail", text="queue stuck")
+    assert not run(dedup.is_duplicate(redis, alert))
+    run(dedup.release(redis, alert))
+    assert not run(dedup.is_duplicate(redis, alert))
+
+
+def test_fails_open_and_can_be_disabled():
+    assert not run(AlertDeduplicator(ttl=300).is_duplicate(BrokenRedis(), monitoring("DOWN")))
+    assert not run(AlertDeduplicator(ttl=0).is_duplicate(BrokenRedis(), monitoring("DOWN")))
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from src.core.alert_envelope import ENVELOPE_VERSION, SEVERITY_INFO, decode_alert
+
+
+def envelope(**fields):
+    obj = {"v": 1, "topic": "monitoring", "text": "🚨 ALERT: Host db1 is DOWN"}
+    obj.update(fields)
+    return json.dumps({k: v for k, v in obj.items() if v is not None})
+
+
+def test_legacy_pipe_string():
+    alert = decode_alert("monitoring|🚨 Host down | check it")
+    assert alert.topic == "monitoring"
+    assert alert.text == "🚨 Host down | check it"  # only the first pipe separates
+    assert alert.version == 0
+    assert alert.severity == SEVERITY_INFO
+    assert alert.ts is None and alert.latency is None
+    assert alert.fingerprint is None
+
+
+@pytest.mark.parametrize("data", [None, "", "no pipe here", "|text without topic", "  |x"])
+def test_malformed_legacy(data):
+    assert decode_alert(data) is None
+
+
+def test_full_envelope():
+    alert = decode_alert(envelope(
+        severity="CRITICAL", source="monitoring", target_id=42, ts=1700000000123,
+        fingerprint="monitoring:42:DOWN", trace_id="4BF92F3577B34DA6A3CE929D0E0E4736",
+        published_ts=1700000000125,
+    ))
+    assert alert.topic == "monitoring"
+    assert alert.text == "🚨 ALERT: Host db1 is DOWN"
+    assert alert.severity == "critical"
+    assert alert.source == "monitoring"
+    assert alert.target_id == "42"
+    assert alert.ts == pytest.approx(1700000000.123)
+    assert alert.published_ts == pytest.approx(1700000000.125)
+    assert alert.fingerprint == "monitoring:42:DOWN"
+    assert alert.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert alert.version == 1
+
+
+def test_minimal_envelope_defaults():
+    alert = decode_alert(json.dumps({"topic": " monitoring "}))
+    assert alert.topic == "monitoring"
+    assert alert.text == ""
+    assert alert.severity == SEVERITY_INFO
+    assert alert.version == 0
+    assert alert.target_id is None and alert.ts is None and alert.trace_id is None
+
+
+def test_newer_version_decodes_known_fields():
+    alert = decode_alert(envelope(v=ENVELOPE_VERSION + 1, unknown_field="x"))
+    assert alert.topic == "monitoring"
+    assert alert.version == ENVELOPE_VERSION + 1
+
+
+@pytest.mark.parametrize("data", [
+    "{not json",
+    json.dumps({"text": "no topic"}),
+    json.dumps({"topic": "  "}),
+    envelope(ts="yesterday"),
+    envelope(v="one"),
+])
+def test_malformed_envelope(data):
+    assert decode_alert(data) is None
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from src.core.alert_envelope import Alert
+from src.core.alert_rules import ACTION_DROP, ACTION_ROUTE, ACTION_THROTTLE, AlertRouter, RouteDecision
+from src.core.database import AlertRoutingRule
+
+_next_id = iter(range(1, 1000))
+
+
+def rule(**fields):
+    fields.setdefault("id", next(_next_id))
+    fields.setdefault("name", f"rule {fields['id']}")
+    return AlertRoutingRule(**fields)
+
+
+def router(*rules, groups=None):
+    r = AlertRouter()
+    r.apply(list(rules), groups or {})
+    return r
+
+
+def alert(topic="monitoring", text="Host db1 is DOWN", severity="critical", source="monitoring", target_id="42"):
+    return Alert(topic=topic, text=text, severity=severity, source=source, target_id=target_id)
+
+
+def test_no_rules_routes_to_own_topic():
+    assert router().route(alert()) == RouteDecision(ACTION_ROUTE, ("monitoring",))
+
+
+def test_first_matching_rule_wins():
+    first = rule(match_topic="monitoring", route_topics="noc")
+    second = rule(match_topic="monitoring", route_topics="other")
+    decision = router(first, second).route(alert())
+    assert decision.topics == ("noc",)
+    assert decision.rule_id == first.id
+
+
+def test_route_to_several_topics():
+    r = router(rule(match_source="monitoring", route_topics=" noc , management ,"))
+    assert r.route(alert()).topics == ("noc", "management")
+
+
+def test_route_rule_without_topics_keeps_alert_topic():
+    throttle = rule(match_topic="monitoring", action="throttle", throttle_seconds=600)
+    decision = router(throttle).route(alert())
+    assert decision == RouteDecision(ACTION_THROTTLE, ("monitoring",), throttle.id, 600)
+
+
+def test_drop_rule():
+    drop = rule(match_text=r"\btest host\b", action="DROP")
+    r = router(drop)
+    assert r.route(alert(text="Test host lab-1 is DOWN")).action == ACTION_DROP
+    assert r.route(alert(text="Host db1 is DOWN")).action == ACTION_ROUTE
+
+
+@pytest.mark.parametrize("pattern, source, matches", [
+    ("monitoring", "MONITORING", True),   # plain pattern: case-insensitive equality
+    ("monitoring", "monitoring-2", False),
+    ("mon*", "monitoring", True),
+    ("agent-?", "agent-7", True),
+    ("agent-?", "agent-17", False),
+    ("*", "", True),
+    ("mon*", None, False),
+])
+def test_source_globs(pattern, source, matches):
+    r = router(rule(match_source=pattern, route_topics="matched"))
+    assert (r.route(alert(source=source)).topics == ("matched",)) is matches
+
+
+def test_severity_buckets():
+    critical_only = rule(match_severity="critical, warning", route_topics="pager")
+    any_severity = rule(match_topic="monitoring", route_topics="log")
+    r = router(critical_only, any_severity)
+    assert r.route(alert(severity="critical")).topics == ("pager",)
+    assert r.route(alert(severity="warning")).topics == ("pager",)
+    assert r.route(alert(severity="info")).topics == ("log",)
+    # Unknown severities only see rules without a severity condition
+    assert r.route(alert(severity="debug")).topics == ("log",)
+
+
+def test_severity_bucket_keeps_priority_order():
+    any_first = rule(route_topics="first")
+    critical = rule(match_severity="critical", route_topics="second")
+    assert router(any_first, critical).route(alert(severity="critical")).topics == ("first",)
+
+
+def test_group_match_uses_target_group_map():
+    r = router(rule(match_group="servers-*", route_topics="servers"), groups={"42": "Servers-DC1"})
+    assert r.route(alert(target_id="42")).topics == ("servers",)
+    assert r.route(alert(target_id="7")).topics == ("monitoring",)   # no group
+    assert r.route(alert(target_id=None)).topics == ("monitoring",)
+
+
+def test_all_conditions_must_match():
+    r = router(rule(match_topic="monitoring", match_source="agent", route_topics="x"))
+    assert r.route(alert(source="monitoring")).topics == ("monitoring",)
+    assert r.route(alert(topic="mail", source="agent")).topics == ("mail",)
+    assert r.route(alert(source="agent")).topics == ("x",)
+
+
+def test_invalid_rules_are_skipped():
+    r = router(
+        rule(match_text="(unclosed", route_topics="bad-regex"),
+        rule(action="escalate", route_topics="bad-action"),
+        rule(action="throttle"),
+        rule(route_topics="good"),
+    )
+    assert r.rule_count == 1
+    assert r.route(alert()).topics == ("good",)
+
+
+def test_concurrent_cold_start_loads_once(monkeypatch):
+    async def run():
+        r = AlertRouter()
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            r.apply([], {})
+
+        monkeypatch.setattr(r, "_load", load)
+        await asyncio.gather(*(r.ensure_loaded() for _ in range(20)))
+        return len(loads)
+
+    assert asyncio.run(run()) == 1
+
+
+def test_failed_load_is_not_retried_by_queued_alerts(monkeypatch):
+    async def run():
+        r = AlertRouter()
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(r, "_load", load)
+        await asyncio.gather(*(r.ensure_loaded() for _ in range(20)))
+        return len(loads), r.route(alert())
+
+    count, decision = asyncio.run(run())
+    assert count == 1
+    assert decision == RouteDecision(ACTION_ROUTE, ("monitoring",))
@@ -0,0 +1,31 @@
+import pytest
+
+from src.handlers.asset_search import is_phone_query, is_workstation_query, normalize_search_key
+
+
+@pytest.mark.parametrize("query", ["WS-101", "ws101", "ws 101", " WS0101 "])
+def test_workstation_queries(query):
+    assert is_workstation_query(query)
+
+
+@pytest.mark.parametrize("query", ["ws101abc", "WS-", "PC-101", "hello", "101"])
+def test_not_workstation_queries(query):
+    # Must agree with parse_workstation, or index and DB search would differ
+    assert not is_workstation_query(query)
+
+
+def test_phone_queries():
+    assert is_phone_query("123")
+    assert is_phone_query("8 (916) 123-45-67")
+    assert not is_phone_query("12")
+
+
+@pytest.mark.parametrize("query", ["WS-101", "ws 101", "ws0101"])
+def test_workstation_spellings_share_a_cache_key(query):
+    assert normalize_search_key(query) == "ws:WS101"
+
+
+def test_cache_keys():
+    assert normalize_search_key("123-45") == "phone:12345"
+    assert normalize_search_key("  Ivan   PETROV ") == "text:ivan petrov"
+    assert normalize_search_key("ws101abc") == "text:ws101abc"
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.core import outbound
+from src.core.outbound import OutboundScheduler, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(outbound.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_drains(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.try_acquire()
+    bucket.try_acquire()
+    clock.now += 0.25
+    assert bucket.try_acquire() == pytest.approx(0.25)  # half a token refilled
+    clock.now += 0.25
+    assert bucket.try_acquire() == 0
+
+
+def test_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+    clock.now += 3600
+    assert [bucket.try_acquire() for _ in range(2)] == [0, 0]
+    assert bucket.try_acquire() > 0
+    assert not bucket.idle
+    clock.now += 1
+    assert bucket.idle
+
+
+def test_bucket_block(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    bucket.block(5)
+    assert bucket.try_acquire() == pytest.approx(5)
+    clock.now += 5
+    assert bucket.try_acquire() == pytest.approx(1.0)  # emptied by the block
+    clock.now += 1
+    assert bucket.try_acquire() == 0
+
+
+def test_retry_after_exhausted_for_caller_that_gave_up(monkeypatch, caplog):
+    monkeypatch.setattr(outbound, "OUTBOUND_MAX_RETRIES", 0)
+    method = SendMessage(chat_id=123, text="alert")
+
+    async def scenario():
+        scheduler = OutboundScheduler(workers=1)
+        scheduler.start()
+        attempt = asyncio.Event()
+
+        async def make_request(bot, method):
+            attempt.set()
+            await asyncio.sleep(0.05)
+            raise TelegramRetryAfter(method=method, message="Flood control", retry_after=1)
+
+        caller = asyncio.create_task(scheduler(make_request, None, method))
+        await attempt.wait()
+        caller.cancel()  # e.g. ALERT_DESTINATION_TIMEOUT expired
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        return scheduler
+
+    with caplog.at_level(logging.ERROR, logger=outbound.logger.name):
+        scheduler = asyncio.run(scenario())
+    assert scheduler.failed == 1
+    assert "worker" not in caplog.text
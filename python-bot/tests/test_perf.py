@@ -0,0 +1,88 @@
+import pytest
+
+from src.core import perf as perf_module
+from src.core.perf import LatencyRing, PerfRecorder, STAGE_ALERT, STAGE_SEARCH, percentile
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(perf_module.time, "monotonic", clock)
+    return clock
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+
+
+def test_percentile_small_lists():
+    assert percentile([0.2], 50) == 0.2
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([0.1, 0.2], 0) == 0.1  # rank never drops below 1
+    assert percentile([0.1, 0.2], 50) == 0.1
+    assert percentile([0.1, 0.2], 51) == 0.2
+
+
+def test_ring_keeps_only_recorded_samples(clock):
+    ring = LatencyRing(size=4)
+    assert ring.window(60) == []
+
+    ring.record(0.5)
+    ring.record(1.5)
+    assert sorted(ring.window(60)) == [0.5, 1.5]
+    assert ring.count == 2
+
+
+def test_ring_wraps_around(clock):
+    ring = LatencyRing(size=3)
+    for value in (1.0, 2.0, 3.0, 4.0, 5.0):
+        ring.record(value)
+
+    assert sorted(ring.window(60)) == [3.0, 4.0, 5.0]  # oldest overwritten
+    assert ring.count == 5
+
+
+def test_ring_window_drops_old_samples(clock):
+    ring = LatencyRing(size=8)
+    ring.record(1.0)
+    clock.now += 30
+    ring.record(2.0)
+    clock.now += 30
+    ring.record(3.0)
+
+    assert sorted(ring.window(60)) == [1.0, 2.0, 3.0]
+    assert sorted(ring.window(45)) == [2.0, 3.0]
+    assert ring.window(10) == [3.0]
+    clock.now += 120
+    assert ring.window(60) == []
+
+
+def test_summary_none_without_samples(clock):
+    recorder = PerfRecorder(size=16)
+    assert recorder.summary(STAGE_SEARCH) is None
+
+
+def test_summary_per_stage_and_window(clock):
+    recorder = PerfRecorder(size=16)
+    recorder.record(STAGE_SEARCH, 9.0)
+    clock.now += 10 * 60
+    for value in (0.4, 0.1, 0.3, 0.2):
+        recorder.record(STAGE_SEARCH, value)
+    recorder.record(STAGE_ALERT, 5.0)
+
+    summary = recorder.summary(STAGE_SEARCH, minutes=5)
+    assert summary == {"count": 4, "p50": 0.2, "p95": 0.4, "p99": 0.4, "max": 0.4}
+    assert recorder.summary(STAGE_SEARCH, minutes=15)["max"] == 9.0
+    assert recorder.summary(STAGE_ALERT)["count"] == 1
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from src.core import prefilter
+from src.core.topic_registry import topic_registry
+
+SUPERGROUP_ID = -1001234567890
+ASSETS_THREAD_ID = 42
+
+
+def make_message(text, chat_id=SUPERGROUP_ID, thread_id=None, from_user=True):
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=chat_id, type="supergroup"),
+        from_user=User(id=1, is_bot=False, first_name="Test") if from_user else None,
+        message_thread_id=thread_id,
+        text=text,
+    )
+
+
+@pytest.fixture(autouse=True)
+def assets_topic(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_SUPERGROUP_ID", str(SUPERGROUP_ID))
+    monkeypatch.setattr(topic_registry, "_topics", {prefilter.ASSETS_TOPIC: ASSETS_THREAD_ID})
+    monkeypatch.setattr(topic_registry, "_loaded", True)
+
+
+@pytest.mark.parametrize("text", ["/start", "/search WS-101", "/perf"])
+def test_commands_are_actionable_anywhere(text):
+    assert prefilter.is_actionable(make_message(text, chat_id=555, thread_id=None))
+
+
+@pytest.mark.parametrize("text", ["WS-101", "ws101", "WS 7", "1234", "89161234567"])
+def test_asset_queries_in_assets_topic(text):
+    assert prefilter.is_actionable(make_message(text, thread_id=ASSETS_THREAD_ID))
+
+
+@pytest.mark.parametrize("text", ["WS-101", "1234"])
+def test_asset_queries_outside_assets_topic(text):
+    assert not prefilter.is_actionable(make_message(text, thread_id=7))
+    assert not prefilter.is_actionable(make_message(text, chat_id=555))
+
+
+@pytest.mark.parametrize("text", ["hello", "WS-101 please", "12", "ws-", ""])
+def test_chatter_is_not_actionable(text):
+    assert not prefilter.is_actionable(make_message(text, thread_id=ASSETS_THREAD_ID))
+
+
+def test_message_without_sender_is_not_actionable():
+    assert not prefilter.is_actionable(make_message("/start", from_user=False))
+
+
+def test_registry_not_loaded_defers_to_handler(monkeypatch):
+    monkeypatch.setattr(topic_registry, "_loaded", False)
+    assert prefilter.is_actionable(make_message("WS-101", thread_id=7))
+
+
+def test_assets_topic_without_thread_uses_general(monkeypatch):
+    monkeypatch.setattr(topic_registry, "_topics", {})
+    assert prefilter.is_actionable(make_message("WS-101", thread_id=None))
+    assert not prefilter.is_actionable(make_message("WS-101", thread_id=ASSETS_THREAD_ID))
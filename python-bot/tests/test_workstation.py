@@ -0,0 +1,35 @@
+import ast
+import re
+from pathlib import Path
+
+import pytest
+
+from src.core.workstation import WS_KEY_RE, parse_workstation
+
+ADMIN_PANEL_MAIN = Path(__file__).resolve().parents[2] / "admin-panel" / "src" / "main.py"
+
+
+@pytest.mark.parametrize("value, key", [
+    ("WS-101", ("WS", 101)),
+    ("ws 101", ("WS", 101)),
+    ("WS0101", ("WS", 101)),
+    ("  ws-7  ", ("WS", 7)),
+    ("pws-12", ("PWS", 12)),
+    ("NIK 3", ("NIK", 3)),
+])
+def test_parse_workstation(value, key):
+    assert parse_workstation(value) == key
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "WS", "101", "WS-", "WS--101", "WS-101a", "ws101abc", "WS 1 2", "WS-1234567890",
+])
+def test_not_a_workstation(value):
+    assert parse_workstation(value) is None
+
+
+def test_admin_panel_uses_the_same_key_pattern():
+    # The admin panel writes ws_prefix/ws_number with its own copy of the pattern
+    match = re.search(r'^WS_KEY_RE = re\.compile\((r".*")\)$', ADMIN_PANEL_MAIN.read_text(encoding="utf-8"), re.M)
+    assert match is not None
+    assert ast.literal_eval(match.group(1)) == WS_KEY_RE.pattern
@@ -135,6 +135,19 @@ def parse_boolean(value: str):
         return False
 
 
+def parse_workstation(workstation: str):
+    """
+    Canonical workstation key (see config/migrate_ws_key.sql).
+    Returns: (prefix, number), e.g. 'ws-0101' -> ('WS', 101), or (None, None)
+    """
+    if not workstation:
+        return None, None
+    match = re.match(r'^\s*([A-Za-z]+)[-\s]?(\d{1,9})\s*$', workstation)
+    if not match:
+        return None, None
+    return match.group(1).upper(), int(match.group(2))
+
+
 def parse_ram(ram_str: str):
     """
     Parse RAM specification, remove 'GB' and normalize.
@@ -317,6 +330,9 @@ def parse_excel_data_v2(wb):
             # Parse RAM
             specs_ram = parse_ram(ram_raw)
             
+            # Canonical workstation key
+            ws_prefix, ws_number = parse_workstation(workstation)
+            
             # Parse booleans
             has_ad = bool(ad_login) or parse_boolean(ad_login)  # Has AD if login exists
             has_drweb = parse_boolean(drweb_raw)
@@ -341,6 +357,8 @@ def parse_excel_data_v2(wb):
                 "phone_type": phone_type,
                 "internal_phone": internal_phone,
                 "workstation": workstation,
+                "ws_prefix": ws_prefix,
+                "ws_number": ws_number,
                 "device_type": device_type,
                 "specs_cpu": cpu,
                 "specs_gpu": gpu,
@@ -386,6 +404,15 @@ def migrate_to_db_v2(employees, conn, mode="insert"):
     else:
         logger.warning(f"⚠️ Schema file not found: {sql_path}, assuming tables exist")
     
+    # Follow-up migrations (schema_v2.sql recreates the employees table)
+    for migration in ("migrate_ws_key.sql", "migrate_search_v3.sql"):  # search matches on the WS key
+        migration_path = Path(__file__).parent.parent / "config" / migration
+        if migration_path.exists():
+            with open(migration_path, "r", encoding='utf-8') as f:
+                cursor.execute(f.read())
+            conn.commit()
+            logger.info(f"✅ Applied {migration}")
+    
     inserted = 0
     updated = 0
     skipped = 0
@@ -418,6 +445,8 @@ def migrate_to_db_v2(employees, conn, mode="insert"):
                             phone_type = %(phone_type)s,
                             internal_phone = %(internal_phone)s,
                             workstation = %(workstation)s,
+                            ws_prefix = %(ws_prefix)s,
+                            ws_number = %(ws_number)s,
                             device_type = %(device_type)s,
                             specs_cpu = %(specs_cpu)s,
                             specs_gpu = %(specs_gpu)s,
@@ -441,14 +470,14 @@ def migrate_to_db_v2(employees, conn, mode="insert"):
                         INSERT INTO employees (
                             company, last_name, first_name, middle_name,
                             department, location, email, phone_type, internal_phone,
-                            workstation, device_type, specs_cpu, specs_gpu, specs_ram,
+                            workstation, ws_prefix, ws_number, device_type, specs_cpu, specs_gpu, specs_ram,
                             monitor, ups, has_ad, has_drweb, has_zabbix,
                             ad_login, notes, updated_at
                         )
                         VALUES (
                             %(company)s, %(last_name)s, %(first_name)s, %(middle_name)s,
                             %(department)s, %(location)s, %(email)s, %(phone_type)s, %(internal_phone)s,
-                            %(workstation)s, %(device_type)s, %(specs_cpu)s, %(specs_gpu)s, %(specs_ram)s,
+                            %(workstation)s, %(ws_prefix)s, %(ws_number)s, %(device_type)s, %(specs_cpu)s, %(specs_gpu)s, %(specs_ram)s,
                             %(monitor)s, %(ups)s, %(has_ad)s, %(has_drweb)s, %(has_zabbix)s,
                             %(ad_login)s, %(notes)s, NOW()
                         )
@@ -478,14 +507,14 @@ def migrate_to_db_v2(employees, conn, mode="insert"):
             INSERT INTO employees (
                 company, last_name, first_name, middle_name,
                 department, location, email, phone_type, internal_phone,
-                workstation, device_type, specs_cpu, specs_gpu, specs_ram,
+                workstation, ws_prefix, ws_number, device_type, specs_cpu, specs_gpu, specs_ram,
                 monitor, ups, has_ad, has_drweb, has_zabbix,
                 ad_login, notes
             )
             VALUES (
                 %(company)s, %(last_name)s, %(first_name)s, %(middle_name)s,
                 %(department)s, %(location)s, %(email)s, %(phone_type)s, %(internal_phone)s,
-                %(workstation)s, %(device_type)s, %(specs_cpu)s, %(specs_gpu)s, %(specs_ram)s,
+                %(workstation)s, %(ws_prefix)s, %(ws_number)s, %(device_type)s, %(specs_cpu)s, %(specs_gpu)s, %(specs_ram)s,
                 %(monitor)s, %(ups)s, %(has_ad)s, %(has_drweb)s, %(has_zabbix)s,
                 %(ad_login)s, %(notes)s
             )
@@ -1,5 +1,6 @@
 import os
 import io
+import re
 import msoffcrypto
 import openpyxl
 from sqlalchemy import create_engine, text
@@ -36,6 +37,15 @@ def parse_fio(full_name):
         return parts[0], parts[1], None
     return parts[0], parts[1], " ".join(parts[2:])
 
+def parse_workstation(workstation):
+    # Canonical key (see config/migrate_ws_key.sql): 'ws-0101' -> ('WS', 101)
+    if not workstation:
+        return None, None
+    match = re.match(r'^\s*([A-Za-z]+)[-\s]?(\d{1,9})\s*$', workstation)
+    if not match:
+        return None, None
+    return match.group(1).upper(), int(match.group(2))
+
 def run_migration():
     print("🚀 Starting migration from v2.0 Excel to v3.0 Database...")
     
@@ -116,6 +126,7 @@ def run_migration():
         phone_type = row[5]
         internal_phone = str(row[6]) if row[6] else None
         workstation = str(row[7]) if row[7] else None
+        ws_prefix, ws_number = parse_workstation(workstation)
         device_type = row[8]
         
         specs_cpu = str(row[9]) if row[9] else None
@@ -134,7 +145,7 @@ def run_migration():
                 last_name, first_name, middle_name,
                 company, department, email,
                 phone_type, internal_phone,
-                workstation, device_type,
+                workstation, ws_prefix, ws_number, device_type,
                 specs_cpu, specs_ram, specs_gpu, monitor, ups,
                 has_ad, has_drweb, has_zabbix,
                 notes, is_active
@@ -142,7 +153,7 @@ def run_migration():
                 :last_name, :first_name, :middle_name,
                 :company, :department, :email,
                 :phone_type, :internal_phone,
-                :workstation, :device_type,
+                :workstation, :ws_prefix, :ws_number, :device_type,
                 :specs_cpu, :specs_ram, :specs_gpu, :monitor, :ups,
                 :has_ad, :has_drweb, :has_zabbix,
                 :notes, :is_active
@@ -160,6 +171,8 @@ def run_migration():
                 "phone_type": phone_type,
                 "internal_phone": internal_phone,
                 "workstation": workstation,
+                "ws_prefix": ws_prefix,
+                "ws_number": ws_number,
                 "device_type": device_type,
                 "specs_cpu": specs_cpu,
                 "specs_ram": specs_ram,